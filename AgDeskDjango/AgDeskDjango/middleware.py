@@ -1,15 +1,44 @@
 import zoneinfo
 from django.utils import timezone
 
+from Settings.organisation import orgSettingsManager
+from utils.tenancy import current_farm
+
 
 class TimezoneMiddleware:
+    """
+    Activates the session's time zone, or else the time zone in the current farm's org settings.
+    """
+
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
         tzname = request.session.get("django_timezone")
-        if tzname:
-            timezone.activate(zoneinfo.ZoneInfo(tzname))
+        if not tzname and getattr(request, "farm", None) is not None:
+            tzname = orgSettingsManager().farmSettings(request.farm.id)["timezone"]
+
+        try:
+            # Org settings can be edited in the admin, where the time zone is free text
+            tzinfo = zoneinfo.ZoneInfo(tzname) if tzname else None
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            tzinfo = None
+
+        if tzinfo:
+            timezone.activate(tzinfo)
         else:
             timezone.deactivate()
         return self.get_response(request)
+
+
+class TenantMiddleware:
+    """
+    Attaches the signed in user's current farm to the request as request.farm, or None.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.farm = current_farm(request.user)
+        return self.get_response(request)
@@ -81,6 +81,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware"              ,
     "django.middleware.csrf.CsrfViewMiddleware"              ,
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "AgDeskDjango.middleware.TenantMiddleware"               ,
     "django.contrib.messages.middleware.MessageMiddleware"   ,
     "django.middleware.clickjacking.XFrameOptionsMiddleware" ,
     "AgDeskDjango.middleware.TimezoneMiddleware"
@@ -97,6 +98,7 @@ TEMPLATES = [{
     "OPTIONS" : {
         "context_processors": [
             "utils.context_processors.current_user_context"      ,
+            "utils.context_processors.org_settings_context"      ,
             "django.template.context_processors.debug"           ,
             "django.template.context_processors.request"         ,
             "django.contrib.auth.context_processors.auth"        ,
@@ -203,9 +205,21 @@ CRISPY_TEMPLATE_PACK          = "bootstrap4"
 MEDIA_URL  = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# Protected downloads are authorised by Django and sent by the front-end server, "nginx"
+# (X-Accel-Redirect) or "sendfile" (X-Sendfile), or streamed by Django ("django") without one
+# See utils/downloads.py
+
+FILE_DOWNLOAD_BACKEND      = os.environ.get("FILE_DOWNLOAD_BACKEND", "django")
+FILE_DOWNLOAD_INTERNAL_URL = "/protected-media/"
+
 
 AUTH_USER_MODEL = "UserAuth.UserProfile"
 
+AUTHENTICATION_BACKENDS = [
+    "UserAuth.backends.PrefetchedUserBackend"  ,
+    "django.contrib.auth.backends.ModelBackend"
+]
+
 
 # Avoiding the wonderful debug pages to view my error messages
 # ALLOWED_HOSTS = ['*']
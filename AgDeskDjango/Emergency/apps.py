@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class EmergencyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Emergency'
+
+    def ready(self):
+        # Connect the contacts bundle versioning signal handlers
+        from . import contacts
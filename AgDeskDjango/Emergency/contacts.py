@@ -0,0 +1,140 @@
+"""
+Emergency contacts repository.
+Contacts are loaded with their live contact details through a filtered Prefetch, so a farm's whole
+contact list costs two queries however many contacts it has. New contacts and details go to the end
+of the list, found with MAX(order) rather than loading every row to count it.
+Contacts are also served as a compact JSON bundle, which the emergency service worker keeps on the
+device for when the farm's connection drops. Each farm's contacts have a version (see
+utils.versioning), bumped by any write to them, which is the bundle's ETag; every worker agrees on
+it, and revalidating an unchanged bundle costs one query for the version.
+"""
+
+# Imports
+from django.core.cache import cache
+from django.db.models import Max, Prefetch
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.renditions import original_url, rendition_url
+from utils.versioning import bump_version, current_version
+
+from .models import FarmContacts, ContactInfo
+
+
+# Constants
+CONTACTS_PREFIX = "emergencyContacts"
+CONTACTS_TTL    = 60 * 60 * 24
+
+
+def bundle_key(farmID, version):
+    return f"{CONTACTS_PREFIX}:bundle:{farmID}:{version}"
+
+
+def contacts_version(farmID):
+    return current_version(CONTACTS_PREFIX, farmID)
+
+
+# Contacts Manager
+class contactsManager():
+    """
+    Reads a farm's emergency contacts and their details.
+    """
+
+    def liveContacts(self):
+        """
+        Function to get live contacts, each with its live details in order as contact.liveInfo.
+        """
+
+        return FarmContacts.objects                                                        \
+            .alive()                                                                       \
+            .prefetch_related(Prefetch(
+                "contactinfo_set",
+                queryset = ContactInfo.objects.alive().order_by("order", "contactInfoID"),
+                to_attr  = "liveInfo"
+            ))
+
+    def farmContacts(self, farmID):
+        """
+        Returns the farm's live contacts in order, with their details: [(contact, [info, ...]), ...]
+        """
+
+        contacts = self.liveContacts()                                                     \
+            .filter(farmID=farmID)                                                         \
+            .order_by("order", "farmContactID")
+
+        return [(contact, contact.liveInfo) for contact in contacts]
+
+    def contact(self, contactID):
+        """
+        Returns a live contact with its details as contact.liveInfo, or None.
+        """
+
+        return self.liveContacts().filter(farmContactID=contactID).first()
+
+    def nextContactOrder(self, farmID):
+        last = FarmContacts.objects.alive().filter(farmID=farmID).aggregate(last=Max("order"))["last"]
+
+        return 0 if last is None else last + 1
+
+    def nextFieldOrder(self, contactID):
+        last = ContactInfo.objects.alive().filter(farmContactID=contactID).aggregate(last=Max("order"))["last"]
+
+        return 0 if last is None else last + 1
+
+    def contactsBundle(self, farmID):
+        """
+        Returns the farm's contacts for offline use, cached per version:
+            {"version": int, "contacts": [{"id": int, "name": str, "desc": str, "image": str,
+              "imageOriginal": str, "info": [{"id": int, "field": str, "fieldLabel": str, "info": str}, ...]}, ...]}
+        """
+
+        version = contacts_version(farmID)
+        bundle  = cache.get(bundle_key(farmID, version))
+        if bundle is None:
+            bundle = {
+                "version" : version,
+                "contacts": [
+                    {
+                        "id"           : contact.farmContactID                 ,
+                        "name"         : contact.name                          ,
+                        "desc"         : contact.desc                          ,
+                        "image"        : rendition_url(contact.image, "medium"),
+                        "imageOriginal": original_url(contact.image)           ,
+                        "info"         : [
+                            {
+                                "id"        : info.contactInfoID      ,
+                                "field"     : info.field              ,
+                                "fieldLabel": info.get_field_display(),
+                                "info"      : info.info
+                            }
+                            for info in contactInfo
+                        ]
+                    }
+                    for contact, contactInfo in self.farmContacts(farmID)
+                ]
+            }
+            cache.set(bundle_key(farmID, version), bundle, CONTACTS_TTL)
+
+        return bundle
+
+
+# Versioning
+@receiver(post_save  , sender=FarmContacts)
+@receiver(post_delete, sender=FarmContacts)
+def bump_contact_version(sender, instance, **kwargs):
+    bump_version(CONTACTS_PREFIX, instance.farmID_id)
+
+
+@receiver(post_save  , sender=ContactInfo)
+@receiver(post_delete, sender=ContactInfo)
+def bump_info_version(sender, instance, **kwargs):
+    # The contact is usually loaded already, as details are created from and listed with it
+    if ContactInfo.farmContactID.field.is_cached(instance):
+        farmID = instance.farmContactID.farmID_id
+    else:
+        farmID = FarmContacts.objects                                                      \
+            .filter(farmContactID=instance.farmContactID_id)                               \
+            .values_list("farmID", flat=True)                                              \
+            .first()
+    if farmID is not None:
+        bump_version(CONTACTS_PREFIX, farmID)
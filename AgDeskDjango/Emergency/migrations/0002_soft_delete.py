@@ -0,0 +1,40 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:54
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def stamp_deleted(apps, schema_editor):
+    # Rows deleted before deletedAt existed are treated as deleted now, so purging waits its full age
+    for name in ("FarmContacts", "ContactInfo"):
+        apps.get_model("Emergency", name).objects.filter(deleted=True).update(deletedAt=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Emergency', '0001_initial'),
+        ('FarmAcc', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactinfo',
+            name='deletedAt',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='farmcontacts',
+            name='deletedAt',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='contactinfo',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['farmContactID', 'order'], name='contact_info_alive_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='farmcontacts',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['farmID', 'order'], name='contact_alive_idx'),
+        ),
+        migrations.RunPython(stamp_deleted, migrations.RunPython.noop),
+    ]
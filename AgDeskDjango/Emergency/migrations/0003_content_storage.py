@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-19 16:14
+
+import utils.blobstore
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Emergency', '0002_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='farmcontacts',
+            name='image',
+            field=models.ImageField(default='images/contact_images/defaultImage.png', storage=utils.blobstore.content_storage, upload_to='images/contact_images'),
+        ),
+    ]
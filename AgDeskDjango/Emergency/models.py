@@ -1,14 +1,26 @@
 from django.db import models
+from utils import renditions, softdelete
+from utils.blobstore import ContentRecord, content_storage
+from utils.softdelete import SoftDeleteManager, alive_index
 
 
-class FarmContacts(models.Model):
+class FarmContacts(ContentRecord):
     farmContactID = models.AutoField(primary_key=True)
     farmID        = models.ForeignKey("FarmAcc.FarmInfo", on_delete=models.CASCADE) # From Tasks
     order         = models.PositiveIntegerField()
     name          = models.CharField(max_length=64)
-    image         = models.ImageField(upload_to="images/contact_images", default = "images/contact_images/defaultImage.png", null=False, blank=False)
+    image         = models.ImageField(upload_to="images/contact_images", storage=content_storage, default = "images/contact_images/defaultImage.png", null=False, blank=False)
     desc          = models.CharField(max_length=128)
     deleted       = models.BooleanField(default=False)
+    deletedAt     = models.DateTimeField(null=True, blank=True)
+
+    objects = SoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            # Live contacts of a farm in display order
+            alive_index("farmID", "order", name="contact_alive_idx")
+        ]
 
 
 class ContactInfo(models.Model):
@@ -25,3 +37,17 @@ class ContactInfo(models.Model):
     field         = models.CharField(max_length=2, choices=FIELD_CHOICES)
     info          = models.CharField(max_length=64)
     deleted       = models.BooleanField(default=False)
+    deletedAt     = models.DateTimeField(null=True, blank=True)
+
+    objects = SoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            # Live details of a contact in display order
+            alive_index("farmContactID", "order", name="contact_info_alive_idx")
+        ]
+
+
+renditions.register(FarmContacts, "image")
+softdelete.register(FarmContacts)
+softdelete.register(ContactInfo)
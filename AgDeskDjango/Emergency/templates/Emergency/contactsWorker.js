@@ -0,0 +1,64 @@
+// Emergency contacts service worker.
+// Keeps the farm's contacts bundle and the last contacts page on the device, so they still open on
+// a patchy or dropped connection. The bundle is served from the device straight away and refreshed
+// in the background; the refresh is a conditional GET, answered with a 304 while nothing changed.
+
+const CACHE_NAME = "emergency-contacts-v1";
+const BUNDLE_URL = "{% url 'contactsBundle' %}";
+const PAGE_URL   = "{% url 'emergencyContacts' %}";
+
+self.addEventListener("install", () => self.skipWaiting());
+
+self.addEventListener("activate", event => {
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(names.filter(name => name !== CACHE_NAME).map(name => caches.delete(name))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener("fetch", event => {
+    if (event.request.method !== "GET") {
+        return;
+    }
+
+    const path = new URL(event.request.url).pathname;
+    if (path === BUNDLE_URL) {
+        event.respondWith(staleWhileRevalidate(event.request));
+    } else if (path === PAGE_URL) {
+        event.respondWith(networkFirst(event.request));
+    }
+});
+
+async function refresh(cache, request) {
+    const response = await fetch(request);
+    if (response.ok) {
+        await cache.put(request, response.clone());
+    }
+    return response;
+}
+
+async function staleWhileRevalidate(request) {
+    const cache    = await caches.open(CACHE_NAME);
+    const cached   = await cache.match(request);
+    const response = refresh(cache, request);
+
+    if (cached) {
+        response.catch(() => undefined);
+        return cached;
+    }
+    return response;
+}
+
+async function networkFirst(request) {
+    const cache = await caches.open(CACHE_NAME);
+    try {
+        return await refresh(cache, request);
+    } catch (error) {
+        const cached = await cache.match(request);
+        if (cached) {
+            return cached;
+        }
+        throw error;
+    }
+}
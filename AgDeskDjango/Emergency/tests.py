@@ -1,4 +1,6 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 import random
 from utils.testing_data import FARMCONTACTS_SUPERSET, CONTACTINFO_SUPERSET, FARM_SUPERSET
 from utils.testing_data import generate_dataset_from_model
@@ -6,6 +8,7 @@ from UserAuth.models import UserProfile  # Import the custom user model
 from Emergency.models import FarmContacts, ContactInfo
 from FarmAcc.models import FarmInfo
 from Emergency.views import *
+from Emergency.contacts import contactsManager
 from Emergency.forms import *
 
 class BaseTestCase(TestCase):
@@ -1344,4 +1347,107 @@ class updateFieldFormTest(TestCase):
     
         
         
-    
\ No newline at end of file
+    
+
+# ------------------------------- TEST CASES - CONTACTS MANAGER ------------------------------- #
+
+class contactsManagerTest(TestCase):
+    def setUp(self):
+        # Create a user and a farm for testing
+        VALID_FARMS = {
+            "farm_name"     : FARM_SUPERSET["farm_name"][0],
+            "farm_street"   : FARM_SUPERSET["farm_street"][0],
+            "farm_state"    : FARM_SUPERSET["farm_state"][0],
+            "farm_postcode" : FARM_SUPERSET["farm_postcode"][0],
+            "farm_bio"      : FARM_SUPERSET["farm_bio"][0],
+            "farm_image"    : FARM_SUPERSET["farm_image"][0]
+        }
+
+        farmList = [FarmInfo(**farm_data) for farm_data in generate_dataset_from_model(VALID_FARMS, False, False, False)]
+        self.farm = FarmInfo.objects.bulk_create(farmList)
+
+        self.manager = contactsManager()
+
+    def addContacts(self, count):
+        for number in range(count):
+            contact = createContactQuery({"contact_name": f"Contact {number}", "contact_desc": "Vet", "image": "path/to/image.jpg"}, self.farm[0])
+            createFieldQuery({"contact_method": "PH", "contact_info": "0400 000 000"}, contact)
+            createFieldQuery({"contact_method": "EM", "contact_info": "vet@test.test"}, contact)
+
+    def test_contacts_load_in_two_queries(self):
+        self.addContacts(2)
+        with self.assertNumQueries(2):
+            contacts = self.manager.farmContacts(self.farm[0].id)
+        self.assertEqual(len(contacts), 2)
+
+        self.addContacts(3)
+        with self.assertNumQueries(2):
+            contacts = self.manager.farmContacts(self.farm[0].id)
+        self.assertEqual([info.field for info in contacts[0][1]], ["PH", "EM"])
+
+    def test_deleted_rows_are_left_out(self):
+        self.addContacts(2)
+        contact, info = self.manager.farmContacts(self.farm[0].id)[0]
+        deleteFieldQuery(info[0].contactInfoID)
+        deleteContactQuery(self.manager.farmContacts(self.farm[0].id)[1][0].farmContactID)
+
+        contacts = self.manager.farmContacts(self.farm[0].id)
+        self.assertEqual([contact.farmContactID for contact, info in contacts], [contact.farmContactID])
+        self.assertEqual([info.field for info in contacts[0][1]], ["EM"])
+        self.assertTrue(ContactInfo.objects.filter(farmContactID__deleted=True, deleted=True).exists())
+
+    def test_new_rows_go_to_the_end(self):
+        self.addContacts(3)
+        contacts = self.manager.farmContacts(self.farm[0].id)
+        deleteContactQuery(contacts[1][0].farmContactID)
+
+        self.assertEqual(self.manager.nextContactOrder(self.farm[0].id), 3)
+        self.assertEqual(self.manager.nextFieldOrder(contacts[0][0]), 2)
+        self.assertEqual(self.manager.nextContactOrder(self.farm[1].id), 0)
+
+
+# ------------------------------- TEST CASES - OFFLINE BUNDLE ------------------------------- #
+
+class contactsBundleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.farm = FarmInfo.objects.create(
+            farm_name     = FARM_SUPERSET["farm_name"][0][0],
+            farm_street   = "1 Farm Road",
+            farm_state    = "QLD",
+            farm_postcode = "4000",
+            farm_bio      = ""
+        )
+        self.user = UserProfile.objects.create_user(username="testuser", password="12345", currentFarm=self.farm)
+        self.client.force_login(self.user)
+
+        self.contact = createContactQuery({"contact_name": "Vet", "contact_desc": "Large animals", "image": "path/to/image.jpg"}, self.farm)
+        createFieldQuery({"contact_method": "PH", "contact_info": "0400 000 000"}, self.contact)
+
+    def test_bundle_revalidates_with_etag(self):
+        response = self.client.get(reverse("contactsBundle"))
+        contacts = response.json()["contacts"]
+        self.assertEqual([contact["name"] for contact in contacts], ["Vet"])
+        self.assertEqual(contacts[0]["info"][0]["fieldLabel"], "Phone")
+
+        with self.assertNumQueries(4): # The session, the user, the farm's settings version and the contacts version
+            notModified = self.client.get(reverse("contactsBundle"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(notModified.status_code, 304)
+
+        # Another worker, with nothing cached, agrees on the version
+        cache.clear()
+        notModified = self.client.get(reverse("contactsBundle"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(notModified.status_code, 304)
+
+        createFieldQuery({"contact_method": "EM", "contact_info": "vet@test.test"}, self.contact)
+        changed = self.client.get(reverse("contactsBundle"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(len(changed.json()["contacts"][0]["info"]), 2)
+
+    def test_worker_and_manifest(self):
+        worker = self.client.get(reverse("contactsWorker"))
+        self.assertEqual(worker["Content-Type"], "application/javascript")
+        self.assertIn(reverse("contactsBundle"), worker.content.decode())
+
+        manifest = self.client.get(reverse("contactsManifest"))
+        self.assertEqual(manifest.json()["start_url"], reverse("emergencyContacts"))
@@ -5,6 +5,9 @@ from . import views
 urlpatterns = [
     path("contacts"                                       , views.emergencyContacts, name="emergencyContacts"),
     path("contacts/<int:contactID>"                       , views.updateContact    , name="updateContact"    ),
+    path("contacts.json"                                  , views.contactsBundle   , name="contactsBundle"   ),
+    path("manifest.webmanifest"                           , views.contactsManifest , name="contactsManifest" ),
+    path("sw.js"                                          , views.contactsWorker   , name="contactsWorker"   ),
 
     path("contacts/<int:contactID>/delete"                , views.deleteContact    , name="deleteContact"    ),
     path("contacts/contactInfo/<int:contactInfoID>/delete", views.deleteContactInfo, name="deleteContactInfo")
@@ -3,25 +3,32 @@ Views for emergency contacts
 """
 
 # Imports
+from django.http import Http404, HttpResponseNotModified, JsonResponse
 from django.shortcuts import render, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 
 from django.forms import formset_factory
 from django.contrib import messages
 
+from .contacts import contactsManager, contacts_version
 from .models import FarmContacts, ContactInfo
 from .forms import createContactForm, updateContactForm, createFieldForm, updateFieldForm
 
 from FarmAcc.models import FarmInfo
+from UserAuth.membership import has_farm_access
 
 
 #Database queries
 def createContactQuery(formData, farmID):
+    # Views pass the request's farm, which is already loaded
+    farm = farmID if isinstance(farmID, FarmInfo) else FarmInfo.objects.get(id=farmID)
+
     newContact = FarmContacts(
-        farmID = FarmInfo.objects.get(id=farmID)                               ,
-        order  = len(FarmContacts.objects.filter(farmID=farmID, deleted=False)),
-        name   = formData["contact_name"]                                      ,
-        desc   = formData["contact_desc"]                                      ,
+        farmID = farm                                       ,
+        order  = contactsManager().nextContactOrder(farm.id),
+        name   = formData["contact_name"]                   ,
+        desc   = formData["contact_desc"]                   ,
         image  = formData["image"       ]
     )
 
@@ -43,11 +50,7 @@ def updateContactQuery(formData, contactID):
 
 def deleteContactQuery(contactID):
     contact = FarmContacts.objects.get(farmContactID=contactID)
-    contactInfo = ContactInfo.objects.filter(farmContactID=contactID, deleted=False)
-
-    for info in contactInfo:
-        info.deleted = True
-        info.save()
+    ContactInfo.objects.filter(farmContactID=contactID).soft_delete()
 
     contact.deleted = True
     contact.save()
@@ -55,9 +58,9 @@ def deleteContactQuery(contactID):
 
 def createFieldQuery(formData, contactObject):
     newField = ContactInfo(
-        farmContactID = contactObject                                                              ,
-        order         = len(ContactInfo.objects.filter(farmContactID=contactObject, deleted=False)),
-        field         = formData["contact_method"]                                                 ,
+        farmContactID = contactObject                                     ,
+        order         = contactsManager().nextFieldOrder(contactObject),
+        field         = formData["contact_method"]                        ,
         info          = formData["contact_info"  ]
     )
 
@@ -90,24 +93,14 @@ def emergencyContacts(request):
     Page for the farms emergency contacts.
     """
 
-    # Refactor the contacts_list code into a query function?
-    contacts = FarmContacts.objects                                \
-        .filter(farmID=request.user.currentFarm_id, deleted=False) \
-        .order_by("order")
-
-    contacts_list = []
-    for contact in contacts:
-        contact_info = ContactInfo.objects                              \
-            .filter(farmContactID=contact.farmContactID, deleted=False) \
-            .order_by("order")
-        contacts_list.append([contact, contact_info])
+    contacts_list = contactsManager().farmContacts(request.user.currentFarm_id)
 
     createContactContext  = createContactForm()
     updateContactContext  = updateContactForm()
     addContactInfoFormset = formset_factory(createFieldForm)
     contactInfoForm       = addContactInfoFormset(prefix="contactInfo")
     # Redirect to emergency table view with a message to add contacts
-    noContacts            = len(contacts) == 0
+    noContacts            = len(contacts_list) == 0
     noContactsMessage     = "You have no emergency contacts yet. Add some!"
 
     context = {
@@ -124,7 +117,7 @@ def emergencyContacts(request):
         contact_info_form = addContactInfoFormset(request.POST, request.FILES, prefix="contactInfo")
 
         if contact_form.is_valid():
-            new_contact = createContactQuery(contact_form.cleaned_data, request.user.currentFarm_id)
+            new_contact = createContactQuery(contact_form.cleaned_data, request.farm)
             if contact_info_form.is_valid():
                 for form in contact_info_form:
                     createFieldQuery(form.cleaned_data, new_contact)
@@ -138,18 +131,13 @@ def emergencyContacts(request):
 @login_required(login_url="login")
 def updateContact(request, contactID):
     addContactInfoFormset  = formset_factory(createFieldForm)
-    current_contact = FarmContacts.objects.get(farmContactID=contactID)
+    current_contact = contactsManager().contact(contactID)
+    if current_contact is None or not has_farm_access(request, current_contact):
+        raise Http404("Contact not found")
 
     if request.method == "GET":
-        contact = FarmContacts.objects.get(farmContactID=contactID)
-
-        contacts_info = []
-        contact_info = ContactInfo.objects                     \
-            .filter(farmContactID_id=contactID, deleted=False) \
-            .values()                                          \
-            .order_by("order")
-        for info in contact_info:
-            contacts_info.append(info)
+        contact       = current_contact
+        contacts_info = contact.liveInfo
 
         contact_form = createContactForm(initial={
             "contact_name": contact.name ,
@@ -199,10 +187,56 @@ def updateContact(request, contactID):
     return render(request, "Emergency/farmContacts.html")
 
 
+# Offline Bundle
+@login_required(login_url="login")
+def contactsBundle(request):
+    """
+    JSON endpoint returning the farm's contacts and their details (see Emergency.contacts).
+    The response carries the farm's contacts version as a strong ETag, so the service worker
+    revalidates with If-None-Match and gets a 304 while the contacts are unchanged.
+    """
+
+    contactsManagerInstance = contactsManager()
+    farm = request.user.currentFarm
+    if farm is None:
+        return JsonResponse({"error": "No farm selected"}, status=400)
+
+    etag = f'"{farm.id}-{contacts_version(farm.id)}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(contactsManagerInstance.contactsBundle(farm.id))
+
+    response["ETag"         ] = etag
+    response["Cache-Control"] = "private, no-cache"
+
+    return response
+
+
+def contactsManifest(request):
+    manifest = {
+        "name"      : "AgDesk Emergency Contacts" ,
+        "short_name": "Emergency"                 ,
+        "start_url" : reverse("emergencyContacts"),
+        "scope"     : reverse("emergencyContacts"),
+        "display"   : "standalone"
+    }
+
+    return JsonResponse(manifest, content_type="application/manifest+json")
+
+
+def contactsWorker(request):
+    # Served from /emergency/ rather than static, so the worker's scope covers the contacts pages
+    response = render(request, "Emergency/contactsWorker.js", content_type="application/javascript")
+    response["Cache-Control"] = "no-cache"
+
+    return response
+
+
 # Deletion Endpoints
 @login_required(login_url="login")
 def deleteContact(request, contactID):
-    if request.user.currentFarm_id == FarmContacts.objects.get(farmContactID=contactID).farmID.id:
+    if has_farm_access(request, FarmContacts.objects.only("farmID").get(farmContactID=contactID)):
         deleteContactQuery(contactID)
         messages.add_message(request, messages.WARNING, "Contact Deleted")
 
@@ -211,7 +245,11 @@ def deleteContact(request, contactID):
 
 @login_required(login_url="login")
 def deleteContactInfo(request, contactInfoID):
-    if request.user.currentFarm_id == ContactInfo.objects.get(contactInfoID=contactInfoID).farmContactID.farmID.id:
+    contact = ContactInfo.objects                                                    \
+        .select_related("farmContactID")                                             \
+        .only("farmContactID", "farmContactID__farmID")                              \
+        .get(contactInfoID=contactInfoID)
+    if has_farm_access(request, contact.farmContactID):
         contactID = deleteFieldQuery(contactInfoID)
         messages.add_message(request, messages.WARNING, "Contact Info Deleted")
 
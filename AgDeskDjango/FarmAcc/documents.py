@@ -0,0 +1,72 @@
+"""
+Farm document library.
+A farm's File Records, with their category joined in, listed a page at a time in name order with
+keyset paging (see utils.pagination). Listings and the review due query always filter on the farm
+first, so they are answered from the (farm, fileName) and (farm, reviewDate) indexes.
+"""
+
+# Imports
+from django.shortcuts import get_object_or_404
+
+from utils.pagination import page_of
+
+from .models import FileRecord
+
+
+# Constants
+DOCUMENT_PAGE_SIZE = 50
+DOCUMENT_ORDER     = (("fileName", str), ("id", int))
+
+
+def farm_documents(farmID):
+    """
+    Function to get a farm's File Records with their category. Without a farm there are none.
+    """
+
+    if farmID is None:
+        return FileRecord.objects.none()
+
+    return FileRecord.objects                                                              \
+        .filter(farm_id=farmID)                                                            \
+        .select_related("fileCategory")
+
+
+def get_document(farmID, fileID):
+    """
+    Function to get one of a farm's File Records, raising Http404 for any other farm's.
+    """
+
+    return get_object_or_404(farm_documents(farmID), pk=fileID)
+
+
+def document_library(farmID, filters, cursor=None, limit=DOCUMENT_PAGE_SIZE):
+    """
+    Function to get one page of a farm's File Records in name order.
+    filters may contain:
+        search    : text in fileName, case insensitive
+        category  : fileCategory ID (int)
+        reviewDue : review date on or before (date)
+    """
+
+    records = farm_documents(farmID)
+
+    if filters.get("search"):
+        records = records.filter(fileName__icontains=filters["search"])
+    if filters.get("category") is not None:
+        records = records.filter(fileCategory_id=filters["category"])
+    if filters.get("reviewDue") is not None:
+        records = records.filter(reviewDate__lte=filters["reviewDue"])
+
+    return page_of(records, cursor, DOCUMENT_ORDER, limit, descending=False)
+
+
+def review_due(farmID, until, limit=DOCUMENT_PAGE_SIZE):
+    """
+    Function to get a farm's File Records due for review on or before until, most overdue first.
+    """
+
+    return list(
+        farm_documents(farmID)                                                             \
+            .filter(reviewDate__lte=until)                                                 \
+            .order_by("reviewDate", "id")[:limit]
+    )
@@ -0,0 +1,26 @@
+"""
+Deletes expired linking codes.
+    python manage.py purge_linking_codes [--batch-size <rows>]
+Codes are no longer purged each time one is generated, so this is meant to be run periodically
+(e.g. hourly from cron). Expired codes are refused when used either way.
+"""
+
+# Imports
+from django.core.management.base import BaseCommand, CommandError
+
+from FarmAcc.views import LinkingManager, PURGE_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Delete expired linking codes in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        deleted = LinkingManager().delete_expired_codes(batch_size=options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(f"{deleted} expired linking codes deleted."))
@@ -0,0 +1,47 @@
+"""
+Recounts the references to each stored upload and deletes unreferenced ones.
+    python manage.py recount_blobs [--dry-run]
+Reference counts are kept up to date as files are saved and deleted (see utils.blobstore), but can
+drift when file names are written without going through the storage, e.g. by bulk updates or a
+restored backup. This is meant to be run occasionally (e.g. weekly from cron), when few uploads
+are in progress, as an upload only references its blob once its record is saved.
+"""
+
+# Imports
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from FarmAcc.models import StoredBlob
+from utils.blobstore import content_fields, content_storage
+
+
+class Command(BaseCommand):
+    help = "Recount the references to stored uploads and delete unreferenced ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report the changes")
+
+    def handle(self, *args, **options):
+        references = Counter()
+        for model, fieldName in content_fields():
+            # Soft deleted records still reference their files, so every row is counted
+            references.update(model._base_manager.exclude(**{fieldName: ""}).values_list(fieldName, flat=True))
+
+        for blob in StoredBlob.objects.iterator():
+            refs = references[blob.name]
+            if refs == blob.refs:
+                continue
+
+            if options["dry_run"]:
+                self.stdout.write(f"{blob.name}: {blob.refs} references recorded, {refs} found")
+            elif refs == 0:
+                with transaction.atomic():
+                    # Left alone if it was referenced again meanwhile
+                    if StoredBlob.objects.filter(digest=blob.digest, refs=blob.refs).update(refs=1):
+                        content_storage().delete(blob.name)
+            else:
+                StoredBlob.objects.filter(digest=blob.digest).update(refs=refs)
+
+        self.stdout.write(self.style.SUCCESS("Stored uploads recounted."))
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.4 on 2026-10-19 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FarmAcc', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='linkingcode',
+            index=models.Index(fields=['code', 'expires_at'], name='linkingcode_valid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='linkingcode',
+            index=models.Index(fields=['expires_at'], name='linkingcode_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.4 on 2026-10-19 16:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FarmAcc', '0002_linking_code_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='filerecord',
+            name='farm',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='files', to='FarmAcc.farminfo'),
+        ),
+        migrations.AddIndex(
+            model_name='filerecord',
+            index=models.Index(fields=['farm', 'fileName'], name='filerecord_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='filerecord',
+            index=models.Index(fields=['farm', 'reviewDate'], name='filerecord_review_idx'),
+        ),
+    ]
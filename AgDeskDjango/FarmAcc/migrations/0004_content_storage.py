@@ -0,0 +1,33 @@
+# Generated by Django 5.0.4 on 2026-10-19 16:14
+
+import utils.blobstore
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FarmAcc', '0003_file_record_farm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('refs', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='farminfo',
+            name='farm_image',
+            field=models.ImageField(blank=True, default='images/farm_images/default_image.png', null=True, storage=utils.blobstore.content_storage, upload_to='images/farm_images'),
+        ),
+        migrations.AlterField(
+            model_name='filerecord',
+            name='file',
+            field=models.FileField(storage=utils.blobstore.content_storage, upload_to='files/'),
+        ),
+    ]
@@ -6,10 +6,12 @@ Models for farms and files
 from django.db import models
 from django.utils import timezone
 from datetime import datetime, timedelta
+from utils import renditions
+from utils.blobstore import ContentRecord, content_storage
 
 
 # Farms
-class FarmInfo(models.Model):
+class FarmInfo(ContentRecord):
     farm_name     = models.CharField(max_length=100)
     farm_street   = models.CharField(max_length=100)
     farm_state    = models.CharField(max_length=20 )
@@ -18,6 +20,7 @@ class FarmInfo(models.Model):
     farm_bio      = models.TextField()
     farm_image    = models.ImageField(
         upload_to  = "images/farm_images"                  ,
+        storage    = content_storage                       ,
         default    = "images/farm_images/default_image.png",
         blank      = True                                  ,
         null       = True
@@ -33,13 +36,21 @@ class LinkingCode(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
 
+    class Meta:
+        indexes = [
+            # Looking up a code that is still valid
+            models.Index(fields=["code", "expires_at"], name="linkingcode_valid_idx"  ),
+            # Purging expired codes (purge_linking_codes)
+            models.Index(fields=["expires_at"]        , name="linkingcode_expiry_idx")
+        ]
+
     def is_expired(self):
         return timezone.now() > self.expires_at
 
     def save(self, *args, **kwargs):
         if not self.expires_at:
             # Default expiry set to 12 hours after creation
-            self.expires_at = datetime.now() + timedelta(hours=12)
+            self.expires_at = timezone.now() + timedelta(hours=12)
         super().save(*args, **kwargs)
 
 
@@ -56,15 +67,50 @@ class FileCategory(models.Model):
         return self.fileCategoryName
 
 
-class FileRecord(models.Model):
+class FileRecord(ContentRecord):
     """
     The FileRecord model is used to store farm related documents within the Django application,
     which farmers can set review dates for. When a new File Record is instantiated, it is uploaded
-    under the 'files' directory within the media folder.
+    under the 'files' directory within the media folder. Each File Record belongs to one farm, and
+    is only listed for that farm (see FarmAcc.documents).
     """
 
     # File Record Attributes
+    farm         = models.ForeignKey(FarmInfo, on_delete=models.CASCADE, null=True, related_name="files")
     fileName     = models.CharField(max_length=100    )
     reviewDate   = models.DateField(null=True         )
-    file         = models.FileField(upload_to="files/")
+    file         = models.FileField(upload_to="files/", storage=content_storage)
     fileCategory = models.ForeignKey(FileCategory, on_delete=models.SET_NULL,  null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The document library, in name order
+            models.Index(fields=["farm", "fileName"  ], name="filerecord_name_idx"  ),
+            # Documents due for review
+            models.Index(fields=["farm", "reviewDate"], name="filerecord_review_idx")
+        ]
+
+
+class StoredBlob(models.Model):
+    """
+    The index of uploads kept by the content addressed storage (see utils.blobstore): one row per
+    distinct file, with the number of file fields referencing it.
+    """
+
+    digest = models.CharField(max_length=64, primary_key=True) # SHA-256, hex
+    name   = models.CharField(max_length=100, unique=True    )
+    size   = models.BigIntegerField()
+    refs   = models.PositiveIntegerField(default=0)
+
+
+# Cache Versions
+class CacheVersion(models.Model):
+    """
+    Version counters of cached data (see utils.versioning), e.g. "emergencyContacts:12" -> 7.
+    """
+
+    key     = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+
+renditions.register(FarmInfo, "farm_image")
@@ -3,11 +3,31 @@ Tests for UserAuth
 """
 
 # Import
-from django.test import TestCase
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.base import ContentFile
+from django.db import DatabaseError
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+import tempfile
+from unittest.mock import patch
 import random
 
 from utils.testing_data import FARM_SUPERSET, FILRECORD_SUPERSET, LINKING_CODE_SUPERSET
 from utils.testing_data import generate_dataset_from_model
+from utils.context_processors import current_user_context
+from utils.blobstore import content_storage
+from utils.tenancy import current_farm
+
+from UserAuth.backends import PrefetchedUserBackend
+
+from FarmAcc.documents import document_library, review_due
+from FarmAcc.models    import LinkingCode, FileCategory, FileRecord, StoredBlob
+from FarmAcc.views     import LinkingManager
 
 from UserAuth.models import *
 from UserAuth.forms  import *
@@ -47,16 +67,45 @@ class random_codeTest(BaseTestCase):
     def setUp(self):
         super().setUp()
 
+    def test_codes_are_random(self):
+        codes = {LinkingManager().random_code() for _ in range(20)}
+        self.assertEqual(len(codes), 20)
+        self.assertTrue(all(len(code) == 15 and code.isalnum() for code in codes))
+
 
 class delete_expired_codesTest(BaseTestCase):
     def setUp(self):
         super().setUp()
 
+    def test_expired_codes_are_deleted_in_batches(self):
+        for number in range(5):
+            LinkingCode.objects.create(code=f"EXPIRED{number}", farm=self.farm[0], expires_at=timezone.now() - timedelta(hours=1))
+        LinkingCode.objects.create(code="VALID", farm=self.farm[0])
+
+        call_command("purge_linking_codes", "--batch-size", "2", stdout=StringIO())
+        self.assertEqual(list(LinkingCode.objects.values_list("code", flat=True)), ["VALID"])
+
 
 class generate_codeTest(BaseTestCase):
     def setUp(self):
         super().setUp()
 
+    def test_generating_a_code_is_a_single_insert(self):
+        LinkingCode.objects.create(code="EXPIRED", farm=self.farm[0], expires_at=timezone.now() - timedelta(hours=1))
+
+        with self.assertNumQueries(3): # The insert, in a savepoint
+            code = LinkingManager().generate_code(self.farm[0])
+        self.assertEqual(LinkingCode.objects.get(code=code).farm, self.farm[0])
+        self.assertTrue(LinkingCode.objects.filter(code="EXPIRED").exists())
+
+    def test_colliding_codes_are_retried(self):
+        LinkingCode.objects.create(code="TAKEN", farm=self.farm[1])
+
+        manager = LinkingManager()
+        codes   = iter(["TAKEN", "FREE"])
+        with patch.object(manager, "random_code", lambda: next(codes)):
+            self.assertEqual(manager.generate_code(self.farm[0]), "FREE")
+
 
 class get_codeTest(BaseTestCase):
     def setUp(self):
@@ -72,6 +121,13 @@ class get_farmTest(BaseTestCase):
     def setUp(self):
         super().setUp()
 
+    def test_expired_codes_have_no_farm(self):
+        LinkingCode.objects.create(code="EXPIRED", farm=self.farm[0], expires_at=timezone.now() - timedelta(hours=1))
+        LinkingCode.objects.create(code="VALID"  , farm=self.farm[1])
+
+        self.assertFalse(LinkingManager().get_farm("EXPIRED"))
+        self.assertEqual(LinkingManager().get_farm("VALID"), self.farm[1])
+
 
 class use_codeTest(BaseTestCase):
     def setUp(self):
@@ -98,3 +154,211 @@ class UploadDocumentTest(BaseTestCase):
 class AddFileCategoryTest(BaseTestCase):
     def setUp(self):
         super().setUp()
+
+
+# Document Library
+class documentLibraryTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        today    = timezone.localdate()
+        category = FileCategory.objects.create(fileCategoryName="Insurance")
+
+        self.files = FileRecord.objects.bulk_create([
+            FileRecord(farm=self.farm[0], fileName=f"policy_{number}", file="files/policy.pdf",
+                       reviewDate=today + timedelta(days=number - 2), fileCategory=category)
+            for number in range(5)
+        ])
+        FileRecord.objects.create(farm=self.farm[1], fileName="policy_other", file="files/other.pdf", reviewDate=today)
+        self.today = today
+
+    def test_pages_only_list_the_farms_files(self):
+        with self.assertNumQueries(1):
+            page, nextCursor = document_library(self.farm[0].id, {}, limit=3)
+            categories       = [file.fileCategory.fileCategoryName for file in page]
+        self.assertEqual([file.fileName for file in page], ["policy_0", "policy_1", "policy_2"])
+        self.assertEqual(categories, ["Insurance"] * 3)
+
+        page, nextCursor = document_library(self.farm[0].id, {}, nextCursor, limit=3)
+        self.assertEqual([file.fileName for file in page], ["policy_3", "policy_4"])
+        self.assertIsNone(nextCursor)
+
+        page, _ = document_library(self.farm[0].id, {"search": "Y_3"})
+        self.assertEqual([file.fileName for file in page], ["policy_3"])
+
+    def test_review_due(self):
+        due = review_due(self.farm[0].id, self.today)
+        self.assertEqual([file.fileName for file in due], ["policy_0", "policy_1", "policy_2"])
+
+    def test_other_farms_files_are_not_found(self):
+        self.client.force_login(self.user)
+        other = FileRecord.objects.get(farm=self.farm[1])
+
+        response = self.client.get(reverse("delete_file", args=[other.id]))
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(FileRecord.objects.filter(pk=other.pk).exists())
+
+        response = self.client.get(reverse("fileView"))
+        self.assertEqual([file.fileName for file in response.context["fileList"]], [f"policy_{number}" for number in range(5)])
+
+
+# File Downloads
+class downloadFileTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        mediaRoot = tempfile.TemporaryDirectory()
+        self.addCleanup(mediaRoot.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=mediaRoot.name))
+
+        self.record = FileRecord(farm=self.farm[0], fileName="Survey")
+        self.record.file.save("survey.pdf", ContentFile(b"0123456789"))
+        self.url    = reverse("fileDownload", args=[self.record.id])
+        self.client.force_login(self.user)
+
+    @override_settings(FILE_DOWNLOAD_BACKEND="nginx")
+    def test_nginx_sends_the_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.record.file.name}")
+        self.assertEqual(response["Content-Type"], "application/pdf")
+        self.assertEqual(response.content, b"")
+
+    @override_settings(FILE_DOWNLOAD_BACKEND="sendfile")
+    def test_sendfile_sends_the_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response["X-Sendfile"], self.record.file.path)
+
+    @override_settings(FILE_DOWNLOAD_BACKEND="django")
+    def test_django_streams_byte_ranges(self):
+        response = self.client.get(self.url)
+        self.assertEqual(b"".join(response.streaming_content), b"0123456789")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=2-4")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 2-4/10")
+        self.assertEqual(b"".join(response.streaming_content), b"234")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-3")
+        self.assertEqual(b"".join(response.streaming_content), b"789")
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=20-")
+        self.assertEqual(response.status_code, 416)
+
+
+# Content Addressed Storage
+class contentStorageTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        mediaRoot = tempfile.TemporaryDirectory()
+        self.addCleanup(mediaRoot.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=mediaRoot.name))
+
+    def upload(self, fileName, content):
+        record = FileRecord(farm=self.farm[0], fileName=fileName)
+        record.file.save(fileName, ContentFile(content))
+        return record
+
+    def test_duplicate_uploads_are_stored_once(self):
+        manual = self.upload("manual.pdf", b"Tractor manual")
+        copy   = self.upload("manual (1).PDF", b"Tractor manual")
+        other  = self.upload("other.pdf", b"Harvester manual")
+
+        self.assertEqual(manual.file.name, copy.file.name)
+        self.assertTrue(manual.file.name.startswith("blobs/") and manual.file.name.endswith(".pdf"))
+        self.assertNotEqual(manual.file.name, other.file.name)
+        self.assertEqual(StoredBlob.objects.get(name=manual.file.name).refs, 2)
+
+        storage = content_storage()
+        storage.delete(manual.file.name)
+        self.assertTrue(storage.exists(manual.file.name))
+        storage.delete(copy.file.name)
+        self.assertFalse(storage.exists(manual.file.name))
+        self.assertFalse(StoredBlob.objects.filter(name=manual.file.name).exists())
+
+    def test_recount_blobs(self):
+        manual = self.upload("manual.pdf", b"Tractor manual")
+        orphan = self.upload("orphan.pdf", b"Nobody's file")
+        FileRecord.objects.filter(pk=orphan.pk).delete()
+        StoredBlob.objects.filter(name=manual.file.name).update(refs=5)
+
+        call_command("recount_blobs", stdout=StringIO())
+
+        self.assertEqual(StoredBlob.objects.get(name=manual.file.name).refs, 1)
+        self.assertFalse(StoredBlob.objects.filter(name=orphan.file.name).exists())
+        self.assertFalse(content_storage().exists(orphan.file.name))
+
+
+class contentStorageRequestTest(TransactionTestCase):
+    def setUp(self):
+        mediaRoot = tempfile.TemporaryDirectory()
+        self.addCleanup(mediaRoot.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=mediaRoot.name))
+
+        farm = FarmInfo.objects.create(
+            farm_name     = "Test Farm",
+            farm_street   = "1 Road"   ,
+            farm_state    = "QLD"      ,
+            farm_postcode = "4000"     ,
+            farm_bio      = ""         ,
+            farm_image    = None
+        )
+        user = UserProfile.objects.create_user(username="testuser", password="12345", currentFarm=farm)
+        self.client.force_login(user)
+
+    def test_failed_upload_keeps_no_reference(self):
+        save_base = FileRecord.save_base
+
+        # Fails after the file is stored and the record inserted, as a lost connection would
+        def save_then_fail(record, *args, **kwargs):
+            save_base(record, *args, **kwargs)
+            raise DatabaseError("Connection lost")
+
+        with patch.object(FileRecord, "save_base", save_then_fail), self.assertRaises(DatabaseError):
+            self.client.post(reverse("fileView"), {
+                "fileName"        : "Manual"                                  ,
+                "file"            : ContentFile(b"Tractor manual", "manual.pdf"),
+                "reviewDate_day"  : 1                                         ,
+                "reviewDate_month": 1                                         ,
+                "reviewDate_year" : 2030
+            })
+
+        # The record and its reference are rolled back together
+        self.assertFalse(FileRecord.objects.exists())
+        self.assertFalse(StoredBlob.objects.exists())
+
+
+# Tenant Context
+class tenantContextTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_signed_in_users_are_loaded_with_their_farm(self):
+        backend = PrefetchedUserBackend()
+        with self.assertNumQueries(1):
+            user = backend.get_user(self.user.pk)
+            self.assertEqual(current_farm(user), self.farm[0])
+            self.assertEqual(user.currentFarm.farm_name, self.farm[0].farm_name)
+
+        self.farm[0].farm_name = "Renamed"
+        self.farm[0].save()
+        self.assertEqual(current_farm(backend.get_user(self.user.pk)).farm_name, "Renamed")
+
+        # Users loaded without their farm, e.g. through another backend
+        user = UserProfile.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(current_farm(user), self.farm[0])
+            self.assertEqual(user.currentFarm, self.farm[0])
+
+        self.assertIsNone(current_farm(AnonymousUser()))
+
+    def test_context_processor_reads_the_request(self):
+        request      = RequestFactory().get("/")
+        request.user = self.user
+        request.farm = current_farm(self.user)
+
+        with self.assertNumQueries(0):
+            context = current_user_context(request)
+        self.assertEqual((context["farmName"], context["currentFarmID"]), (self.farm[0].farm_name, self.farm[0].id))
+
+        request.user = AnonymousUser()
+        self.assertEqual(current_user_context(request), {"currentFarmID": 0})
@@ -4,20 +4,31 @@ Views for farms and files.
 
 # Imports
 from datetime import date
-import random, string
+import os, random, string
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.http import HttpRequest, HttpResponseRedirect, FileResponse
+from django.db import IntegrityError, transaction
+from django.http import HttpRequest, HttpResponseRedirect
 from django.shortcuts import render, redirect
 from django.urls import reverse
 from django.utils import timezone
 
+from .documents import document_library, get_document, review_due
 from .forms import UploadDocument, AddFileCategory, JoinFarmForm, NewFarm
-from .models import FarmInfo, LinkingCode, FileRecord
+from .models import FarmInfo, LinkingCode
 
+from UserAuth.membership import OWNER_ROLE
 from UserAuth.models import UserProfile, user_farm
 
+from utils.downloads import download_response
+
+
+# Constants
+CODE_LENGTH      = 15
+CODE_ATTEMPTS    = 5
+PURGE_BATCH_SIZE = 1000
+
 
 # This class  is responsible for generating, deleting and using linking codes.
 class LinkingManager():
@@ -25,36 +36,47 @@ class LinkingManager():
     # Generates a random 15-character code consisting of uppercase letters and digits
     def random_code(self):
         characters = string.ascii_uppercase + string.digits
-        linking_code = ''.join(random.choice(characters) for _ in range(15))
-
-        # Check if the generated code already exists in the database
-        if LinkingCode.objects.filter(code=linking_code).exists():
-            # If it exists, recursively generate a new code
-            return self.random_code()
-        return linking_code
-
-    # Checks all linking codes in the database and deletes any that have expired
-    def delete_expired_codes(self):
-        LinkingCode.objects.filter(expires_at__lte=timezone.now()).delete()
-
-    # Generates a new linking code for a given farm ID and saves it to the database
+        return ''.join(random.SystemRandom().choice(characters) for _ in range(CODE_LENGTH))
+
+    # Deletes expired linking codes in batches, returning how many were deleted (purge_linking_codes)
+    def delete_expired_codes(self, batch_size=PURGE_BATCH_SIZE):
+        deleted = 0
+        while True:
+            batch = list(
+                LinkingCode.objects
+                    .filter(expires_at__lte=timezone.now())
+                    .values_list("id", flat=True)[:batch_size]
+            )
+            if not batch:
+                return deleted
+
+            deleted += LinkingCode.objects.filter(id__in=batch).delete()[0]
+
+    # Generates a new linking code for a given farm ID and saves it to the database.
+    # The unique constraint on code catches the rare collision, in which case another code is tried.
     def generate_code(self, farmID, expiry=False):
-        self.delete_expired_codes()
-        linking_code = self.random_code()
-        if expiry:
-            new_code = LinkingCode.objects.create(code=linking_code, farm=farmID, expires_at=expiry)
-        else:
-            new_code = LinkingCode.objects.create(code=linking_code, farm=farmID)
-        new_code.save()
-        return linking_code
-
-    # Retrieves a linking code object from the database based on the provided code
-    def get_code(self, code: string):
-        try:
-            linking_code = LinkingCode.objects.get(code=code)
-            return linking_code
-        except LinkingCode.DoesNotExist:
-            return False
+        for _ in range(CODE_ATTEMPTS):
+            linking_code = self.random_code()
+            try:
+                with transaction.atomic():
+                    if expiry:
+                        LinkingCode.objects.create(code=linking_code, farm=farmID, expires_at=expiry)
+                    else:
+                        LinkingCode.objects.create(code=linking_code, farm=farmID)
+                return linking_code
+            except IntegrityError:
+                continue
+
+        raise IntegrityError(f"Could not generate a unique linking code in {CODE_ATTEMPTS} attempts")
+
+    # Retrieves a linking code object from the database based on the provided code. Only codes that
+    # have not expired are returned when valid_only is set.
+    def get_code(self, code: string, valid_only=False):
+        linking_codes = LinkingCode.objects.filter(code=code)
+        if valid_only:
+            linking_codes = linking_codes.filter(expires_at__gt=timezone.now())
+
+        return linking_codes.first() or False
 
     # Deletes a linking code from the database based on the provided code
     def delete_code(self, code: string):
@@ -64,9 +86,9 @@ class LinkingManager():
         else:
             return "Code does not exist"
 
-    # Get the farm associated with a linking code
+    # Get the farm associated with a linking code that has not expired
     def get_farm(self, code: string):
-        codeInstance = self.get_code(code)
+        codeInstance = self.get_code(code, valid_only=True)
         if codeInstance:
             return codeInstance.farm
         return False
@@ -176,6 +198,8 @@ def joinFarm(request):
             linking_code = form.cleaned_data["linking_code"]
             farm = linking_manager.get_farm(linking_code)
             linking_manager.use_code(request=request, code=linking_code, user=request.user)
+            if not farm:
+                return redirect("joinFarm")
             return redirect("home", farm_id=farm.id)
 
         print(form.errors)
@@ -201,7 +225,7 @@ def newFarm(request):
 
             newId = form.save()
             farmInstance = FarmInfo.objects.get(id=newId.id)
-            current_user.farm.add(farmInstance)
+            current_user.farm.add(farmInstance, through_defaults={"role": OWNER_ROLE})
             current_user.currentFarm_id = farmInstance
             current_user.save()
             return redirect("home", farm_id = farmInstance.id)
@@ -234,13 +258,22 @@ def fileView(request: HttpRequest):
     'farmFiles.html'.
 
     The variable 'today' is used to determine if a given FileRecord has exceeded their review date.
+
+    Only the current farm's files are listed, a page at a time in name order. Query parameters:
+    q (text in the file name), category (file category ID) and cursor.
     """
 
+    # Files belong to a farm, so one must be chosen first
+    farmID = request.user.currentFarm_id
+    if farmID is None:
+        return redirect("chooseFarm")
+
     # Handle 'POST' requests
     if request.method == "POST":
         uploadDocForm = UploadDocument(request.POST, request.FILES)
         if uploadDocForm.is_valid():
-            file = uploadDocForm.save(commit=False)
+            file         = uploadDocForm.save(commit=False)
+            file.farm_id = farmID
 
             category_id = uploadDocForm.cleaned_data["fileCategory"]
             if category_id != "":
@@ -263,14 +296,28 @@ def fileView(request: HttpRequest):
     # Handle 'GET' Requests
     fileCatForm   = AddFileCategory()
     uploadDocForm = UploadDocument()
-    # Will need to filter it on a tenant by tenant basis
-    fileList      = FileRecord.objects.all().order_by("fileName")
+    today         = date.today()
+
+    filters = {
+        "search"  : request.GET.get("q", "").strip(),
+        "category": request.GET.get("category")
+    }
+    try:
+        filters["category"] = int(filters["category"]) if filters["category"] else None
+    except ValueError:
+        filters["category"] = None
+
+    fileList, nextCursor = document_library(farmID, filters, request.GET.get("cursor"))
 
     context = {
-        "fileList"     : fileList     ,
-        "uploadDocForm": uploadDocForm,
-        "fileCatForm"  : fileCatForm  ,
-        "today"        : date.today()
+        "fileList"     : fileList                 ,
+        "nextCursor"   : nextCursor               ,
+        "search"       : filters["search"]        ,
+        "category"     : filters["category"]      ,
+        "reviewDue"    : review_due(farmID, today),
+        "uploadDocForm": uploadDocForm            ,
+        "fileCatForm"  : fileCatForm              ,
+        "today"        : today
     }
 
     return render(request, "FarmAcc/farmFiles.html", context)
@@ -280,16 +327,18 @@ def fileView(request: HttpRequest):
 def downloadFile(request: HttpRequest, file_id: int):
     """
     This view, given a file_id for a specific 'fileRecord' object, will download the file in
-    the user's browser. 
+    the user's browser. The transfer itself is handed to the front-end server where there is one
+    (see utils.downloads).
     """
 
-    # Retrieve the specific FileRecord Object
-    file_to_download = FileRecord.objects.get(pk=file_id)
-    file             = file_to_download.file.open()
-    response         = FileResponse(file, as_attachment=True, filename=file_to_download.file.name)
+    # Retrieve the specific FileRecord Object, if it belongs to the current farm
+    file_to_download = get_document(request.user.currentFarm_id, file_id)
+
+    # Stored files are named after their content (see utils.blobstore), so name it after the record
+    extension = os.path.splitext(file_to_download.file.name)[1]
 
-    # Return a FileResponse object to the requesting browser
-    return response
+    # Return the file to the requesting browser
+    return download_response(request, file_to_download.file, f"{file_to_download.fileName}{extension}")
 
 
 @login_required(login_url="login")
@@ -298,7 +347,7 @@ def deleteFile(request: HttpRequest, file_id: int):
     This view, given a file_id, will delete the corresponding 'FileRecord' object from the database.
     """
 
-    file = FileRecord.objects.get(id=file_id)
+    file = get_document(request.user.currentFarm_id, file_id)
     file.delete()
 
     return HttpResponseRedirect(reverse("fileView"))
@@ -310,8 +359,8 @@ def editFile(request: HttpRequest, file_id: int):
     This view enables edit
     """
 
-    # Retrieve the requested File_id
-    file = FileRecord.objects.get(pk=file_id)
+    # Retrieve the requested File_id, if it belongs to the current farm
+    file = get_document(request.user.currentFarm_id, file_id)
 
     # Pre-populate the form with information about the 'fileRecord'
     initial = {
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class SettingsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name               = "Settings"
+
+    def ready(self):
+        # Connect the org settings cache signal handlers
+        from . import organisation
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.4 on 2026-10-19 16:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FarmAcc', '0001_initial'),
+        ('Settings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orgsettingsmodel',
+            name='farm',
+            field=models.OneToOneField(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='orgSettings', to='FarmAcc.farminfo'),
+        ),
+    ]
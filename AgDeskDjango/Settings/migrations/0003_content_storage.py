@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-19 16:14
+
+import utils.blobstore
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Settings', '0002_org_settings_farm'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='internalteamsmodel',
+            name='teamImage',
+            field=models.ImageField(default='images/internalTeams/default.jpg', storage=utils.blobstore.content_storage, upload_to='images/internalTeams'),
+        ),
+    ]
@@ -3,11 +3,14 @@ from FarmAcc.models import FarmInfo
 from django.contrib.auth.models import Group
 from UserAuth.models import UserProfile
 from FarmAcc.models import FarmInfo
+from utils import renditions
+from utils.blobstore import ContentRecord, content_storage
 
 
 # from UserAuth.models import User
 
 class orgSettingsModel(models.Model):
+    farm              = models.OneToOneField(FarmInfo, on_delete=models.CASCADE, null=True, related_name="orgSettings")
     timezone          = models.CharField(max_length=100)
     datetime_format   = models.CharField(max_length=100)
     temperature_label = models.CharField(max_length=50 )
@@ -16,7 +19,7 @@ class orgSettingsModel(models.Model):
     length_label      = models.CharField(max_length=50 )
 
 
-class internalTeamsModel(Group):
+class internalTeamsModel(ContentRecord, Group):
     """
     The internalTeam model is used to define teams which are situated within a specific farming
     tenant.
@@ -27,5 +30,8 @@ class internalTeamsModel(Group):
     # teamModerator   = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     teamDescription = models.CharField(max_length=1000)
     active          = models.BooleanField(default=True)
-    teamImage       = models.ImageField(upload_to="images/internalTeams", default="images/internalTeams/default.jpg")
+    teamImage       = models.ImageField(upload_to="images/internalTeams", storage=content_storage, default="images/internalTeams/default.jpg")
     farm            = models.ForeignKey(FarmInfo, on_delete=models.SET_NULL, null=True)
+
+
+renditions.register(internalTeamsModel, "teamImage")
@@ -0,0 +1,80 @@
+"""
+Organisation settings.
+Each farm's time zone, date/time format and unit labels (orgSettingsModel) apply to every page, so
+they are read on every request by TimezoneMiddleware and the org_settings_context processor. They
+are cached per farm under the farm's settings version (see utils.versioning), which saving or
+deleting the settings bumps, so every process moves on to the new settings together. A cached read
+costs one query for the version. Farms without settings use DEFAULT_ORG_SETTINGS.
+"""
+
+# Imports
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.versioning import bump_version, current_version
+
+from .models import orgSettingsModel
+
+
+# Constants
+ORG_SETTINGS_PREFIX  = "orgSettings"
+ORG_SETTINGS_TTL     = 60 * 60 * 24
+DEFAULT_ORG_SETTINGS = {
+    "timezone"         : settings.TIME_ZONE,
+    "datetime_format"  : "F  j, Y, P"      ,
+    "temperature_label": "Celsius"         ,
+    "mass_label"       : "t"               ,
+    "area_label"       : "ha"              ,
+    "length_label"     : "km"
+}
+
+
+def org_settings_key(farmID, version):
+    return f"{ORG_SETTINGS_PREFIX}:{farmID}:{version}"
+
+
+# Org Settings Manager
+class orgSettingsManager():
+    """
+    Reads farms' organisation settings through the cache.
+    """
+
+    def farmSettings(self, farmID):
+        """
+        Returns the farm's settings, with the defaults for any left blank, or the defaults when
+        farmID is None:
+            {"timezone": str, "datetime_format": str, "temperature_label": str, "mass_label": str,
+             "area_label": str, "length_label": str}
+        """
+
+        if farmID is None:
+            return dict(DEFAULT_ORG_SETTINGS)
+
+        key         = org_settings_key(farmID, current_version(ORG_SETTINGS_PREFIX, farmID))
+        orgSettings = cache.get(key)
+        if orgSettings is None:
+            orgSettings = self.loadSettings(farmID)
+            cache.set(key, orgSettings, ORG_SETTINGS_TTL)
+
+        return orgSettings
+
+    def loadSettings(self, farmID):
+        stored = orgSettingsModel.objects                                                  \
+            .filter(farm_id=farmID)                                                        \
+            .values(*DEFAULT_ORG_SETTINGS)                                                 \
+            .first() or {}
+
+        return {
+            name: stored.get(name) or default
+            for name, default in DEFAULT_ORG_SETTINGS.items()
+        }
+
+
+# Refresh
+@receiver(post_save  , sender=orgSettingsModel)
+@receiver(post_delete, sender=orgSettingsModel)
+def refresh_org_settings(sender, instance, **kwargs):
+    if instance.farm_id is not None:
+        bump_version(ORG_SETTINGS_PREFIX, instance.farm_id)
@@ -3,7 +3,10 @@ Tests for Settings
 """
 
 # Import
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
 import random
 
 from utils.testing_data import FARM_SUPERSET, ORG_SETTINGS_SUPERSET, INTERNAL_TEAMS_MODEL_SUPERSET
@@ -12,6 +15,9 @@ from utils.testing_data import generate_dataset_from_model
 from Settings.models import *
 from Settings.forms  import *
 from Settings.views  import *
+from Settings.organisation import orgSettingsManager, DEFAULT_ORG_SETTINGS, ORG_SETTINGS_PREFIX
+from UserAuth.membership  import OWNER_ROLE
+from utils.versioning     import bump_version
 
 
 # Base
@@ -73,3 +79,92 @@ class userDetailsFormTest(BaseTestCase):
 class linkingCodeFormTest(BaseTestCase):
     def setUp(self):
         super().setUp()
+
+
+# Org Settings
+class orgSettingsManagerTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.manager = orgSettingsManager()
+
+    def test_settings_are_cached_until_saved(self):
+        self.assertEqual(self.manager.farmSettings(self.farm[0].id), DEFAULT_ORG_SETTINGS)
+
+        orgSettings = orgSettingsModel.objects.create(
+            farm              = self.farm[0]     ,
+            timezone          = "Australia/Perth",
+            datetime_format   = "jS F"           ,
+            temperature_label = "Kelvin"         ,
+            mass_label        = "kg"             ,
+            area_label        = ""               ,
+            length_label      = "m"
+        )
+        # The version and the settings, then only the version once they are cached
+        with self.assertNumQueries(3):
+            self.manager.farmSettings(self.farm[0].id)
+            farmSettings = self.manager.farmSettings(self.farm[0].id)
+        self.assertEqual(farmSettings["timezone"], "Australia/Perth")
+        self.assertEqual(farmSettings["area_label"], DEFAULT_ORG_SETTINGS["area_label"])
+
+        orgSettings.timezone = "Australia/Darwin"
+        orgSettings.save()
+        self.assertEqual(self.manager.farmSettings(self.farm[0].id)["timezone"], "Australia/Darwin")
+        self.assertEqual(self.manager.farmSettings(self.farm[1].id), DEFAULT_ORG_SETTINGS)
+
+    def test_middleware_activates_the_farm_timezone(self):
+        orgSettingsModel.objects.create(farm=self.farm[0], timezone="Australia/Perth", datetime_format="jS F")
+        self.client.force_login(self.user)
+        self.addCleanup(timezone.deactivate)
+
+        response = self.client.get(reverse("profileUpdate"))
+        self.assertEqual(response.context["datetime_format"], "jS F")
+        self.assertEqual(timezone.get_current_timezone_name(), "Australia/Perth")
+
+    def test_cached_settings_follow_the_version(self):
+        orgSettingsModel.objects.create(farm=self.farm[0], timezone="Australia/Perth")
+        self.assertEqual(self.manager.farmSettings(self.farm[0].id)["timezone"], "Australia/Perth")
+
+        # Saved by another process: only the version it bumps reaches this one, not its cache
+        orgSettingsModel.objects.filter(farm=self.farm[0]).update(timezone="Australia/Darwin")
+        bump_version(ORG_SETTINGS_PREFIX, self.farm[0].id)
+
+        self.assertEqual(self.manager.farmSettings(self.farm[0].id)["timezone"], "Australia/Darwin")
+
+    def post_org_settings(self):
+        return self.client.post(reverse("orgSettings"), {
+            "timezone"         : "Australia/Perth",
+            "datetime_format"  : "jS F"           ,
+            "temperature_label": "Kelvin"         ,
+            "mass_label"       : "kg"             ,
+            "area_label"       : "ac"             ,
+            "length_label"     : "m"
+        })
+
+    def test_org_settings_page_saves_the_farm_settings(self):
+        self.user.farm.add(self.farm[0], through_defaults={"role": OWNER_ROLE})
+        self.client.force_login(self.user)
+        self.addCleanup(timezone.deactivate)
+
+        response = self.post_org_settings()
+        self.assertRedirects(response, reverse("orgSettings"))
+        self.assertEqual(self.farm[0].orgSettings.timezone, "Australia/Perth")
+
+        response = self.client.get(reverse("orgSettings"))
+        self.assertEqual(response.context["datetime_format"], "jS F")
+        self.assertContains(response, timezone.localtime(response.context["current_datetime"]).strftime("%B"))
+
+    def test_only_managers_change_org_settings(self):
+        self.user.farm.add(self.farm[0], through_defaults={"role": "Worker"})
+        self.client.force_login(self.user)
+
+        self.assertRedirects(self.post_org_settings(), reverse("orgSettings"))
+        self.assertFalse(orgSettingsModel.objects.exists())
+
+    def test_org_settings_need_a_farm(self):
+        self.user.currentFarm = None
+        self.user.save()
+        self.client.force_login(self.user)
+
+        self.assertRedirects(self.post_org_settings(), reverse("chooseFarm"), fetch_redirect_response=False)
+        self.assertFalse(orgSettingsModel.objects.exists())
@@ -15,6 +15,7 @@ from django.views.generic import TemplateView
 from FarmAcc.forms import JoinFarmForm, NewFarm
 from FarmAcc.models import FarmInfo
 from FarmAcc.views import FarmManager, LinkingManager
+from UserAuth.membership import MANAGING_ROLES, OWNER_ROLE, active_farm_ids, farm_role, has_farm_access
 from UserAuth.models import UserProfile, SecurityGroup, user_farm
 
 from .forms import farmSettingsUpdate, orgSettingsForm, teamSettingsForm, userDetailsForm, UpdateProfileDetails#, userSignupForm
@@ -25,8 +26,7 @@ import os
 
 @login_required(login_url="login")
 def farmSettings(request):
-    current_user  = UserProfile.objects.get(id=request.user.id)
-    farm_instance = FarmInfo.objects.get(id=current_user.currentFarm_id)
+    farm_instance = request.farm
 
     context = {
         "form"      : farmSettingsUpdate(instance=farm_instance),
@@ -47,11 +47,44 @@ def farmSettings(request):
 
     return render(request, "Settings/farmSettings.html", context)
 
+@login_required(login_url="login")
+def orgSettings(request):
+    # Settings belong to a farm, so one must be chosen first
+    if request.farm is None:
+        return redirect("chooseFarm")
+
+    # The farm's settings are created with its first save
+    orgSettings_instance = orgSettingsModel.objects.filter(farm=request.farm).first() \
+                           or orgSettingsModel(farm=request.farm)
+
+    context = {
+        "form"            : orgSettingsForm(instance=orgSettings_instance),
+        "current_datetime": timezone.now()
+    }
+
+    if request.method == "POST":
+        # The time zone and units apply to the whole farm, so only its owners and managers change them
+        if farm_role(request, request.farm) not in MANAGING_ROLES:
+            messages.error(request, "Only the farm's owners and managers can change its settings.")
+
+            return redirect("orgSettings")
+
+        form = orgSettingsForm(request.POST, instance=orgSettings_instance)
+
+        if form.is_valid():
+            form.save()
+            messages.success(request, "Organisation Settings Updated.")
+
+            return redirect("orgSettings")
+
+        messages.error(request, "Error Updating Organisation Settings. Please try again.")
+
+    return render(request, "Settings/orgSettings.html", context)
+
 @login_required(login_url="login")
 def profileUpdate(request):
-    instance     = UserProfile.objects.get(id=request.user.id)
-    farmInstance = FarmInfo.objects.get(id=instance.currentFarm_id)
-    user_farm    = farmInstance.farm_name
+    instance  = request.user
+    user_farm = request.farm.farm_name
 
     if request.method == "POST":
         form = UpdateProfileDetails(request.POST, instance=instance)
@@ -78,7 +111,7 @@ def manage_farms(request):
     farmManager = FarmManager()
 
     # Handle "Get" requests
-    user         = UserProfile.objects.get(id=request.user.id)
+    user         = request.user
     farm_list    = farmManager.get_user_farm_assignments(user)
     current_farm = user.currentFarm_id
 
@@ -113,7 +146,7 @@ def manage_farms(request):
 
                 # Create a new farm and add it to the user's farm list
                 newFarm = form.save()
-                current_user.farm.add(newFarm)
+                current_user.farm.add(newFarm, through_defaults={"role": OWNER_ROLE})
 
                 # Set the user's current farm to the new farm
                 current_user.currentFarm_id = newFarm
@@ -135,6 +168,10 @@ def manage_farms(request):
 def switch_farm(request, farm_id):
     farmManager = FarmManager()
 
+    if not has_farm_access(request, farm_id):
+        messages.error(request, "You do not have access to that farm.")
+        return redirect("manage_farms")
+
     # Set the user's current farm to the selected farm
     farmManager.set_user_current_farm_by_id(request.user, farm_id)
     messages.success(request, f"Successfully switched to {request.user.currentFarm.farm_name}.")
@@ -150,12 +187,14 @@ def remove_farm(request, farm_id):
     messages.warning(request, "Access removed.")
 
     # Check if the user has any farms left
-    user_farms = farmManager.get_user_active_farms(request.user)
-    if user_farms.count() == 0:
+    user_farms = active_farm_ids(request.user.id)
+    if not user_farms:
+        # Without a farm left, the user must not stay on the one they removed
+        farmManager.set_user_current_farm_by_id(request.user, None)
         return redirect("joinFarm")
 
     # If the user has farms left, set the user's current farm to the first in the list
-    farmManager.set_user_current_farm(request.user, user_farms[0])
+    farmManager.set_user_current_farm_by_id(request.user, user_farms[0])
     return redirect("manage_farms")
 
 
@@ -181,7 +220,7 @@ def teamSettings(request: HttpRequest):
             currTeam.name = form.cleaned_data["teamName"]
 
             # Assign the newly created team to the user's farm tenant
-            currTeam.farm = FarmInfo.objects.get(pk=request.user.currentFarm_id)
+            currTeam.farm = request.farm
             currTeam.save()
 
             return redirect("team_settings")
@@ -339,11 +378,12 @@ def userDetails(request: HttpRequest, user_id: int):
                     messages.error(request, "User Deactivated.")
 
                     # or user.user.groups.filter(name='Farm Owner').exists():
-                    if farmManager.get_user_active_farms(user.user).count() == 0:
+                    user_farms = active_farm_ids(user.user_id)
+                    if not user_farms:
                         user.user.is_active = False
                         user.user.save()
                     else:
-                        user.user.currentFarm_id = farmManager.get_user_active_farms(user.user)[0].id
+                        user.user.currentFarm_id = user_farms[0]
                         user.user.save()
                 else:
                     messages.success(request, "User Details Updated.")
@@ -6,6 +6,7 @@ Forms for working with tasks and kanban boards.
 from django import forms
 from django.forms import ModelForm, Form, formset_factory
 from UserAuth.models import UserProfile
+from utils.choices import formChoices
 from .models import Task, Kanban, KanbanContents
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Fieldset, Submit,Row, Column, Div, HTML
@@ -38,12 +39,11 @@ class createTaskForm(ModelForm):
             
         
         if user is not None:
-            currentlyLoggedIn = UserProfile.objects.get(username = user)
-            currentFarmID = currentlyLoggedIn.currentFarm_id
+            choices = formChoices.forUser(user)
 
             self.fields["name"       ].widget.attrs.update({"class": "form-control"})
             self.fields["description"].widget.attrs.update({"class": "form-control", "rows": 3})
-            self.fields["assignedTo" ].queryset = UserProfile.objects.filter(currentFarm = currentFarmID, is_active = True)
+            choices.farmUsers(self.fields["assignedTo"])
             self.fields["status"     ].widget.attrs.update({"class": "form-control"})
             self.fields["priority"   ].widget.attrs.update({"class": "form-control"})
             self.fields["dueDate"    ].widget.attrs.update({"class": "form-control"})
@@ -113,12 +113,11 @@ class taskForm(ModelForm):
         )
         
         if user is not None:
-            currentlyLoggedIn = UserProfile.objects.get(username = user)
-            currentFarmID = currentlyLoggedIn.currentFarm_id
+            choices = formChoices.forUser(user)
 
             self.fields["name"       ].widget.attrs.update({"class": "form-control", "width": 25})
             self.fields["description"].widget.attrs.update({"class": "form-control", "rows": 3})
-            self.fields["assignedTo" ].queryset = UserProfile.objects.filter(currentFarm=currentFarmID)
+            choices.farmUsers(self.fields["assignedTo"], activeOnly=False)
             self.fields["status"     ].widget.attrs.update({"class": "form-control"})
             self.fields["priority"   ].widget.attrs.update({"class": "form-control"})
             self.fields["dueDate"    ].widget.attrs.update({"class": "form-control"})
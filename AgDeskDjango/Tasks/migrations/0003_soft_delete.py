@@ -0,0 +1,31 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:54
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def stamp_deleted(apps, schema_editor):
+    # Rows deleted before deletedAt existed are treated as deleted now, so purging waits its full age
+    for name in ("Kanban",):
+        apps.get_model("Tasks", name).objects.filter(deleted=True).update(deletedAt=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FarmAcc', '0001_initial'),
+        ('Tasks', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kanban',
+            name='deletedAt',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='kanban',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['farmID'], name='kanban_alive_idx'),
+        ),
+        migrations.RunPython(stamp_deleted, migrations.RunPython.noop),
+    ]
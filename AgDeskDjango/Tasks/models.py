@@ -8,6 +8,8 @@ from datetime import datetime
 from django.db import models
 from FarmAcc.models import FarmInfo
 from UserAuth.models import UserProfile
+from utils import softdelete
+from utils.softdelete import SoftDeleteManager, alive_index
 
 
 # Tasks
@@ -56,10 +58,19 @@ class Kanban(models.Model):
     A farm can have multiple kanban boards.
     """
 
-    kanbanID = models.AutoField(primary_key=True)
-    farmID   = models.ForeignKey(FarmInfo, on_delete=models.CASCADE)
-    name     = models.CharField(max_length=100)
-    deleted  = models.BooleanField(default=False)
+    kanbanID  = models.AutoField(primary_key=True)
+    farmID    = models.ForeignKey(FarmInfo, on_delete=models.CASCADE)
+    name      = models.CharField(max_length=100)
+    deleted   = models.BooleanField(default=False)
+    deletedAt = models.DateTimeField(null=True, blank=True)
+
+    objects = SoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            # Live kanbans of a farm
+            alive_index("farmID", name="kanban_alive_idx")
+        ]
 
 
 class KanbanContents(models.Model):
@@ -71,3 +82,6 @@ class KanbanContents(models.Model):
     kanbanID         = models.ForeignKey(Kanban, on_delete=models.CASCADE)
     taskID           = models.ForeignKey(Task, on_delete=models.CASCADE)
     order            = models.PositiveSmallIntegerField()
+
+
+softdelete.register(Kanban)
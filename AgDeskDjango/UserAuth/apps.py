@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class UserauthConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name               = "UserAuth"
+
+    def ready(self):
+        # Connect the membership cache signal handlers
+        from . import membership
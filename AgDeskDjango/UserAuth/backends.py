@@ -0,0 +1,40 @@
+"""
+Authentication backends for UserAuth.
+"""
+
+# Imports
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+
+# Constants
+UserModel = get_user_model()
+
+
+class PrefetchedUserBackend(ModelBackend):
+    """
+    Authenticates a user the caller has already fetched, so logging in does not fetch them again:
+        authenticate(request, user=user, password=password)
+    Inactive users are accepted, as the login page reactivates them (see LoginManager). Without a
+    user, authentication falls through to ModelBackend.
+    Signed in users are loaded with their current farm, which every page needs (see utils.tenancy).
+    """
+
+    def get_user(self, user_id):
+        user = UserModel._default_manager                                                  \
+            .select_related("currentFarm")                                                 \
+            .filter(pk=user_id)                                                            \
+            .first()
+
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+    def authenticate(self, request, user=None, password=None, **kwargs):
+        if user is None:
+            return None
+
+        if not user.check_password(password):
+            # Stops the remaining backends from looking the user up again
+            raise PermissionDenied
+
+        return user
@@ -0,0 +1,129 @@
+"""
+Farm memberships.
+A user's farms, with their role and whether their membership is active (user_farm), decide what
+they may see and change. Rather than each view querying user_farm, a user's memberships are loaded
+into the cache as {farmID: {"role": str | None, "is_active": bool}} and dropped whenever one of
+their user_farm rows is written, so access checks normally cost no queries.
+The cache is local to each process and only the process making a change drops its copy, so
+memberships are kept for MEMBERSHIP_TTL seconds only: a change reaches every process within that.
+"""
+
+# Imports
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from FarmAcc.models import FarmInfo
+
+from .models import user_farm
+
+
+# Constants
+MEMBERSHIP_PREFIX = "membership"
+MEMBERSHIP_TTL    = 30
+OWNER_ROLE        = "Owner"                 # Given to whoever creates a farm
+MANAGING_ROLES    = (OWNER_ROLE, "Manager") # May change farm-wide settings
+
+
+def membership_key(userID):
+    return f"{MEMBERSHIP_PREFIX}:{userID}"
+
+
+def memberships(userID):
+    """
+    Function to get a user's memberships, keyed by farm ID.
+    """
+
+    farms = cache.get(membership_key(userID))
+    if farms is None:
+        farms = {
+            farmID: {"role": role, "is_active": isActive}
+            for farmID, role, isActive in user_farm.objects
+                .filter(user_id=userID)
+                .values_list("farm_id", "role", "is_active")
+        }
+        cache.set(membership_key(userID), farms, MEMBERSHIP_TTL)
+
+    return farms
+
+
+def active_farm_ids(userID):
+    """
+    Function to get the IDs of the farms a user is an active member of, lowest first.
+    """
+
+    return sorted(farmID for farmID, membership in memberships(userID).items() if membership["is_active"])
+
+
+def farm_id_of(obj):
+    """
+    Function to get the farm a FarmInfo, farm ID or farm-owned record (farmID or farm field) belongs to.
+    """
+
+    if obj is None or isinstance(obj, int):
+        return obj
+    if isinstance(obj, FarmInfo):
+        return obj.id
+
+    for attname in ("farmID_id", "farm_id"):
+        if hasattr(obj, attname):
+            return getattr(obj, attname)
+
+    raise TypeError(f"{type(obj).__name__} does not belong to a farm")
+
+
+def has_farm_access(request, obj):
+    """
+    Function to check whether the signed in user may access a farm, or a record belonging to one.
+    Users only have access to the farms they are active members of.
+    """
+
+    user = request.user
+    if not user.is_authenticated:
+        return False
+
+    farmID = farm_id_of(obj)
+    if farmID is None:
+        return False
+
+    membership = memberships(user.id).get(farmID)
+
+    return membership is not None and membership["is_active"]
+
+
+def farm_role(request, obj):
+    """
+    Function to get the signed in user's role on a farm, or None without an active membership.
+    """
+
+    if not request.user.is_authenticated:
+        return None
+
+    membership = memberships(request.user.id).get(farm_id_of(obj))
+    if membership is None or not membership["is_active"]:
+        return None
+
+    return membership["role"]
+
+
+# Refresh
+@receiver(post_save  , sender=user_farm)
+@receiver(post_delete, sender=user_farm)
+def refresh_membership(sender, instance, **kwargs):
+    cache.delete(membership_key(instance.user_id))
+
+
+@receiver(m2m_changed, sender=user_farm)
+def refresh_changed_memberships(sender, instance, action, reverse, pk_set, **kwargs):
+    # UserProfile.farm.add/remove/clear write user_farm rows without saving them one by one
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if not reverse:
+        userIDs = [instance.pk]
+    elif action == "pre_clear":
+        userIDs = instance.user_profiles.values_list("id", flat=True)
+    else:
+        userIDs = pk_set
+
+    cache.delete_many([membership_key(userID) for userID in userIDs])
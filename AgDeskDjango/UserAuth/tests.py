@@ -3,7 +3,11 @@ Tests for UserAuth
 """
 
 # Import
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 import random
 
 from utils.testing_data import FARM_SUPERSET, FILRECORD_SUPERSET
@@ -12,6 +16,7 @@ from utils.testing_data import generate_dataset_from_model
 from UserAuth.models import *
 from UserAuth.forms  import *
 from UserAuth.views  import *
+from UserAuth.membership import active_farm_ids, farm_role, has_farm_access, memberships
 
 
 # Base
@@ -51,3 +56,81 @@ class SignUserUpFormTest(BaseTestCase):
 class UserLoginFormTest(BaseTestCase):
     def setUp(self):
         super().setUp()
+
+
+# Memberships
+class membershipTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.request      = RequestFactory().get("/")
+        self.request.user = self.user
+
+    def test_access_checks_are_cached_until_memberships_change(self):
+        self.user.farm.add(self.farm[0], through_defaults={"role": "Manager"})
+        self.user.farm.add(self.farm[1], through_defaults={"is_active": False})
+
+        with self.assertNumQueries(1):
+            self.assertTrue (has_farm_access(self.request, self.farm[0]   ))
+            self.assertFalse(has_farm_access(self.request, self.farm[1].id))
+            self.assertEqual(farm_role(self.request, self.farm[0]), "Manager")
+            self.assertEqual(active_farm_ids(self.user.id), [self.farm[0].id])
+
+        membership = user_farm.objects.get(user=self.user, farm=self.farm[1])
+        membership.is_active = True
+        membership.save()
+        self.assertTrue(has_farm_access(self.request, self.farm[1]))
+
+        self.user.farm.remove(self.farm[0])
+        self.assertNotIn(self.farm[0].id, memberships(self.user.id))
+
+    def test_current_farm_without_membership_has_no_access(self):
+        self.assertFalse(has_farm_access(self.request, self.farm[0]))
+
+    def test_removing_the_last_farm_clears_the_current_farm(self):
+        self.user.farm.add(self.farm[0])
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("remove_farm", args=[self.farm[0].id]))
+        self.assertEqual(response["Location"], reverse("joinFarm"))
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.currentFarm_id)
+        self.assertFalse(has_farm_access(self.request, self.farm[0]))
+
+
+# Login
+class loginPageTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def login(self, password="12345"):
+        return self.client.post(reverse("login"), {"username": "testuser", "password": password})
+
+    def test_login_redirects_by_active_farms(self):
+        self.assertEqual(self.login()["Location"], "farm/join")
+
+        self.user.farm.add(self.farm[0])
+        self.client.logout()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.login()
+        reads = [query["sql"] for query in queries if query["sql"].startswith("SELECT") and "django_session" not in query["sql"]]
+        self.assertEqual(len(reads), 2) # The user and their memberships
+        self.assertEqual(response["Location"], reverse("home", kwargs={"farm_id": self.farm[0].id}))
+
+        self.user.farm.add(self.farm[1])
+        self.client.logout()
+        self.assertEqual(self.login()["Location"], "farm/choose-farm")
+
+    def test_wrong_password_leaves_inactive_users_inactive(self):
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.login("wrong")["Location"], reverse("login"))
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+
+        self.login()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_active)
+        self.assertEqual(int(self.client.session["_auth_user_id"]), self.user.id)
@@ -13,6 +13,7 @@ from django.views.decorators.csrf import csrf_protect
 from .forms import SignUserUpForm, UserLoginForm
 
 from FarmAcc.views import FarmManager
+from UserAuth.membership import active_farm_ids
 from UserAuth.models import UserProfile
 
 
@@ -78,69 +79,76 @@ def logoutUser(request: HttpRequest):
 
     return redirect("login")
 
+class LoginManager():
+    """
+    Logs users in with one user lookup, and works out where to send them from their cached
+    memberships (UserAuth.membership).
+    """
+
+    def loginUser(self, request: HttpRequest, userName: str, userPassword: str):
+        """
+        Logs the user in and returns the page to redirect them to, or None if the username or
+        password is incorrect.
+        """
+
+        user = UserProfile.objects.filter(username=userName).first()
+        if user is None:
+            # Hash the password anyway, so unknown usernames take as long as wrong passwords
+            UserProfile().set_password(userPassword)
+            return None
+
+        if authenticate(request, user=user, password=userPassword) is None:
+            return None
+
+        # If the user is not active, activate them so they can create or join a new farm. This
+        # happens when the user has been deactivated from all their farms.
+        if not user.is_active:
+            user.is_active = True
+            user.save(update_fields=["is_active"])
+
+        login(request, user)
+
+        # Redirect the user based on their active farms
+        user_farms = active_farm_ids(user.id)
+        match len(user_farms):
+            case 0: # If the user has no active farms, redirect them to the join farm page.
+                return redirect("farm/join")
+            case 1: # If the user has one active farm, redirect them to the dashboard of that farm.
+                return redirect("home", farm_id = user_farms[0])
+            case _: # If the user has multiple active farms, redirect them to the choose farm page.
+                return redirect("farm/choose-farm")
+
+
 def loginPage(request: HttpRequest):
     """
     This view renders the login page, allowing users to authenticate themselves and login to the
     platform.
     """
-    farmManager = FarmManager()
 
     # Handle 'POST' requests
-    
     if request.method == "POST":
         form = UserLoginForm(request.POST)
 
         if form.is_valid():
-            # Extract the username and password from the form
-            userName     = form.cleaned_data["username"]
-            userPassword = form.cleaned_data["password"]
-
-        # If a user with the given username exists, authenticate the password.
-        if UserProfile.objects.filter(username=userName).exists():
-
-            # If the user exists and is not active, activate the user so they can create or join a
-            # new farm. This happens when the user has been deactivated from all their farms.
-            if UserProfile.objects.get(username=userName).is_active is False:
-                inactive_user = UserProfile.objects.get(username=userName)
-                inactive_user.is_active = True
-                inactive_user.save()
-
-            # If the password is correct, log the user in and redirect them to the appropriate page.
-            user = authenticate(username=userName, password=userPassword)
-
-            if user is not None:
-
-                # Get the user's active farms
-                user_farms = farmManager.get_user_active_farms(user)
-                login(request, user)
-
-                match len(user_farms):
-                    case 0: # If the user has no active farms, redirect them to the join farm page.
-                        return redirect("farm/join")
-                    case 1: # If the user has one active farm, redirect them to the dashboard of that farm.
-                        return redirect("home", farm_id = user_farms[0].id)
-                    case _: # If the user has multiple active farms, redirect them to the choose farm page.
-                        return redirect("farm/choose-farm")
-
-            # If the password is incorrect, provide an error message to the user.
-            messages.add_message(
-                request                                      ,
-                level=messages.ERROR                         ,
-                message="Password or username was incorrect.",
-                extra_tags="error"
+            # Extract the username and password from the form, and log the user in if they match
+            response = LoginManager().loginUser(
+                request                      ,
+                form.cleaned_data["username"],
+                form.cleaned_data["password"]
             )
+            if response is not None:
+                return response
 
-        else:
-            # If the user does not exist, provide an error message to the user.
-            messages.add_message(
-                request                                      ,
-                level=messages.ERROR                         ,
-                message="Password or username was incorrect.",
-                extra_tags="error"
-            )
+        # If the user does not exist or the password is incorrect, provide an error message.
+        messages.add_message(
+            request                                      ,
+            level=messages.ERROR                         ,
+            message="Password or username was incorrect.",
+            extra_tags="error"
+        )
 
         return redirect("login")
-    
+
     # Handle 'GET' Requests
     form = UserLoginForm()
     
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AssetexpensesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name               = "assetExpenses"
+
+    def ready(self):
+        # Connect the cost rollup signal handlers
+        from . import costs
@@ -0,0 +1,228 @@
+"""
+Total cost of ownership analytics.
+Spend is the sum of Expense records plus the cost of Maintenance records with no expense lodged
+against them (a maintenance expense carries the maintenance cost, so counting both would double it).
+CostRollup keeps one total per asset, month and expense category. A save only recomputes the months
+it touches, and every report is a single grouped query over the rollups.
+"""
+
+# Imports
+from decimal import Decimal
+
+from django.db.models import Count, Exists, F, IntegerField, OuterRef, Sum, Value
+from django.db.models.functions import TruncMonth
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from assetMaintenance.models import Maintenance
+from assetOperation.utilization import bucket_start, next_bucket
+
+from .models import CostRollup, Expense, expenseChoices
+
+
+# Constants
+MAINTENANCE_CATEGORY = 1 # expenseChoices "Maintenance"
+COST_DIMENSIONS      = {"asset": "assetID", "category": "category", "month": "month"}
+
+
+def month_start(day):
+    return bucket_start(day, "month")
+
+
+# Cost Rollup Manager
+class costRollupManager():
+    """
+    Maintains and queries CostRollup rows.
+    """
+
+    def computeRollups(self, start=None, end=None, **assetFilter):
+        """
+        Runs one UNION ALL query of grouped expense and maintenance spend for the matching assets,
+        optionally limited to months from start up to (not including) end.
+        assetFilter is farmID=... or assetID=....
+        Returns {(assetID, month, category): (total, count)}.
+        """
+
+        assetFilter = {f"assetID__{field}": value for field, value in assetFilter.items()}
+        lodged      = Expense.objects.filter(MaintenanceID=OuterRef("maintenanceID"), deleted=False)
+
+        expenses    = Expense.objects                                                   \
+            .filter(deleted=False, **assetFilter)                                       \
+            .annotate(month=TruncMonth("expenseDate"), category=F("expenseType"))       \
+            .values("assetID", "month", "category")                                     \
+            .annotate(total=Sum("cost"), count=Count("expenseID"))                      \
+            .order_by()
+
+        maintenance = Maintenance.objects                                               \
+            .filter(~Exists(lodged), deleted=False, **assetFilter)                      \
+            .annotate(
+                month    = TruncMonth("completionDate"),
+                category = Value(MAINTENANCE_CATEGORY, output_field=IntegerField())
+            )                                                                           \
+            .values("assetID", "month", "category")                                     \
+            .annotate(total=Sum("Cost"), count=Count("maintenanceID"))                  \
+            .order_by()
+
+        if start is not None:
+            expenses    = expenses   .filter(expenseDate__gte=start)
+            maintenance = maintenance.filter(completionDate__gte=start)
+        if end is not None:
+            expenses    = expenses   .filter(expenseDate__lt=end)
+            maintenance = maintenance.filter(completionDate__lt=end)
+
+        rollups = {}
+        for row in expenses.union(maintenance, all=True):
+            key          = (row["assetID"], row["month"], row["category"])
+            total, count = rollups.get(key, (Decimal(0), 0))
+            rollups[key] = (total + row["total"], count + row["count"])
+
+        return rollups
+
+    def refreshMonths(self, buckets):
+        """
+        Recomputes the rollups of each (assetID, month) in buckets.
+        Costs one query, one upsert and one delete per bucket.
+        """
+
+        for assetID, month in buckets:
+            rollups = self.computeRollups(
+                start   = month                        ,
+                end     = next_bucket(month, "month")  ,
+                assetID = assetID
+            )
+
+            CostRollup.objects.bulk_create(
+                [
+                    CostRollup(assetID_id=assetID, month=month, category=category, total=total, count=count)
+                    for (_, _, category), (total, count) in rollups.items()
+                ],
+                update_conflicts = True                           ,
+                unique_fields    = ["assetID", "month", "category"],
+                update_fields    = ["total", "count"]
+            )
+
+            # Categories with no spend left this month lose their rollup
+            CostRollup.objects                                                  \
+                .filter(assetID=assetID, month=month)                           \
+                .exclude(category__in=[category for _, _, category in rollups]) \
+                .delete()
+
+    def rebuildFarm(self, farmID):
+        """
+        Replaces every rollup of a farm's assets, e.g. after importing historic records.
+        """
+
+        rollups = self.computeRollups(farmID=farmID)
+
+        CostRollup.objects.filter(assetID__farmID=farmID).delete()
+        CostRollup.objects.bulk_create([
+            CostRollup(assetID_id=assetID, month=month, category=category, total=total, count=count)
+            for (assetID, month, category), (total, count) in rollups.items()
+        ])
+
+        return len(rollups)
+
+    def farmRollups(self, farmID, start=None, end=None):
+        rollups = CostRollup.objects.filter(assetID__farmID=farmID, assetID__deleted=False)
+        if start is not None:
+            rollups = rollups.filter(month__gte=month_start(start))
+        if end is not None:
+            rollups = rollups.filter(month__lte=end)
+
+        return rollups
+
+    def costSummary(self, farmID, by, start=None, end=None):
+        """
+        Total spend of a farm grouped by asset, category or month, in one grouped query:
+            [{"asset" | "category" | "month": ..., "total": Decimal, "count": int}, ...]
+        Assets also carry their name and category prefix.
+        """
+
+        field  = COST_DIMENSIONS[by]
+        labels = {"assetName": F("assetID__assetName"), "assetCategory": F("assetID__assetPrefix")} if by == "asset" else {}
+
+        rows = self.farmRollups(farmID, start, end)              \
+            .values(field, **labels)                              \
+            .annotate(total=Sum("total"), count=Sum("count"))     \
+            .order_by(field)
+
+        summary = []
+        for row in rows:
+            entry = {by: row.pop(field), **row}
+            if by == "category":
+                entry["categoryName"] = expenseChoices[entry["category"]]
+            summary.append(entry)
+
+        return summary
+
+    def costPivot(self, farmID, start=None, end=None):
+        """
+        Spend per asset with one column per expense category, in one grouped query:
+            [{"assetID": int, "assetName": str, "assetCategory": str,
+              "categories": {category: Decimal}, "total": Decimal}, ...]
+        """
+
+        rows = self.farmRollups(farmID, start, end)              \
+            .values("assetID", "category")                        \
+            .annotate(
+                total         = Sum("total")             ,
+                assetName     = F("assetID__assetName"  ),
+                assetCategory = F("assetID__assetPrefix")
+            )                                                     \
+            .order_by("assetID", "category")
+
+        pivot = {}
+        for row in rows:
+            entry = pivot.setdefault(row["assetID"], {
+                "assetID"      : row["assetID"]                                         ,
+                "assetName"    : row["assetName"]                                       ,
+                "assetCategory": row["assetCategory"]                                   ,
+                "categories"   : {category: Decimal("0.00") for category in expenseChoices},
+                "total"        : Decimal("0.00")
+            })
+            entry["categories"][row["category"]] += row["total"]
+            entry["total"]                       += row["total"]
+
+        return list(pivot.values())
+
+
+# Maintenance
+def expense_buckets(expense):
+    buckets = {(expense.assetID_id, month_start(expense.expenseDate))}
+    if expense.MaintenanceID_id is not None:
+        # Lodging an expense against a maintenance record removes that record's own cost
+        linked = Maintenance.objects                             \
+            .filter(pk=expense.MaintenanceID_id)                 \
+            .values_list("assetID", "completionDate")            \
+            .first()
+        if linked is not None:
+            buckets.add((linked[0], month_start(linked[1])))
+
+    return buckets
+
+
+def maintenance_buckets(maintenance):
+    return {(maintenance.assetID_id, month_start(maintenance.completionDate))}
+
+
+BUCKET_FUNCTIONS = {
+    Expense    : expense_buckets    ,
+    Maintenance: maintenance_buckets
+}
+
+
+@receiver(pre_save, sender=Expense)
+@receiver(pre_save, sender=Maintenance)
+def remember_cost_buckets(sender, instance, **kwargs):
+    # An edit can move a record to another asset or month, so the buckets it leaves are refreshed too
+    previous = sender.objects.filter(pk=instance.pk).first() if instance.pk is not None else None
+    instance._previousCostBuckets = BUCKET_FUNCTIONS[sender](previous) if previous is not None else set()
+
+
+@receiver(post_save  , sender=Expense)
+@receiver(post_save  , sender=Maintenance)
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Maintenance)
+def refresh_cost_rollups(sender, instance, **kwargs):
+    buckets = BUCKET_FUNCTIONS[sender](instance) | getattr(instance, "_previousCostBuckets", set())
+    costRollupManager().refreshMonths(sorted(buckets))
@@ -6,6 +6,7 @@ from .models import Expense
 from assetMaintenance.models import Damage
 from assetManagement.models import asset
 from UserAuth.models import UserProfile
+from utils.choices import formChoices
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Fieldset, Submit,Row, Column, Div, HTML
 from crispy_forms.bootstrap import Modal,StrictButton,PrependedText
@@ -21,14 +22,13 @@ class createExpenseForm(ModelForm):
         )
 
         if user is not None:
-            currentlyLoggedIn = UserProfile.objects.get(username=user)
-            currentFarmID = currentlyLoggedIn.currentFarm_id
+            choices = formChoices.forUser(user)
 
             self.fields["expenseType"].widget.attrs.update({"class": "form-control"})
-            self.fields["MaintenanceID"].queryset = Maintenance.objects.filter(assetID=assetID, deleted=False)
+            choices.maintenance(self.fields["MaintenanceID"], assetID)
             self.fields["cost"].widget.attrs.update({"class": "form-control"})
             self.fields["receiptNumber"].widget.attrs.update({"class": "form-control"})
-            self.fields["expenseLodgedBy"].queryset = UserProfile.objects.filter(currentFarm_id =currentFarmID, is_active=True)
+            choices.farmUsers(self.fields["expenseLodgedBy"])
 
     EXPENSE_TYPE_CHOICES = [
         (0, "Fuel"),
@@ -100,15 +100,14 @@ class editExpenseForm(ModelForm):
         )
 
         if user is not None:
-            currentlyLoggedIn = UserProfile.objects.get(username=user)
-            currentFarmID = currentlyLoggedIn.currentFarm_id
+            choices = formChoices.forUser(user)
 
             self.fields["expenseID"].widget.attrs.update({"class": "form-control"})
             self.fields["expenseType"].widget.attrs.update({"class": "form-control"})
-            self.fields["MaintenanceID"].queryset = Maintenance.objects.filter(assetID=assetID, deleted=False)
+            choices.maintenance(self.fields["MaintenanceID"], assetID)
             self.fields["cost"].widget.attrs.update({"class": "form-control"})
             self.fields["receiptNumber"].widget.attrs.update({"class": "form-control"})
-            self.fields["expenseLodgedBy"].queryset = UserProfile.objects.filter(currentFarm_id=currentFarmID)
+            choices.farmUsers(self.fields["expenseLodgedBy"], activeOnly=False)
 
     EXPENSE_TYPE_CHOICES = [
         (0, "Fuel"),
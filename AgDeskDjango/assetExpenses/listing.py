@@ -0,0 +1,93 @@
+"""
+Farm-wide expense listing.
+One query per page: expenses of the farm's live assets with their asset and lodging user joined in,
+filtered and sorted by the database, keyset paged (see utils.pagination) and carrying a running
+total of cost in sort order.
+"""
+
+# Imports
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import DecimalField, Sum, Value, Window
+from django.utils.dateparse import parse_date
+
+from utils.pagination import CURSOR_SEPARATOR, decode_cursor, order_by, page_of
+
+from .models import Expense
+
+
+# Constants
+EXPENSE_PAGE_SIZE = 50
+EXPENSE_SORTS     = {
+    "date": (("expenseDate", parse_date),),
+    "cost": (("cost"       , Decimal   ),),
+    "type": (("expenseType", int       ),)
+}
+DEFAULT_SORT      = "-date"
+
+
+def split_cursor(cursor):
+    """
+    Function to split a listing cursor into the keyset cursor and the running total so far.
+    """
+
+    if not cursor:
+        return None, Decimal(0)
+
+    keyset, _, runningTotal = cursor.rpartition(CURSOR_SEPARATOR)
+    try:
+        return keyset, Decimal(runningTotal)
+    except InvalidOperation:
+        return None, Decimal(0)
+
+
+def list_expenses(farmID, filters, sort=DEFAULT_SORT, cursor=None, limit=EXPENSE_PAGE_SIZE):
+    """
+    Function to get one page of a farm's expenses.
+    sort is one of EXPENSE_SORTS, prefixed with "-" for descending.
+    filters may contain:
+        start, end   : expenseDate bounds (date)
+        type         : expenseType (int)
+        assetCategory: asset prefix, e.g. "HV"
+        assetID      : a single asset
+    Returns (list of Expense with a runningTotal attribute, cursor for the next page or None).
+    """
+
+    descending = sort.startswith("-")
+    order      = EXPENSE_SORTS[sort.lstrip("-")] + (("expenseID", int),)
+
+    records = Expense.objects                             \
+        .filter(
+            assetID__farmID  = farmID,
+            assetID__deleted = False ,
+            deleted          = False
+        )                                                 \
+        .select_related("assetID", "expenseLodgedBy")
+
+    if filters.get("start") is not None:
+        records = records.filter(expenseDate__gte=filters["start"])
+    if filters.get("end") is not None:
+        records = records.filter(expenseDate__lte=filters["end"])
+    if filters.get("type") is not None:
+        records = records.filter(expenseType=filters["type"])
+    if filters.get("assetCategory"):
+        records = records.filter(assetID__assetPrefix=filters["assetCategory"])
+    if filters.get("assetID") is not None:
+        records = records.filter(assetID=filters["assetID"])
+
+    # The window only sees rows after the cursor, so earlier pages' total is carried in the cursor
+    keyset, carried = split_cursor(cursor)
+    if decode_cursor(keyset, order) is None:
+        keyset, carried = None, Decimal(0)
+    records = records.annotate(
+        runningTotal = Window(Sum("cost"), order_by=order_by(order, descending))
+                     + Value(carried, output_field=DecimalField())
+    )
+
+    page, nextKeyset = page_of(records, keyset, order, limit, descending)
+
+    nextCursor = None
+    if nextKeyset is not None:
+        nextCursor = f"{nextKeyset}{CURSOR_SEPARATOR}{page[-1].runningTotal}"
+
+    return page, nextCursor
@@ -0,0 +1,34 @@
+"""
+Rebuilds the cost of ownership rollups from the Expense and Maintenance records.
+    python manage.py rebuild_cost_rollups [--farm <farmID>]
+Rollups are kept up to date on save, this is for backfilling existing data or after bulk imports.
+"""
+
+# Imports
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from assetExpenses.costs import costRollupManager
+from FarmAcc.models import FarmInfo
+
+
+class Command(BaseCommand):
+    help = "Rebuild the cost of ownership rollups for one farm, or every farm."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--farm", type=int, help="Defaults to every farm")
+
+    def handle(self, *args, **options):
+        farmIDs = FarmInfo.objects.values_list("id", flat=True)
+        if options["farm"] is not None:
+            farmIDs = farmIDs.filter(id=options["farm"])
+            if not farmIDs.exists():
+                raise CommandError(f"Farm {options['farm']} does not exist")
+
+        costRollupManagerInstance = costRollupManager()
+        for farmID in farmIDs:
+            with transaction.atomic():
+                rollupCount = costRollupManagerInstance.rebuildFarm(farmID)
+            self.stdout.write(f"Farm {farmID}: {rollupCount} rollups")
+
+        self.stdout.write(self.style.SUCCESS("Cost rollups rebuilt."))
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetExpenses', '0003_initial'),
+        ('assetManagement', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='expenseDate',
+            field=models.DateField(default=django.utils.timezone.localdate),
+        ),
+        migrations.CreateModel(
+            name='CostRollup',
+            fields=[
+                ('rollupID', models.AutoField(primary_key=True, serialize=False)),
+                ('month', models.DateField()),
+                ('category', models.SmallIntegerField(choices=[(0, 'Fuel'), (1, 'Maintenance'), (2, 'Insurance'), (3, 'Registration'), (4, 'Other')])),
+                ('total', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('count', models.PositiveIntegerField()),
+                ('assetID', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='assetManagement.asset')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='costrollup',
+            constraint=models.UniqueConstraint(fields=('assetID', 'month', 'category'), name='cost_rollup_unique_bucket'),
+        ),
+    ]
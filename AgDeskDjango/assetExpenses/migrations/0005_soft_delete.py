@@ -0,0 +1,34 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:54
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def stamp_deleted(apps, schema_editor):
+    # Rows deleted before deletedAt existed are treated as deleted now, so purging waits its full age
+    for name in ("Expense",):
+        apps.get_model("assetExpenses", name).objects.filter(deleted=True).update(deletedAt=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetExpenses', '0004_cost_rollups'),
+        ('assetMaintenance', '0004_register_indexes'),
+        ('assetManagement', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='expense',
+            name='deletedAt',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['assetID', 'expenseDate'], name='expense_alive_idx'),
+        ),
+        migrations.RunPython(stamp_deleted, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,10 @@
 from django.db import models
+from django.utils import timezone
 from assetManagement.models import asset
 from assetMaintenance.models import Maintenance
 from UserAuth.models import UserProfile
+from utils import softdelete
+from utils.softdelete import SoftDeleteManager, alive_index
 
 expenseChoices = {
     0: "Fuel",
@@ -17,9 +20,42 @@ class Expense(models.Model):
     expenseType     = models.SmallIntegerField(choices=expenseChoices, default=0)
     MaintenanceID   = models.ForeignKey(Maintenance, on_delete=models.CASCADE, null=True)
     cost            = models.DecimalField(max_digits=10, decimal_places=2)
+    expenseDate     = models.DateField(default=timezone.localdate)
     receiptNumber   = models.PositiveIntegerField(null=False)
     expenseLodgedBy = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
     deleted         = models.BooleanField(default=False)
+    deletedAt       = models.DateTimeField(null=True, blank=True)
+
+    objects = SoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            # Live expenses of an asset by date
+            alive_index("assetID", "expenseDate", name="expense_alive_idx")
+        ]
 
     def __str__(self):
         return f"{str(self.expenseID)} - {self.expenseType}"
+
+
+class CostRollup(models.Model):
+    """
+    Total spend on an asset for one month and expense category, combining Expense records with the
+    cost of Maintenance records that have no expense lodged against them.
+    Maintained on Expense and Maintenance save (see assetExpenses.costs).
+    """
+
+    rollupID = models.AutoField(primary_key=True)
+    assetID  = models.ForeignKey(asset, on_delete=models.CASCADE)
+    month    = models.DateField() # First day of the month
+    category = models.SmallIntegerField(choices=expenseChoices)
+    total    = models.DecimalField(max_digits=14, decimal_places=2)
+    count    = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["assetID", "month", "category"], name="cost_rollup_unique_bucket")
+        ]
+
+
+softdelete.register(Expense)
@@ -1,3 +1,193 @@
+"""
+Tests for assetExpenses
+"""
+
+# Import
+from datetime import date
+
 from django.test import TestCase
+from django.urls import reverse
+
+from utils.testing_data import FARM_SUPERSET
+from utils.testing_data import generate_dataset_from_model
+
+from assetExpenses.costs     import costRollupManager
+from assetExpenses.listing   import list_expenses
+from assetExpenses.models    import CostRollup, Expense
+from assetMaintenance.models import Maintenance
+from assetManagement.models  import SmallEquipment
+from FarmAcc.models          import FarmInfo
+from UserAuth.models         import UserProfile
+
+
+# Base
+class BaseTestCase(TestCase):
+    def setUp(self):
+        # Create a user, a farm and an asset for testing
+        VALID_FARMS = {
+            "farm_name"    : FARM_SUPERSET["farm_name"    ][0],
+            "farm_street"  : FARM_SUPERSET["farm_street"  ][0],
+            "farm_state"   : FARM_SUPERSET["farm_state"   ][0],
+            "farm_postcode": FARM_SUPERSET["farm_postcode"][0],
+            "farm_bio"     : FARM_SUPERSET["farm_bio"     ][0],
+            "farm_image"   : FARM_SUPERSET["farm_image"   ][0]
+        }
+
+        farmList = [
+            FarmInfo(**farm_data)
+            for farm_data
+            in generate_dataset_from_model(VALID_FARMS)
+        ]
+        self.farm = FarmInfo.objects.bulk_create(farmList)
+
+        self.user = UserProfile.objects.create_user(
+            username    = "testuser"          ,
+            email       = "testuser@test.test",
+            password    = "12345"             ,
+            currentFarm = self.farm[0]
+        )
+
+        self.asset = SmallEquipment.objects.create(
+            assetPrefix      = "SE"               ,
+            assetName        = "Generator"        ,
+            farmID           = self.farm[0]       ,
+            Manufacturer     = "Honda"            ,
+            partsList        = "Spark Plug"       ,
+            Location         = "Barn"             ,
+            dateManufactured = date(2020, 1, 1)   ,
+            datePurchased    = date(2020, 1, 1)   ,
+            serialNumber     = "123456789"
+        )
+
+    def expense(self, day, cost, expenseType=0, maintenance=None):
+        return Expense.objects.create(
+            assetID         = self.asset ,
+            expenseType     = expenseType,
+            MaintenanceID   = maintenance,
+            cost            = cost       ,
+            receiptNumber   = 1          ,
+            expenseLodgedBy = self.user  ,
+            expenseDate     = day
+        )
+
+    def maintenance(self, day, cost):
+        return Maintenance.objects.create(
+            assetID                   = self.asset         ,
+            completionDate            = day                ,
+            maintenanceConductedBy    = self.user          ,
+            maintenanceLocation       = "Shed"             ,
+            maintenanceTasksCompleted = "Oil change"       ,
+            Cost                      = cost               ,
+            Notes                     = ""                 ,
+            dateOfNextService         = date(2025, 1, 1)
+        )
+
+
+# Cost Rollups
+class costRollupManagerTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manager = costRollupManager()
+
+    def totals(self, by):
+        return {row[by]: row["total"] for row in self.manager.costSummary(self.farm[0].id, by)}
+
+    def test_maintenance_with_an_expense_is_not_counted_twice(self):
+        self.expense(date(2024, 1, 5), 50)                                         # Fuel
+        self.maintenance(date(2024, 1, 9), 200)                                    # No expense lodged
+        lodged = self.maintenance(date(2024, 2, 1), 300)
+        self.expense(date(2024, 2, 3), 300, expenseType=1, maintenance=lodged)     # Carries the cost
+
+        self.assertEqual(self.totals("category"), {0: 50, 1: 500})
+        self.assertEqual(self.totals("month"), {date(2024, 1, 1): 250, date(2024, 2, 1): 300})
+        self.assertEqual(self.totals("asset"), {self.asset.assetID: 550})
+
+    def test_edits_and_deletes_refresh_touched_months(self):
+        fuel = self.expense(date(2024, 1, 5), 50)
+        fuel.expenseDate = date(2024, 3, 5)
+        fuel.save()
+        self.assertEqual(self.totals("month"), {date(2024, 3, 1): 50})
+
+        fuel.deleted = True
+        fuel.save()
+        self.assertFalse(CostRollup.objects.exists())
+
+    def test_rebuild_matches_incremental_rollups(self):
+        self.expense(date(2024, 1, 5), 50)
+        self.maintenance(date(2024, 1, 9), 200)
+        incremental = set(CostRollup.objects.values_list("month", "category", "total", "count"))
+
+        self.manager.rebuildFarm(self.farm[0].id)
+        self.assertEqual(set(CostRollup.objects.values_list("month", "category", "total", "count")), incremental)
+
+    def test_deleting_an_asset_removes_its_rollups(self):
+        self.maintenance(date(2024, 1, 9), 200)
+        self.expense(date(2024, 1, 5), 50, expenseType=1, maintenance=self.maintenance(date(2024, 1, 9), 80))
+
+        self.asset.delete()
+        self.assertFalse(CostRollup.objects.exists())
+
+    def test_export_pivots_categories(self):
+        self.expense(date(2024, 1, 5), 50)
+        self.maintenance(date(2024, 1, 9), 200)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("exportCosts"))
+        lines    = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(lines[0], "Asset ID,Asset Category,Asset Name,Fuel,Maintenance,Insurance,Registration,Other,Total")
+        self.assertEqual(lines[1], f"{self.asset.assetID},SE,Generator,50.00,200.00,0.00,0.00,0.00,250.00")
+
+    def test_export_escapes_formulas(self):
+        self.asset.assetName = "=HYPERLINK(\"x\")"
+        self.asset.save()
+        self.expense(date(2024, 1, 5), 50)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("exportCosts"))
+        lines    = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(lines[1], f"{self.asset.assetID},SE,\"'=HYPERLINK(\"\"x\"\")\",50.00,0.00,0.00,0.00,0.00,50.00")
+
+
+# Expense Listing
+class list_expensesTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        for day, cost in ((3, 30), (1, 10), (2, 20), (2, 25), (5, 50)):
+            self.expense(date(2024, 1, day), cost)
+        self.expense(date(2024, 1, 4), 99).delete()
+
+    def test_pages_carry_the_running_total(self):
+        seen   = []
+        cursor = None
+        while True:
+            with self.assertNumQueries(1):
+                expenses, cursor = list_expenses(self.farm[0].id, {}, "date", cursor, limit=2)
+            seen += [(expense.cost, expense.runningTotal) for expense in expenses]
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, [(10, 10), (20, 30), (25, 55), (30, 85), (50, 135)])
+
+    def test_filters_and_descending_sort(self):
+        expenses, _ = list_expenses(self.farm[0].id, {"start": date(2024, 1, 2), "end": date(2024, 1, 3)}, "-cost")
+        self.assertEqual([expense.cost for expense in expenses], [30, 25, 20])
+
+        expenses, _ = list_expenses(self.farm[0].id, {"type": 2}, "-date")
+        self.assertEqual(expenses, [])
+
+    def test_expense_list_page(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("viewExpenses"), {"sort": "cost", "start": "not-a-date"})
+        self.assertEqual([expense.cost for expense in response.context["expenseData"]], [10, 20, 25, 30, 50])
+        self.assertContains(response, "$135.00")
+
+    def test_expense_export(self):
+        self.client.force_login(self.user)
 
-# Create your tests here.
+        response = self.client.get(reverse("exportExpenses"), {"end": "2024-01-01"})
+        rows     = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(rows), 2)
+        self.assertIn(",SE,Generator,Fuel,10.00,1,,testuser", rows[1])
@@ -4,6 +4,12 @@ from . import views
 urlpatterns = [
     path("expenses",
          views.viewAllExpenses          , name="viewExpenses"),
+    path("expenses/export",
+         views.exportExpenses           , name="exportExpenses"),
+    path("expenses/costs",
+         views.costSummary              , name="costSummary"),
+    path("expenses/costs/export",
+         views.exportCosts              , name="exportCosts"),
     path("expenses/<int:expenseID>",
          views.expenseDetails           , name="viewSingleExpense"),
     path("asset/<str:assetCategory>/<int:assetID>/expenses",
@@ -4,10 +4,29 @@ from .models import Expense
 from django.forms.models import model_to_dict
 from assetManagement.views import AssetManager, AssetStructures
 from assetMaintenance.views import maintenanceManager
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.contrib import messages
 from assetManagement.views import AssetStructures
 from django.contrib.auth.decorators import login_required
+from django.utils.dateparse import parse_date
+from .costs import costRollupManager, COST_DIMENSIONS
+from .listing import list_expenses, EXPENSE_SORTS, DEFAULT_SORT
+from utils.exports import export_response, stream_csv
+from .models import expenseChoices
+
+
+EXPENSE_EXPORT_COLUMNS = (
+    ("Expense ID"    , "expenseID"                        ),
+    ("Date"          , "expenseDate"                      ),
+    ("Asset ID"      , "assetID"                          ),
+    ("Asset Category", "assetID__assetPrefix"             ),
+    ("Asset Name"    , "assetID__assetName"               ),
+    ("Type"          , "expenseType"      , expenseChoices),
+    ("Cost"          , "cost"                             ),
+    ("Receipt Number", "receiptNumber"                    ),
+    ("Maintenance ID", "MaintenanceID"                    ),
+    ("Lodged By"     , "expenseLodgedBy__username"        )
+)
 
 class expensemanager():
 
@@ -35,18 +54,6 @@ class expensemanager():
         except Exception as e:
             return {"error": str(e)}
 
-    def retrieveAllExpenses(self):
-        try:
-            expenses = Expense.objects.all()
-            expenseList = []
-            for expense in expenses:
-                expenseList.append(expense)
-            return expenseList
-        except Expense.DoesNotExist:
-            return {"error": "No Expense Records Found"}
-        except Exception as e:
-            return {"error": str(e)}
-
     def createExpense(self, expenseData, assetCategory, assetID, UserProfile):
         assetmanager = AssetManager()
         maintenancemanager = maintenanceManager()
@@ -108,10 +115,49 @@ def get_expense_details(expenseID):
 
 @login_required(login_url="login")
 def viewAllExpenses(request):
-    expenseManagerInstance = expensemanager()
-    expenseList = expenseManagerInstance.retrieveAllExpenses()
+    """
+    Lists the current farm's expenses a page at a time.
+    Query parameters: start, end (YYYY-MM-DD), type, assetCategory, sort (see EXPENSE_SORTS) and cursor.
+    """
+
+    farm = request.user.currentFarm
+    if farm is None:
+        return redirect("chooseFarm")
+
+    sort = request.GET.get("sort", DEFAULT_SORT)
+    if sort.lstrip("-") not in EXPENSE_SORTS:
+        sort = DEFAULT_SORT
+
+    filters = {
+        "start"        : None                             ,
+        "end"          : None                             ,
+        "type"         : None                             ,
+        "assetCategory": request.GET.get("assetCategory")
+    }
+    # Malformed filters are dropped rather than rejected, the form can only send valid ones
+    try:
+        filters["start"], filters["end"] = cost_period(request)
+    except ValueError:
+        pass
+    try:
+        filters["type"] = int(request.GET["type"]) if request.GET.get("type") else None
+    except ValueError:
+        pass
+
+    expenseList, nextCursor = list_expenses(farm.id, filters, sort, request.GET.get("cursor"))
+
+    nextQuery = None
+    if nextCursor is not None:
+        nextQuery           = request.GET.copy()
+        nextQuery["cursor"] = nextCursor
+        nextQuery           = nextQuery.urlencode()
+
     context = {
-        "expenseData": expenseList
+        "expenseData"   : expenseList          ,
+        "nextQuery"     : nextQuery            ,
+        "filters"       : filters              ,
+        "sort"          : sort                 ,
+        "expenseChoices": expenseChoices
     }
     return render(request, "assetExpenses/expenseList.html", context)
 
@@ -227,3 +273,88 @@ def deleteExpense(request, expenseID, assetCategory, assetID):
     expenseManagerInstance.deleteExpense(expenseID)
     messages.add_message(request, messages.WARNING, "Expense Record Deleted")
     return redirect(f'/asset/{assetCategory}/{assetID}/expenses')
+
+def cost_period(request):
+    """
+    Reads the optional start and end (YYYY-MM-DD) query parameters. Raises ValueError if malformed.
+    """
+
+    start = parse_date(request.GET.get("start", ""))
+    end   = parse_date(request.GET.get("end"  , ""))
+    if start is not None and end is not None and start > end:
+        raise ValueError("start must not be after end")
+
+    return start, end
+
+@login_required(login_url="login")
+def costSummary(request):
+    """
+    JSON endpoint returning the current farm's total cost of ownership.
+    Query parameters:
+        by        : "asset" (default), "category" or "month"
+        start, end: YYYY-MM-DD, limits the months included
+    """
+
+    costRollupManagerInstance = costRollupManager()
+    farm = request.user.currentFarm
+    if farm is None:
+        return JsonResponse({"error": "No farm selected"}, status=400)
+
+    by = request.GET.get("by", "asset")
+    if by not in COST_DIMENSIONS:
+        return JsonResponse({"error": f"Invalid grouping: {by}"}, status=400)
+
+    try:
+        start, end = cost_period(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    return JsonResponse({
+        "by"     : by,
+        "summary": costRollupManagerInstance.costSummary(farm.id, by, start, end)
+    })
+
+@login_required(login_url="login")
+def exportCosts(request):
+    """
+    CSV export of the current farm's spend per asset, pivoted into one column per expense category.
+    Accepts the same start and end parameters as costSummary.
+    """
+
+    costRollupManagerInstance = costRollupManager()
+    farm = request.user.currentFarm
+    if farm is None:
+        return JsonResponse({"error": "No farm selected"}, status=400)
+
+    try:
+        start, end = cost_period(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    header = ["Asset ID", "Asset Category", "Asset Name", *expenseChoices.values(), "Total"]
+    rows   = (
+        [
+            row["assetID"], row["assetCategory"], row["assetName"],
+            *[row["categories"][category] for category in expenseChoices],
+            row["total"]
+        ]
+        for row in costRollupManagerInstance.costPivot(farm.id, start, end)
+    )
+
+    response = StreamingHttpResponse(stream_csv(header, rows), content_type="text/csv")
+    response["Content-Disposition"] = 'attachment; filename="asset_costs.csv"'
+
+    return response
+
+@login_required(login_url="login")
+def exportExpenses(request):
+    """
+    Streams the current farm's expenses as CSV or XLSX (?format=), optionally between ?start= and ?end=.
+    """
+
+    farm = request.user.currentFarm
+    if farm is None:
+        return JsonResponse({"error": "No farm selected"}, status=400)
+
+    expenses = Expense.objects.filter(assetID__farmID=farm.id, deleted=False)
+    return export_response(request, expenses, EXPENSE_EXPORT_COLUMNS, "expenses", "expenseDate")
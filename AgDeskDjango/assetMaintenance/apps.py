@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class AssetmaintenanceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assetMaintenance'
+
+    def ready(self):
+        # Connect the service schedule, damage triage and form choice refresh signal handlers
+        from . import scheduling
+        from . import triage
+        from utils import choices
@@ -7,6 +7,7 @@ from FarmAcc.models import FarmInfo
 from FarmAcc.utils import getFarmUsersByFarmID
 from assetManagement.models import asset
 from UserAuth.models import UserProfile
+from utils.choices import formChoices
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Fieldset, Submit,Row, Column, Div, HTML
 from crispy_forms.bootstrap import Modal,StrictButton,PrependedText
@@ -46,15 +47,14 @@ class createMaintenanceForm(ModelForm):
         )
 
         if user is not None:
-            currentUser = UserProfile.objects.get(username=user)
-            currentFarmID = currentUser.currentFarm_id
+            choices = formChoices.forUser(user)
 
             self.fields["completionDate"].widget.attrs.update({"class": "form-control"})
             self.fields["maintenanceType"].widget.attrs.update({"class": "form-control"})
-            self.fields["maintenanceConductedBy"].queryset = UserProfile.objects.filter(currentFarm_id  = currentFarmID, is_active = True)
+            choices.farmUsers(self.fields["maintenanceConductedBy"])
             self.fields["maintenanceLocation"].widget.attrs.update({"class": "form-control"})
             self.fields["maintenanceTasksCompleted"].widget.attrs.update({"class": "form-control"})
-            self.fields["repairsCompleted"].queryset = Damage.objects.filter(assetID = assetID, assetID__assetPrefix = assetCategory, deleted = False)
+            choices.damages(self.fields["repairsCompleted"], assetID, assetCategory)
             self.fields["Cost"].widget.attrs.update({"class": "form-control"})
             self.fields["Notes"].widget.attrs.update({"class": "form-control"})
             self.fields["kmsBeforeNextService"].widget.attrs.update({"class": "form-control"})
@@ -161,15 +161,14 @@ class editMaintenanceForm(ModelForm):
         )
 
         if user is not None:
-            currentUser = UserProfile.objects.get(username=user)
-            currentFarmID = currentUser.currentFarm_id
+            choices = formChoices.forUser(user)
 
             self.fields["completionDate"           ].widget.attrs.update({"class": "form-control"})
             self.fields["maintenanceType"          ].widget.attrs.update({"class": "form-control"})
-            self.fields["maintenanceConductedBy"   ].queryset = UserProfile.objects.filter(currentFarm_id  = currentFarmID, is_active = True)
+            choices.farmUsers(self.fields["maintenanceConductedBy"])
             self.fields["maintenanceLocation"      ].widget.attrs.update({"class": "form-control"})
             self.fields["maintenanceTasksCompleted"].widget.attrs.update({"class": "form-control"})
-            self.fields["repairsCompleted"].queryset = Damage.objects.filter(assetID = assetID, assetID__assetPrefix = assetCategory, deleted = False)
+            choices.damages(self.fields["repairsCompleted"], assetID, assetCategory)
             self.fields["Cost"                     ].widget.attrs.update({"class": "form-control"})
             self.fields["Notes"                    ].widget.attrs.update({"class": "form-control"})
             self.fields["kmsBeforeNextService"     ].widget.attrs.update({"class": "form-control"})
@@ -260,9 +259,6 @@ class createDamageForm(ModelForm):
         )
 
         if user is not None:
-            currentlyLoggedIn = UserProfile.objects.get(username=user)
-            currentFarmID = currentlyLoggedIn.currentFarm_id
-
             self.fields["damageType"].widget.attrs.update({"class": "form-control"})
             self.fields["damageSeverity"].widget.attrs.update({"class": "form-control"})
             self.fields["damageObservedDate"].widget.attrs.update({"class": "form-control"})
@@ -339,9 +335,6 @@ class editDamageForm(ModelForm):
         )
 
         if user is not None:
-            currentlyLoggedIn = UserProfile.objects.get(username=user)
-            currentFarmID = currentlyLoggedIn.currentFarm_id
-
             self.fields["damageType"].widget.attrs.update({"class": "form-control"})
             self.fields["damageSeverity"].widget.attrs.update({"class": "form-control"})
             self.fields["damageObservedDate"].widget.attrs.update({"class": "form-control"})
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetMaintenance', '0002_initial'),
+        ('assetManagement', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='maintenance',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['assetID', '-completionDate', '-maintenanceID'], name='maintenance_latest_idx'),
+        ),
+    ]
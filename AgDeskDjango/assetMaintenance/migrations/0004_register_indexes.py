@@ -0,0 +1,24 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetMaintenance', '0003_maintenance_latest_index'),
+        ('assetManagement', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='damage',
+            index=models.Index(fields=['assetID', 'deleted', 'damageSeverity'], name='damage_register_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='maintenance',
+            index=models.Index(fields=['assetID', 'deleted', 'completionDate'], name='maintenance_register_idx'),
+        ),
+    ]
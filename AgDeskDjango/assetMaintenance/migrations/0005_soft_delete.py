@@ -0,0 +1,36 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:54
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def stamp_deleted(apps, schema_editor):
+    # Rows deleted before deletedAt existed are treated as deleted now, so purging waits its full age
+    for name in ("Damage", "Maintenance"):
+        apps.get_model("assetMaintenance", name).objects.filter(deleted=True).update(deletedAt=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetMaintenance', '0004_register_indexes'),
+        ('assetManagement', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='damage',
+            name='deletedAt',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='maintenance',
+            name='deletedAt',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='damage',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['assetID', 'damageObservedDate'], name='damage_alive_idx'),
+        ),
+        migrations.RunPython(stamp_deleted, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-19 16:14
+
+import utils.blobstore
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetMaintenance', '0005_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='damage',
+            name='damageImage',
+            field=models.ImageField(blank=True, default='images/asset_images/defaultImage.jpg', storage=utils.blobstore.content_storage, upload_to='damageImages/'),
+        ),
+    ]
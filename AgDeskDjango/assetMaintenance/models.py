@@ -1,6 +1,9 @@
 from django.db import models
 from assetManagement.models import asset
 from UserAuth.models import UserProfile
+from utils import renditions, softdelete
+from utils.blobstore import ContentRecord, content_storage
+from utils.softdelete import SoftDeleteManager, alive_index
 
 # choice conversion dictionary
 
@@ -19,7 +22,7 @@ damageSeverityChoice = {
 }
 
 
-class Damage(models.Model):
+class Damage(ContentRecord):
     damageID                 = models.AutoField(primary_key=True)
     assetID                  = models.ForeignKey(asset, on_delete=models.CASCADE, null=False)
     damageObservedDate       = models.DateField(null=False)
@@ -27,9 +30,20 @@ class Damage(models.Model):
     damageType               = models.CharField(max_length=100, null=False)
     damageSeverity           = models.SmallIntegerField(choices=damageSeverityChoice, default=0)
     notes                    = models.CharField(max_length=255, null=True, blank=True)
-    damageImage              = models.ImageField(upload_to="damageImages/", default="images/asset_images/defaultImage.jpg", null=False, blank=True)
+    damageImage              = models.ImageField(upload_to="damageImages/", storage=content_storage, default="images/asset_images/defaultImage.jpg", null=False, blank=True)
     scheduledMaintenanceDate = models.DateField(null=True, blank=True)
     deleted                  = models.BooleanField(null=False, default=False)
+    deletedAt                = models.DateTimeField(null=True, blank=True)
+
+    objects = SoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            # Damage register filtered by severity (assetMaintenance.register)
+            models.Index(fields=["assetID", "deleted", "damageSeverity"], name="damage_register_idx"),
+            # Live damage of an asset, oldest first (triage and the damage page)
+            alive_index("assetID", "damageObservedDate", name="damage_alive_idx")
+        ]
 
     def __str__(self):
         return f"{str(self.damageID)} - ({self.damageType})"
@@ -49,6 +63,27 @@ class Maintenance(models.Model):
     kmsBeforeNextService      = models.IntegerField(null=True, blank=True)
     dateOfNextService         = models.DateField(null=False)
     deleted                   = models.BooleanField(null=False, default=False)
+    deletedAt                 = models.DateTimeField(null=True, blank=True)
+
+    objects = SoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            # Latest live maintenance per asset (DISTINCT ON assetID) for service scheduling, and the
+            # live index of the table
+            models.Index(
+                fields    = ["assetID", "-completionDate", "-maintenanceID"],
+                condition = models.Q(deleted=False)                         ,
+                name      = "maintenance_latest_idx"
+            ),
+            # Maintenance register filtered by completion date (assetMaintenance.register)
+            models.Index(fields=["assetID", "deleted", "completionDate"], name="maintenance_register_idx")
+        ]
 
     def __str__(self):
         return f"{str(self.maintenanceTasksCompleted)} - {self.maintenanceTasksCompleted}"
+
+
+renditions.register(Damage, "damageImage")
+softdelete.register(Damage)
+softdelete.register(Maintenance)
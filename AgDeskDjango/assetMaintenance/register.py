@@ -0,0 +1,105 @@
+"""
+Farm-wide maintenance and damage registers.
+Each register is a single filtered query over one farm's live assets, returned a page at a time
+with keyset paging (see utils.pagination).
+"""
+
+# Imports
+from django.db.models import Exists, F, OuterRef
+from django.utils.dateparse import parse_date
+
+from utils.pagination import page_of
+
+from .models import Damage, Maintenance
+
+
+# Constants
+REGISTER_PAGE_SIZE = 50
+DAMAGE_STATUSES    = ("open", "repaired", "all")
+
+MAINTENANCE_ORDER  = (("completionDate", parse_date), ("maintenanceID", int))
+DAMAGE_ORDER       = (("damageSeverity", int), ("damageObservedDate", parse_date), ("damageID", int))
+
+
+# Registers
+def maintenance_register(farmID, filters, cursor=None, limit=REGISTER_PAGE_SIZE):
+    """
+    Function to get one page of a farm's maintenance records, most recently completed first.
+    filters may contain:
+        start, end   : completionDate bounds (date)
+        type         : maintenanceType (int)
+        assetCategory: asset prefix, e.g. "HV"
+    """
+
+    records = Maintenance.objects                     \
+        .filter(
+            assetID__farmID  = farmID,
+            assetID__deleted = False ,
+            deleted          = False
+        )
+
+    if filters.get("start") is not None:
+        records = records.filter(completionDate__gte=filters["start"])
+    if filters.get("end") is not None:
+        records = records.filter(completionDate__lte=filters["end"])
+    if filters.get("type") is not None:
+        records = records.filter(maintenanceType=filters["type"])
+    if filters.get("assetCategory"):
+        records = records.filter(assetID__assetPrefix=filters["assetCategory"])
+
+    records = records.values(
+        "maintenanceID", "completionDate", "maintenanceType", "maintenanceTasksCompleted", "Cost",
+        "dateOfNextService", "repairsCompleted", "assetID",
+        assetName     = F("assetID__assetName"  ),
+        assetCategory = F("assetID__assetPrefix"),
+        conductedBy   = F("maintenanceConductedBy__username")
+    )
+
+    return page_of(records, cursor, MAINTENANCE_ORDER, limit)
+
+
+def damage_register(farmID, filters, cursor=None, limit=REGISTER_PAGE_SIZE):
+    """
+    Function to get one page of a farm's damage records, most severe then most recently observed first.
+    filters may contain:
+        start, end   : damageObservedDate bounds (date)
+        severity     : minimum damageSeverity (int)
+        type         : damageType, case insensitive
+        assetCategory: asset prefix, e.g. "HV"
+        status       : "open" (default, not yet repaired), "repaired" or "all"
+    """
+
+    repaired = Maintenance.objects.filter(repairsCompleted=OuterRef("damageID"), deleted=False)
+    records  = Damage.objects                         \
+        .filter(
+            assetID__farmID  = farmID,
+            assetID__deleted = False ,
+            deleted          = False
+        )                                             \
+        .annotate(repaired=Exists(repaired))
+
+    status = filters.get("status") or "open"
+    if status == "open":
+        records = records.filter(repaired=False)
+    elif status == "repaired":
+        records = records.filter(repaired=True)
+
+    if filters.get("start") is not None:
+        records = records.filter(damageObservedDate__gte=filters["start"])
+    if filters.get("end") is not None:
+        records = records.filter(damageObservedDate__lte=filters["end"])
+    if filters.get("severity") is not None:
+        records = records.filter(damageSeverity__gte=filters["severity"])
+    if filters.get("type"):
+        records = records.filter(damageType__iexact=filters["type"])
+    if filters.get("assetCategory"):
+        records = records.filter(assetID__assetPrefix=filters["assetCategory"])
+
+    records = records.values(
+        "damageID", "damageObservedDate", "damageOccuredDate", "damageType", "damageSeverity",
+        "notes", "scheduledMaintenanceDate", "repaired", "assetID",
+        assetName     = F("assetID__assetName"  ),
+        assetCategory = F("assetID__assetPrefix")
+    )
+
+    return page_of(records, cursor, DAMAGE_ORDER, limit)
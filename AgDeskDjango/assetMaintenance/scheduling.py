@@ -0,0 +1,187 @@
+"""
+Predictive service scheduling.
+Each asset's latest maintenance record says when its next service is due, by date and optionally by
+distance (kmsBeforeNextService). Distance is read from the asset's daily rollups of a distance
+performance metric (see DISTANCE_METRIC_NAMES), and the recent daily rate projects when the
+remaining kilometres run out. An asset is due on whichever comes first.
+Each farm's schedule is cached per day, as the projections are relative to today, and under the
+farm's schedule version (see utils.versioning). An asset's maintenance or rollups changing bumps the
+version, which every process reads, so the next read anywhere recomputes the schedule with a single
+query.
+"""
+
+# Imports
+import math
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from assetManagement.models import asset
+from assetOperation.metrics import rollups_refreshed
+from assetOperation.models import MetricRollup
+from utils.versioning import bump_version, current_version
+
+from .models import Maintenance
+
+
+# Constants
+DISTANCE_METRIC_NAMES = ("km", "kms", "kilometres", "kilometers", "distance")
+RATE_WINDOW           = 28 # Days of usage the distance rate is averaged over
+DUE_SOON_DAYS         = 30
+SERVICE_PREFIX        = "serviceSchedule"
+SERVICE_TTL           = 60 * 60 * 24 # Keyed by day, the TTL only bounds memory
+
+
+def schedule_key(farmID, version, today):
+    return f"{SERVICE_PREFIX}:{farmID}:{version}:{today.isoformat()}"
+
+
+# Service Schedule Manager
+class serviceScheduleManager():
+    """
+    Projects when each asset on a farm is next due for a service and ranks them.
+    """
+
+    def dueSoon(self, farmID, within=DUE_SOON_DAYS):
+        """
+        Returns the assets due within the next within days (overdue assets included), soonest first:
+            [{"assetID": int, "assetName": str, "assetPrefix": str, "lastServiced": date,
+              "dueDate": date, "dueBy": "date" | "distance", "daysUntilDue": int,
+              "kmsRemaining": float | None, "kmsPerDay": float | None}, ...]
+        """
+
+        today    = timezone.localdate()
+        schedule = self.farmSchedule(farmID)
+
+        queue = []
+        for entry in schedule.values():
+            daysUntilDue = (entry["dueDate"] - today).days
+            if daysUntilDue <= within:
+                queue.append({**entry, "daysUntilDue": daysUntilDue})
+
+        queue.sort(key=lambda entry: (entry["dueDate"], entry["assetID"]))
+        return queue
+
+    def farmSchedule(self, farmID):
+        """
+        Returns {assetID: schedule entry} for every live asset on the farm with maintenance history.
+        """
+
+        key      = schedule_key(farmID, current_version(SERVICE_PREFIX, farmID), timezone.localdate())
+        schedule = cache.get(key)
+        if schedule is None:
+            schedule = self.computeSchedule(farmID=farmID)
+            cache.set(key, schedule, SERVICE_TTL)
+
+        return schedule
+
+    def computeSchedule(self, **assetFilter):
+        """
+        Runs one query for the latest maintenance of each matching asset (DISTINCT ON the asset) along
+        with its distance travelled since that service and over the rate window.
+        assetFilter is farmID=... for a whole farm or assetID=... for a single asset.
+        """
+
+        today       = timezone.localdate()
+        windowStart = today - timedelta(days=RATE_WINDOW)
+
+        distance = MetricRollup.objects                                            \
+            .filter(
+                assetID                = OuterRef("assetID")                       ,
+                period                 = "day"                                     ,
+                metricID__deleted      = False                                     ,
+                metricID__name__iregex = rf"^({'|'.join(DISTANCE_METRIC_NAMES)})$"
+            )                                                                      \
+            .order_by()                                                            \
+            .values("assetID")
+
+        latest = Maintenance.objects                                               \
+            .filter(
+                deleted          = False,
+                assetID__deleted = False,
+                **{f"assetID__{field}": value for field, value in assetFilter.items()}
+            )                                                                      \
+            .order_by("assetID", "-completionDate", "-maintenanceID")              \
+            .distinct("assetID")                                                   \
+            .annotate(
+                kmsSinceService = Subquery(
+                    distance
+                    .filter(bucket__gte=OuterRef("completionDate"))
+                    .annotate(total=Sum("sumValue"))
+                    .values("total")
+                ),
+                kmsInWindow     = Subquery(
+                    distance
+                    .filter(bucket__gt=windowStart, bucket__lte=today)
+                    .annotate(total=Sum("sumValue"))
+                    .values("total")
+                )
+            )                                                                      \
+            .values(
+                "assetID", "assetID__assetName", "assetID__assetPrefix", "completionDate",
+                "dateOfNextService", "kmsBeforeNextService", "kmsSinceService", "kmsInWindow"
+            )
+
+        return {row["assetID"]: self.projectService(row, today) for row in latest}
+
+    def projectService(self, row, today):
+        """
+        Builds a schedule entry from a latest maintenance row.
+        """
+
+        entry = {
+            "assetID"     : row["assetID"             ],
+            "assetName"   : row["assetID__assetName"  ],
+            "assetPrefix" : row["assetID__assetPrefix"],
+            "lastServiced": row["completionDate"      ],
+            "dueDate"     : row["dateOfNextService"   ],
+            "dueBy"       : "date"                     ,
+            "kmsRemaining": None                       ,
+            "kmsPerDay"   : None
+        }
+
+        if row["kmsBeforeNextService"] is None:
+            return entry
+
+        kmsRemaining = row["kmsBeforeNextService"] - float(row["kmsSinceService"] or 0)
+        kmsPerDay    = float(row["kmsInWindow"] or 0) / RATE_WINDOW
+        entry["kmsRemaining"] = round(kmsRemaining, 1)
+        entry["kmsPerDay"   ] = round(kmsPerDay, 1)
+
+        if kmsRemaining <= 0:
+            distanceDue = today
+        elif kmsPerDay > 0:
+            distanceDue = today + timedelta(days=math.ceil(kmsRemaining / kmsPerDay))
+        else:
+            return entry # Unused recently, so the distance limit is not getting any closer
+
+        if distanceDue < entry["dueDate"]:
+            entry["dueDate"] = distanceDue
+            entry["dueBy"  ] = "distance"
+
+        return entry
+
+    def refreshAsset(self, assetID):
+        """
+        Moves the farm an asset belongs to on to a new schedule version.
+        """
+
+        farmID = asset.objects.filter(assetID=assetID).values_list("farmID", flat=True).first()
+        if farmID is not None:
+            bump_version(SERVICE_PREFIX, farmID)
+
+
+# Refresh
+@receiver(post_save  , sender=Maintenance)
+@receiver(post_delete, sender=Maintenance)
+def refresh_maintenance_schedule(sender, instance, **kwargs):
+    serviceScheduleManager().refreshAsset(instance.assetID_id)
+
+
+@receiver(rollups_refreshed)
+def refresh_usage_schedule(sender, assetID, **kwargs):
+    serviceScheduleManager().refreshAsset(assetID)
@@ -1,3 +1,341 @@
+"""
+Tests for assetMaintenance
+"""
+
+# Import
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from utils.testing_data import FARM_SUPERSET
+from utils.testing_data import generate_dataset_from_model
+
+from assetManagement.models      import SmallEquipment
+from assetMaintenance.forms      import createMaintenanceForm, editMaintenanceForm
+from assetMaintenance.models     import Damage, Maintenance
+from assetMaintenance.register   import damage_register, maintenance_register
+from assetMaintenance.scheduling import serviceScheduleManager
+from assetMaintenance.triage     import damageTriageManager, TRIAGE_PREFIX
+from assetMaintenance.views      import damageManager
+from assetOperation.models       import OperationLog, OperationLogMetric, PerformanceMetric
+from FarmAcc.models              import FarmInfo
+from UserAuth.models             import UserProfile
+from utils.versioning            import bump_version
+
+
+# Base
+class BaseTestCase(TestCase):
+    def setUp(self):
+        # Create a user, a farm and assets for testing
+        VALID_FARMS = {
+            "farm_name"    : FARM_SUPERSET["farm_name"    ][0],
+            "farm_street"  : FARM_SUPERSET["farm_street"  ][0],
+            "farm_state"   : FARM_SUPERSET["farm_state"   ][0],
+            "farm_postcode": FARM_SUPERSET["farm_postcode"][0],
+            "farm_bio"     : FARM_SUPERSET["farm_bio"     ][0],
+            "farm_image"   : FARM_SUPERSET["farm_image"   ][0]
+        }
+
+        farmList = [
+            FarmInfo(**farm_data)
+            for farm_data
+            in generate_dataset_from_model(VALID_FARMS)
+        ]
+        self.farm = FarmInfo.objects.bulk_create(farmList)
+
+        self.user = UserProfile.objects.create_user(
+            username    = "testuser"          ,
+            email       = "testuser@test.test",
+            password    = "12345"             ,
+            currentFarm = self.farm[0]
+        )
+
+        self.assets = [
+            SmallEquipment.objects.create(
+                assetPrefix      = "SE"               ,
+                assetName        = name               ,
+                farmID           = self.farm[0]       ,
+                Manufacturer     = "Honda"            ,
+                partsList        = "Spark Plug"       ,
+                Location         = "Barn"             ,
+                dateManufactured = date(2020, 1, 1)   ,
+                datePurchased    = date(2020, 1, 1)   ,
+                serialNumber     = "123456789"
+            )
+            for name in ("Generator", "Pump")
+        ]
+
+        self.today = timezone.localdate()
+        cache.clear()
+
+    def service(self, asset, daysAgo, dueIn, kms=None):
+        return Maintenance.objects.create(
+            assetID                   = asset                                    ,
+            completionDate            = self.today - timedelta(days=daysAgo)     ,
+            maintenanceConductedBy    = self.user                                ,
+            maintenanceLocation       = "Shed"                                   ,
+            maintenanceTasksCompleted = "Oil change"                             ,
+            Cost                      = 100                                      ,
+            Notes                     = ""                                       ,
+            kmsBeforeNextService      = kms                                      ,
+            dateOfNextService         = self.today + timedelta(days=dueIn)
+        )
+
+    def damage(self, asset, daysAgo, severity, damageType="Dent"):
+        return Damage.objects.create(
+            assetID            = asset                                ,
+            damageObservedDate = self.today - timedelta(days=daysAgo) ,
+            damageType         = damageType                           ,
+            damageSeverity     = severity
+        )
+
+    def drive(self, asset, daysAgo, kms):
+        metric, _ = PerformanceMetric.objects.get_or_create(assetID=asset, name="km")
+        start     = timezone.now() - timedelta(days=daysAgo)
+        log       = OperationLog.objects.create(assetID=asset, userID=self.user, startDateTime=start, location="Road")
+        OperationLogMetric.objects.create(logID=log, metricID=metric, value=kms)
+        log.endDateTime = start + timedelta(hours=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            log.save()
+
+
+# Service Scheduling
+class serviceScheduleManagerTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manager = serviceScheduleManager()
+
+    def test_latest_maintenance_ranked_by_due_date(self):
+        generator, pump = self.assets
+        self.service(generator, 200, -10) # Superseded by the record below
+        self.service(generator, 20, 40)
+        self.service(pump, 5, 10)
+
+        queue = self.manager.dueSoon(self.farm[0].id, within=60)
+        self.assertEqual([entry["assetID"] for entry in queue], [pump.assetID, generator.assetID])
+        self.assertEqual(queue[0]["daysUntilDue"], 10)
+
+        queue = self.manager.dueSoon(self.farm[0].id, within=30)
+        self.assertEqual([entry["assetID"] for entry in queue], [pump.assetID])
+
+    def test_cached_schedule_is_recomputed_the_next_day(self):
+        self.service(self.assets[0], 20, 40)
+        self.manager.dueSoon(self.farm[0].id)
+
+        # Distance projections move with today, so yesterday's schedule is not reused
+        with patch("django.utils.timezone.localdate", return_value=self.today + timedelta(days=1)):
+            with self.assertNumQueries(2):
+                self.manager.dueSoon(self.farm[0].id)
+
+    def test_distance_usage_brings_service_forward(self):
+        generator, _ = self.assets
+        self.service(generator, 10, 365, kms=1000)
+        for daysAgo in range(1, 8):
+            self.drive(generator, daysAgo, 100) # 700 km since the service, 25 km/day over the window
+
+        entry = self.manager.dueSoon(self.farm[0].id)[0]
+        self.assertEqual(entry["dueBy"], "distance")
+        self.assertEqual(entry["kmsRemaining"], 300.0)
+        self.assertEqual(entry["dueDate"], self.today + timedelta(days=12))
+
+    def test_cached_schedule_dropped_on_write(self):
+        generator, pump = self.assets
+        self.service(generator, 20, 40)
+        self.manager.dueSoon(self.farm[0].id)
+
+        with self.assertNumQueries(1): # The farm's version
+            self.assertEqual(self.manager.dueSoon(self.farm[0].id), [])
+
+        self.service(pump, 0, 3)
+        with self.assertNumQueries(2):
+            queue = self.manager.dueSoon(self.farm[0].id)
+        self.assertEqual([entry["assetID"] for entry in queue], [pump.assetID])
+
+    def test_service_due_endpoint(self):
+        self.service(self.assets[0], 20, -2)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("serviceDue"))
+        self.assertEqual(response.json()["queue"][0]["daysUntilDue"], -2)
+        self.assertEqual(self.client.get(reverse("serviceDue"), {"within": "soon"}).status_code, 400)
+
+
+# Registers
+class registerTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+    def test_maintenance_pages_cover_every_record_once(self):
+        generator, pump = self.assets
+        for daysAgo in (1, 1, 2, 3, 3):
+            self.service(generator, daysAgo, 30)
+        self.service(pump, 1, 30).delete()
+
+        seen   = []
+        cursor = None
+        while True:
+            records, cursor = maintenance_register(self.farm[0].id, {}, cursor, limit=2)
+            seen += [record["maintenanceID"] for record in records]
+            if cursor is None:
+                break
+
+        expected = Maintenance.objects                         \
+            .order_by("-completionDate", "-maintenanceID")     \
+            .values_list("maintenanceID", flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_open_damage_filtered_and_ranked_by_severity(self):
+        generator, pump = self.assets
+        minor    = self.damage(generator, 1, 0)
+        severe   = self.damage(pump, 5, 2)
+        critical = self.damage(generator, 9, 3, "Crack")
+        fixed    = self.damage(pump, 2, 3)
+        repair   = self.service(pump, 0, 30)
+        repair.repairsCompleted = fixed
+        repair.save()
+
+        with self.assertNumQueries(1):
+            records, _ = damage_register(self.farm[0].id, {"severity": 1})
+        self.assertEqual([record["damageID"] for record in records], [critical.damageID, severe.damageID])
+
+        records, _ = damage_register(self.farm[0].id, {"type": "crack"})
+        self.assertEqual([record["damageID"] for record in records], [critical.damageID])
+
+        records, _ = damage_register(self.farm[0].id, {"status": "repaired"})
+        self.assertEqual([record["damageID"] for record in records], [fixed.damageID])
+
+        records, cursor = damage_register(self.farm[0].id, {}, limit=2)
+        records, _      = damage_register(self.farm[0].id, {}, cursor, limit=2)
+        self.assertEqual([record["damageID"] for record in records], [minor.damageID])
+
+    def test_register_endpoints(self):
+        self.damage(self.assets[0], 1, 2)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("damageRegister"), {"start": str(self.today - timedelta(days=7))})
+        self.assertEqual(len(response.json()["records"]), 1)
+        self.assertEqual(self.client.get(reverse("damageRegister"), {"status": "closed"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("maintenanceRegister"), {"end": "2024-13-01"}).status_code, 400)
+
+    def test_damage_export_uses_severity_labels(self):
+        self.damage(self.assets[0], 1, 3)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("exportDamage"))
+        rows     = b"".join(response.streaming_content).decode().splitlines()
+        self.assertIn(",Generator,Dent,Critical,", rows[1])
+        self.assertEqual(self.client.get(reverse("exportMaintenance"), {"format": "xlsx"}).status_code, 200)
+
+
+# Damage Triage
+class damageTriageManagerTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.manager = damageTriageManager()
+
+    def repair(self, damage):
+        record = self.service(damage.assetID, 0, 90)
+        record.repairsCompleted = damage
+        record.save()
+        return record
+
+    def test_open_damage_ranked_by_severity_then_age(self):
+        generator, pump = self.assets
+        dent     = self.damage(generator, 10, 0)
+        crack    = self.damage(pump, 2, 2)
+        leak     = self.damage(generator, 5, 2)
+        repaired = self.damage(pump, 20, 3)
+        self.repair(repaired)
+
+        queue = self.manager.triageQueue(self.farm[0].id)
+        self.assertEqual([entry["damageID"] for entry in queue], [leak.damageID, crack.damageID, dent.damageID])
+        self.assertEqual((queue[0]["ageDays"], queue[0]["slaDaysRemaining"], queue[0]["slaBreached"]), (5, -2, True))
+        self.assertEqual(queue[2]["slaDaysRemaining"], 20)
+
+        severe = self.manager.triageQueue(self.farm[0].id, severity=2)
+        self.assertEqual(len(severe), 2)
+
+    def test_queue_cached_until_damage_or_maintenance_changes(self):
+        dent = self.damage(self.assets[0], 1, 1)
+        self.manager.triageQueue(self.farm[0].id)
+
+        with self.assertNumQueries(1): # The farm's version
+            self.manager.triageQueue(self.farm[0].id)
+
+        record = self.repair(dent)
+        self.assertEqual(self.manager.triageQueue(self.farm[0].id), [])
+
+        record.delete()
+        self.assertEqual(len(self.manager.triageQueue(self.farm[0].id)), 1)
+
+    def test_resolved_damage_leaves_every_process_queue(self):
+        dent = self.damage(self.assets[0], 1, 1)
+        self.manager.triageQueue(self.farm[0].id)
+
+        # Repaired through another process: only the version it bumps reaches this one
+        Damage.objects.filter(pk=dent.pk).update(deleted=True)
+        bump_version(TRIAGE_PREFIX, self.farm[0].id)
+
+        self.assertEqual(self.manager.triageQueue(self.farm[0].id), [])
+
+    def test_damage_page_status_in_one_query(self):
+        generator = self.assets[0]
+        for daysAgo in range(3):
+            self.repair(self.damage(generator, daysAgo, 1))
+        self.damage(generator, 1, 2)
+
+        with self.assertNumQueries(1):
+            records = damageManager().retrieveDamageData(generator.assetID, "SE")
+        self.assertEqual([record["status"] for record in records], ["Not Repaired"] + ["Repaired"] * 3)
+
+    def test_triage_endpoint(self):
+        self.damage(self.assets[0], 1, 3)
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("damageTriage"))
+        self.assertEqual(response.json()["queue"][0]["severityLabel"], "Critical")
+        self.assertEqual(self.client.get(reverse("damageTriage"), {"severity": "high"}).status_code, 400)
+
+
+# Form Choices
+class formChoicesTest(BaseTestCase):
+    def forms(self, user):
+        generator = self.assets[0]
+        return [
+            createMaintenanceForm(user, "SE", generator.assetID),
+            editMaintenanceForm(user, "SE", generator.assetID)
+        ]
+
+    def options(self, form, field):
+        return [label for _, label in form.fields[field].choices]
+
+    def test_forms_on_a_page_share_one_lookup(self):
+        self.damage(self.assets[0], 1, 1)
+        user = UserProfile.objects.get(pk=self.user.pk)
+
+        with self.assertNumQueries(2): # Farm members and the asset's damages
+            forms = self.forms(user)
+            for form in forms:
+                form.as_p()
+
+        # The next request reuses the cached lists
+        user = UserProfile.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(0):
+            self.forms(user)[0].as_p()
+
+    def test_saving_records_refreshes_choices(self):
+        self.forms(self.user)
+        dent  = self.damage(self.assets[0], 1, 1)
+        other = UserProfile.objects.create_user(username="other", password="12345", currentFarm=self.farm[0])
+
+        form = self.forms(UserProfile.objects.get(pk=self.user.pk))[0]
+        self.assertEqual(self.options(form, "repairsCompleted"), ["---------", str(dent)])
+        self.assertEqual(self.options(form, "maintenanceConductedBy"), ["---------", "testuser", "other"])
 
-# Create your tests here.
+        # Submitted choices are still checked against the database
+        self.assertEqual(form.fields["maintenanceConductedBy"].clean(other.pk), other)
+        self.assertEqual(form.fields["repairsCompleted"].clean(dent.pk), dent)
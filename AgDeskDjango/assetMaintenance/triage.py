@@ -0,0 +1,128 @@
+"""
+Damage triage queue.
+Lists a farm's open damage, meaning damage with no live maintenance record repairing it. The most
+severe damage comes first, and the oldest first within a severity. Each entry carries an SLA timer:
+the number of days left to repair it, based on its severity (see TRIAGE_SLA_DAYS).
+Open damage is found with a single anti-join (NOT EXISTS) rather than an exists() per record. Each
+farm's queue is cached under the farm's triage version (see utils.versioning), which any write to a
+Damage or Maintenance record of the farm bumps, so every process drops a resolved report at once.
+Timers are relative to today, so they are worked out when the queue is read.
+"""
+
+# Imports
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import Exists, F, OuterRef
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from assetManagement.models import asset
+from utils.versioning import bump_version, current_version
+
+from .models import Damage, Maintenance, damageSeverityChoice
+
+
+# Constants
+TRIAGE_PREFIX   = "damageTriage"
+TRIAGE_TTL      = 60 * 60
+TRIAGE_SLA_DAYS = {
+    3: 1 , # Critical
+    2: 3 , # Severe
+    1: 14, # Moderate
+    0: 30  # Minor
+}
+
+
+def triage_key(farmID, version):
+    return f"{TRIAGE_PREFIX}:{farmID}:{version}"
+
+
+def open_damage():
+    """
+    Function to get live damage that has not been repaired by a live maintenance record.
+    """
+
+    repairs = Maintenance.objects.filter(repairsCompleted=OuterRef("damageID"), deleted=False)
+
+    return Damage.objects.filter(~Exists(repairs), deleted=False)
+
+
+# Damage Triage Manager
+class damageTriageManager():
+    """
+    Ranks a farm's open damage by severity and age.
+    """
+
+    def triageQueue(self, farmID, severity=None):
+        """
+        Returns the farm's open damage, most severe then oldest first. Only damage of at least
+        severity is returned when it is given:
+            [{"damageID": int, "assetID": int, "assetName": str, "assetPrefix": str,
+              "damageType": str, "damageSeverity": int, "severityLabel": str,
+              "damageObservedDate": date, "scheduledMaintenanceDate": date | None,
+              "ageDays": int, "slaDueDate": date, "slaDaysRemaining": int, "slaBreached": bool}, ...]
+        """
+
+        today = timezone.localdate()
+        queue = []
+        for entry in self.farmQueue(farmID):
+            if severity is not None and entry["damageSeverity"] < severity:
+                continue
+
+            slaDueDate = entry["damageObservedDate"] + timedelta(days=TRIAGE_SLA_DAYS[entry["damageSeverity"]])
+            queue.append({
+                **entry,
+                "severityLabel"   : damageSeverityChoice[entry["damageSeverity"]]  ,
+                "ageDays"         : (today - entry["damageObservedDate"]).days     ,
+                "slaDueDate"      : slaDueDate                                     ,
+                "slaDaysRemaining": (slaDueDate - today).days                      ,
+                "slaBreached"     : slaDueDate < today
+            })
+
+        return queue
+
+    def farmQueue(self, farmID):
+        """
+        Returns the farm's ranked open damage, from the cache when it is there.
+        """
+
+        key   = triage_key(farmID, current_version(TRIAGE_PREFIX, farmID))
+        queue = cache.get(key)
+        if queue is None:
+            queue = self.computeQueue(farmID)
+            cache.set(key, queue, TRIAGE_TTL)
+
+        return queue
+
+    def computeQueue(self, farmID):
+        records = open_damage()                                                          \
+            .filter(assetID__farmID=farmID, assetID__deleted=False)                      \
+            .order_by("-damageSeverity", "damageObservedDate", "damageID")               \
+            .values(
+                "damageID", "assetID", "damageType", "damageSeverity", "damageObservedDate",
+                "scheduledMaintenanceDate",
+                assetName   = F("assetID__assetName"  ),
+                assetPrefix = F("assetID__assetPrefix")
+            )
+
+        return list(records)
+
+    def refreshAsset(self, assetID):
+        """
+        Moves the farm an asset belongs to on to a new triage version.
+        """
+
+        farmID = asset.objects.filter(assetID=assetID).values_list("farmID", flat=True).first()
+        if farmID is not None:
+            bump_version(TRIAGE_PREFIX, farmID)
+
+
+# Refresh
+@receiver(post_save  , sender=Damage)
+@receiver(post_delete, sender=Damage)
+@receiver(post_save  , sender=Maintenance)
+@receiver(post_delete, sender=Maintenance)
+def refresh_triage_queue(sender, instance, **kwargs):
+    damageTriageManager().refreshAsset(instance.assetID_id)
@@ -19,4 +19,16 @@ urlpatterns = [
          views.damageDetails,            name="assetDamageDetails"),
     path("getDamageDetails/<int:damageLogID>/",
          views.retrieveDamageRecordByID, name="retrieveDamageRecordByID"),
+    path("service/due",
+         views.serviceDue,               name="serviceDue"),
+    path("damage/triage",
+         views.damageTriage,             name="damageTriage"),
+    path("register/maintenance",
+         views.maintenanceRegister,      name="maintenanceRegister"),
+    path("register/damage",
+         views.damageRegister,           name="damageRegister"),
+    path("register/maintenance/export",
+         views.exportMaintenance,        name="exportMaintenance"),
+    path("register/damage/export",
+         views.exportDamage,             name="exportDamage"),
 ]
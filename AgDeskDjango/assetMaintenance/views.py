@@ -10,6 +10,42 @@ from django.contrib import messages
 from django.http import JsonResponse
 from django.forms.models import model_to_dict
 from django.contrib.auth.decorators import login_required
+from django.db.models import Exists, OuterRef
+from django.utils.dateparse import parse_date
+from .register import maintenance_register, damage_register, DAMAGE_STATUSES
+from .scheduling import serviceScheduleManager, DUE_SOON_DAYS
+from .triage import damageTriageManager, open_damage
+from utils.exports import export_response
+
+
+MAINTENANCE_EXPORT_COLUMNS = (
+    ("Maintenance ID"         , "maintenanceID"                                                  ),
+    ("Completion Date"        , "completionDate"                                                 ),
+    ("Asset ID"               , "assetID"                                                        ),
+    ("Asset Category"         , "assetID__assetPrefix"                                           ),
+    ("Asset Name"             , "assetID__assetName"                                             ),
+    ("Type"                   , "maintenanceType"                 , models.maintenanceTypeChoices),
+    ("Conducted By"           , "maintenanceConductedBy__username"                               ),
+    ("Location"               , "maintenanceLocation"                                            ),
+    ("Tasks Completed"        , "maintenanceTasksCompleted"                                      ),
+    ("Repaired Damage ID"     , "repairsCompleted"                                               ),
+    ("Cost"                   , "Cost"                                                           ),
+    ("Notes"                  , "Notes"                                                          ),
+    ("Kms Before Next Service", "kmsBeforeNextService"                                           ),
+    ("Next Service Date"      , "dateOfNextService"                                              )
+)
+DAMAGE_EXPORT_COLUMNS = (
+    ("Damage ID"                 , "damageID"                                           ),
+    ("Observed Date"             , "damageObservedDate"                                 ),
+    ("Occured Date"              , "damageOccuredDate"                                  ),
+    ("Asset ID"                  , "assetID"                                            ),
+    ("Asset Category"            , "assetID__assetPrefix"                               ),
+    ("Asset Name"                , "assetID__assetName"                                 ),
+    ("Type"                      , "damageType"                                         ),
+    ("Severity"                  , "damageSeverity"          , models.damageSeverityChoice),
+    ("Notes"                     , "notes"                                              ),
+    ("Scheduled Maintenance Date", "scheduledMaintenanceDate"                           )
+)
 
 
 class maintenanceManager():
@@ -39,7 +75,7 @@ class maintenanceManager():
             return recordsFound
 
         elif assetID is not None and assetCategory == "ALL":
-            completeRecordSet = Maintenance.objects.filter(assetID=assetID, deleteed=False)
+            completeRecordSet = Maintenance.objects.filter(assetID=assetID, deleted=False)
             return completeRecordSet
 
         elif assetID is None and assetCategory != "ALL":
@@ -47,7 +83,7 @@ class maintenanceManager():
             return completeRecordSet
 
         else:
-            completeRecordSet = Maintenance.objects.all(deleted=False)
+            completeRecordSet = Maintenance.objects.filter(deleted=False)
             return completeRecordSet
 
     def createMaintenanceRecord(self, maintenanceData, assetCategory, assetID):
@@ -158,14 +194,14 @@ class maintenanceManager():
 
 class damageManager():
     def retrieveDamageData(self, assetID=None, assetCategory="ALL"):
-        #The unfiltered Queryset is stored in a variable to be used later.
-        completeRecordSet = None
-        #The query set after filtered to remove damage logs that are deleted or marked repaired.
-        filteredRecordSet = []
+        #Whether each damage record has been repaired is worked out in the same query (see triage.open_damage).
+        repairs = Maintenance.objects.filter(repairsCompleted=OuterRef("damageID"), deleted=False)
 
         if assetID is not None and assetCategory != "ALL":
-            completeRecordSet = Damage.objects.filter(assetID=assetID, assetID__assetPrefix=assetCategory, deleted=False)
-            damageInfoWithStatus = []
+            completeRecordSet = Damage.objects                                              \
+                .filter(assetID=assetID, assetID__assetPrefix=assetCategory, deleted=False) \
+                .annotate(repaired=Exists(repairs))                                         \
+                .select_related("assetID")
             repairedRecords = []
             nonRepairedRecords = []
             for damage in completeRecordSet:
@@ -184,37 +220,22 @@ class damageManager():
                     "status"                  : "Not Repaired"
                 }
 
-                if self.checkDamageRepairedByID(damage.damageID):
+                if damage.repaired:
                     damageInfo["status"] = "Repaired"
                     repairedRecords.append(damageInfo)
                 else:
                     nonRepairedRecords.append(damageInfo)
-                    filteredRecordSet.append(damage)
-                    print(damage)
 
             # Concatenate non-repaired records with repaired records
-            damageInfoWithStatus = nonRepairedRecords + repairedRecords
-
-            return damageInfoWithStatus
+            return nonRepairedRecords + repairedRecords
 
         elif assetID is not None and assetCategory == "ALL":
-            completeRecordSet = Damage.objects.filter(assetID=assetID, deleted=False)
-            for damage in completeRecordSet:
-                if (not self.checkDamageRepairedByID(damage.damageID)):
-                    filteredRecordSet.append(damage)
-                    print(damage)
+            return list(open_damage().filter(assetID=assetID))
 
         elif assetID is None and assetCategory != "ALL":
-            completeRecordSet = Damage.objects.filter(assetID__assetPrefix=assetCategory, deleted=False)
-            for damage in completeRecordSet:
-                if (not self.checkDamageRepairedByID(damage.damageID)):
-                    filteredRecordSet.append(damage)
-                    print(damage)
-
-        else:
-            completeRecordSet = Damage.objects.all(deleted=False)
+            return list(open_damage().filter(assetID__assetPrefix=assetCategory))
 
-        return filteredRecordSet
+        return []
 
     def retrieveDamageRecordByID(self, damageLogID):
         try:
@@ -518,3 +539,146 @@ def deleteDamage(request, damageID, assetCategory, assetID):
     messages.add_message(request, messages.WARNING, "Damage Record Deleted")
 
     return redirect(f"/asset/{assetCategory}/{assetID}/damage")
+
+@login_required(login_url="login")
+def serviceDue(request):
+    """
+    JSON endpoint returning the current farm's assets due for a service, soonest (or most overdue) first.
+    Query parameters:
+        within: days ahead to include, defaults to DUE_SOON_DAYS
+    """
+
+    serviceScheduleManagerInstance = serviceScheduleManager()
+    farm = request.user.currentFarm
+    if farm is None:
+        return JsonResponse({"error": "No farm selected"}, status=400)
+
+    try:
+        within = int(request.GET.get("within", DUE_SOON_DAYS))
+    except ValueError:
+        return JsonResponse({"error": "within must be a whole number of days"}, status=400)
+
+    return JsonResponse({
+        "within": within,
+        "queue" : serviceScheduleManagerInstance.dueSoon(farm.id, within)
+    })
+
+def register_filters(request):
+    """
+    Reads the register filters from the query string. Raises ValueError on a malformed filter.
+    """
+
+    filters = {
+        "start"        : parse_date(request.GET.get("start", "")),
+        "end"          : parse_date(request.GET.get("end"  , "")),
+        "type"         : request.GET.get("type")                  ,
+        "assetCategory": request.GET.get("assetCategory")         ,
+        "status"       : request.GET.get("status")                ,
+        "severity"     : request.GET.get("severity")
+    }
+
+    if filters["severity"] is not None:
+        filters["severity"] = int(filters["severity"])
+    if filters["status"] is not None and filters["status"] not in DAMAGE_STATUSES:
+        raise ValueError(f"Invalid status: {filters['status']}")
+
+    return filters
+
+@login_required(login_url="login")
+def maintenanceRegister(request):
+    """
+    JSON endpoint returning one page of the current farm's maintenance records, newest first.
+    Query parameters: start, end (YYYY-MM-DD), type (maintenance type number), assetCategory and cursor.
+    """
+
+    farm = request.user.currentFarm
+    if farm is None:
+        return JsonResponse({"error": "No farm selected"}, status=400)
+
+    try:
+        filters = register_filters(request)
+        if filters["type"] is not None:
+            filters["type"] = int(filters["type"])
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    records, nextCursor = maintenance_register(farm.id, filters, request.GET.get("cursor"))
+
+    return JsonResponse({
+        "records"   : records   ,
+        "nextCursor": nextCursor
+    })
+
+@login_required(login_url="login")
+def damageRegister(request):
+    """
+    JSON endpoint returning one page of the current farm's damage records, most severe first.
+    Query parameters: start, end (YYYY-MM-DD), severity (minimum), type, assetCategory,
+    status ("open", "repaired" or "all") and cursor.
+    """
+
+    farm = request.user.currentFarm
+    if farm is None:
+        return JsonResponse({"error": "No farm selected"}, status=400)
+
+    try:
+        filters = register_filters(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    records, nextCursor = damage_register(farm.id, filters, request.GET.get("cursor"))
+
+    return JsonResponse({
+        "records"   : records   ,
+        "nextCursor": nextCursor
+    })
+
+@login_required(login_url="login")
+def damageTriage(request):
+    """
+    JSON endpoint returning the current farm's unrepaired damage, most severe then oldest first, with
+    the days left to repair each before its severity's SLA is breached.
+    Query parameters:
+        severity: minimum severity to include (0 Minor to 3 Critical)
+    """
+
+    damageTriageManagerInstance = damageTriageManager()
+    farm = request.user.currentFarm
+    if farm is None:
+        return JsonResponse({"error": "No farm selected"}, status=400)
+
+    try:
+        severity = request.GET.get("severity")
+        severity = int(severity) if severity else None
+    except ValueError:
+        return JsonResponse({"error": "severity must be a whole number"}, status=400)
+
+    return JsonResponse({
+        "queue": damageTriageManagerInstance.triageQueue(farm.id, severity)
+    })
+
+@login_required(login_url="login")
+def exportMaintenance(request):
+    """
+    Streams the current farm's maintenance records as CSV or XLSX (?format=), optionally between ?start= and ?end=.
+    """
+
+    farm = request.user.currentFarm
+    if farm is None:
+        return JsonResponse({"error": "No farm selected"}, status=400)
+
+    records = Maintenance.objects.filter(assetID__farmID=farm.id, deleted=False)
+    return export_response(request, records, MAINTENANCE_EXPORT_COLUMNS, "maintenance", "completionDate")
+
+@login_required(login_url="login")
+def exportDamage(request):
+    """
+    Streams the current farm's damage records as CSV or XLSX (?format=), optionally between ?start= and ?end=.
+    """
+
+    farm = request.user.currentFarm
+    if farm is None:
+        return JsonResponse({"error": "No farm selected"}, status=400)
+
+    records = Damage.objects.filter(assetID__farmID=farm.id, deleted=False)
+    return export_response(request, records, DAMAGE_EXPORT_COLUMNS, "damage", "damageObservedDate")
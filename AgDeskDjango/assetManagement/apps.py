@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AssetmanagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assetManagement'
+
+    def ready(self):
+        # Connect the asset profile versioning signal handlers
+        from . import profile
@@ -0,0 +1,151 @@
+"""
+Bulk CSV import of assets.
+Each row is validated with the category's create form from AssetStructures.assetCreationFormMapper,
+so an imported asset is held to the same rules as one added through the web form. Columns are the
+form's field names (dates as DD/MM/YYYY), plus an optional assetCategory column for files mixing
+categories.
+Valid rows are written in chunks. bulk_create refuses multi-table inherited models, so a chunk is
+written as two multi-row inserts: the asset rows, with the polymorphic content type that
+PolymorphicModel.save would set, then the category's own rows pointing at them.
+"""
+
+# Imports
+import codecs
+import csv
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from .models import asset
+
+
+# Constants
+IMPORT_CHUNK_SIZE = 200
+CATEGORY_COLUMN   = "assetCategory"
+
+
+# Parsing
+def parse_assets(stream):
+    """
+    Generator yielding one dict per CSV row from a binary stream, with headers and values stripped.
+    """
+
+    # utf-8-sig drops the byte order mark spreadsheet programs write at the start of a CSV
+    reader = csv.DictReader(codecs.iterdecode(stream, "utf-8-sig"))
+    try:
+        reader.fieldnames = [name.strip() for name in reader.fieldnames or []]
+        for row in reader:
+            yield {
+                key: value.strip() if isinstance(value, str) else value
+                for key, value in row.items()
+                if key is not None
+            }
+    except csv.Error as err:
+        raise ValueError(f"Malformed CSV: {err}")
+
+
+# Asset Importer
+class assetImporter():
+    """
+    Validates and creates assets on a single farm.
+    Costs two inserts per chunk and category, plus one content type lookup per category.
+    """
+
+    def __init__(self, farm, assetCategory=None, chunkSize=IMPORT_CHUNK_SIZE):
+        # Imported here as the views module imports this one
+        from .views import AssetStructures
+
+        self.farm          = farm
+        self.assetCategory = assetCategory
+        self.chunkSize     = chunkSize
+        self.formMapper    = AssetStructures.assetCreationFormMapper
+        self.modelMapper   = AssetStructures.assetModelMapper
+
+    def importAssets(self, rows):
+        """
+        Creates every valid row and returns a report:
+            {"accepted": int, "rejected": [{"row": int, "errors": [str, ...]}, ...]}
+        Rows are numbered from 1 in the order they were read, not counting the header.
+        """
+
+        accepted = 0
+        rejected = []
+        chunk    = []
+
+        # A file that turns out to be malformed part way through creates nothing
+        with transaction.atomic():
+            for row, data in enumerate(rows, start=1):
+                errors, record = self.validate(data)
+                if errors:
+                    rejected.append({"row": row, "errors": errors})
+                    continue
+
+                chunk.append(record)
+                if len(chunk) >= self.chunkSize:
+                    accepted += self.writeChunk(chunk)
+                    chunk     = []
+
+            if chunk:
+                accepted += self.writeChunk(chunk)
+
+        return {
+            "accepted": accepted,
+            "rejected": rejected
+        }
+
+    def validate(self, data):
+        """
+        Returns (errors, None) for an invalid row, or ([], unsaved asset) for a valid one.
+        """
+
+        assetCategory = data.pop(CATEGORY_COLUMN, None) or self.assetCategory
+        if assetCategory not in self.formMapper:
+            return [f"{CATEGORY_COLUMN}: must be one of {', '.join(self.formMapper)}"], None
+
+        form = self.formMapper[assetCategory](None, data)
+        if not form.is_valid():
+            return [
+                f"{field}: {message}" if field != "__all__" else message
+                for field, messages in form.errors.items()
+                for message in messages
+            ], None
+
+        record             = form.save(commit=False)
+        record.assetPrefix = assetCategory
+        record.farmID      = self.farm
+
+        return [], record
+
+    def writeChunk(self, chunk):
+        for assetCategory in {record.assetPrefix for record in chunk}:
+            self.insert(
+                self.modelMapper[assetCategory],
+                [record for record in chunk if record.assetPrefix == assetCategory]
+            )
+
+        return len(chunk)
+
+    def insert(self, model, records):
+        """
+        Function to insert unsaved assets of one category, setting their assetID.
+        """
+
+        contentType = ContentType.objects.get_for_model(model, for_concrete_model=False)
+        parentLink  = model._meta.get_ancestor_link(asset)
+        parentNames = [
+            field.attname
+            for field in asset._meta.concrete_fields
+            if field.attname not in ("assetID", "polymorphic_ctype_id")
+        ]
+
+        parents = asset.objects.bulk_create([
+            asset(polymorphic_ctype=contentType, **{name: getattr(record, name) for name in parentNames})
+            for record in records
+        ])
+
+        for record, parent in zip(records, parents):
+            record.assetID = parent.assetID
+            setattr(record, parentLink.attname, parent.assetID)
+
+        # raw=True inserts only the category's own table, as the parent rows already exist
+        model._base_manager._insert(records, fields=model._meta.local_concrete_fields, raw=True)
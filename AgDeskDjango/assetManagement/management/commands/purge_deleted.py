@@ -0,0 +1,90 @@
+"""
+Hard deletes soft deleted records once they have been deleted for long enough.
+    python manage.py purge_deleted [--days <days>] [--batch-size <rows>] [--dry-run]
+Tombstones are removed in batches, each in its own transaction, so a large purge never holds long
+locks. Children are purged before their parents, and a tombstone still referenced by a live record
+(e.g. damage repaired by live maintenance, or an asset with live logs) is kept, as deleting it would
+cascade to that record.
+"""
+
+# Imports
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from assetExpenses.models import Expense
+from assetMaintenance.models import Damage, Maintenance
+from assetManagement.models import asset
+from assetOperation.models import OperationLog, OperationLogMetric, PerformanceMetric
+from Emergency.models import ContactInfo, FarmContacts
+from Tasks.models import Kanban
+
+
+# Constants
+PURGE_AFTER_DAYS = 30
+PURGE_BATCH_SIZE = 500
+
+
+def live_children(*models):
+    # Soft deleting an asset does not soft delete its records, so live ones may still point at it
+    return [Exists(model.objects.alive().filter(assetID=OuterRef("pk"))) for model in models]
+
+
+def purge_order():
+    """
+    Function to get each soft deletable model, children first, with the references that keep its
+    tombstones.
+    """
+
+    return [
+        (Expense          , []),
+        (Maintenance      , [Exists(Expense.objects.filter(MaintenanceID=OuterRef("pk"), deleted=False))]),
+        (Damage           , [Exists(Maintenance.objects.filter(repairsCompleted=OuterRef("pk"), deleted=False))]),
+        (OperationLog     , []),
+        (PerformanceMetric, [Exists(OperationLogMetric.objects.filter(metricID=OuterRef("pk")))]),
+        (asset            , live_children(Expense, Maintenance, Damage, OperationLog, PerformanceMetric)),
+        (ContactInfo      , []),
+        (FarmContacts     , [Exists(ContactInfo.objects.alive().filter(farmContactID=OuterRef("pk")))]),
+        (Kanban           , [])
+    ]
+
+
+class Command(BaseCommand):
+    help = "Hard delete records that were soft deleted more than --days ago."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days"      , type=int, default=PURGE_AFTER_DAYS)
+        parser.add_argument("--batch-size", type=int, default=PURGE_BATCH_SIZE)
+        parser.add_argument("--dry-run"   , action="store_true", help="Count the tombstones without deleting them")
+
+    def handle(self, *args, **options):
+        if options["days"] < 0 or options["batch_size"] < 1:
+            raise CommandError("--days must be at least 0 and --batch-size at least 1")
+
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        for model, keep in purge_order():
+            tombstones = model.objects.dead().filter(deletedAt__lt=cutoff)
+            for reference in keep:
+                # One ~Exists per reference, as polymorphic querysets cannot filter on an OR of them
+                tombstones = tombstones.filter(~reference)
+
+            if options["dry_run"]:
+                self.stdout.write(f"{model.__name__}: {tombstones.count()} to purge")
+                continue
+
+            purged = 0
+            while True:
+                batch = list(tombstones.order_by("pk").values_list("pk", flat=True)[:options["batch_size"]])
+                if not batch:
+                    break
+
+                with transaction.atomic():
+                    model.objects.filter(pk__in=batch).delete()
+                purged += len(batch)
+
+            self.stdout.write(f"{model.__name__}: {purged} purged")
+
+        self.stdout.write(self.style.SUCCESS("Deleted records purged."))
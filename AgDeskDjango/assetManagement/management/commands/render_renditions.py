@@ -0,0 +1,35 @@
+"""
+Renders the missing renditions of stored images.
+    python manage.py render_renditions [--dry-run]
+Uploads are rendered as they are saved, so this is for images stored before renditions existed and
+for the field defaults, which are never uploaded. Pages fall back to the original image until then.
+"""
+
+# Imports
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from utils.renditions import RENDITION_SIZES, image_names, render_renditions, rendition_name
+
+
+class Command(BaseCommand):
+    help = "Render the missing renditions of stored images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="List the images without rendering them")
+
+    def handle(self, *args, **options):
+        rendered = 0
+        for name in image_names():
+            if not default_storage.exists(name):
+                continue
+            if all(default_storage.exists(rendition_name(name, size)) for size in RENDITION_SIZES):
+                continue
+
+            if options["dry_run"]:
+                self.stdout.write(f"{name}: to render")
+            else:
+                render_renditions(name)
+            rendered += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{rendered} images rendered."))
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:54
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def stamp_deleted(apps, schema_editor):
+    # Rows deleted before deletedAt existed are treated as deleted now, so purging waits its full age
+    for name in ("asset",):
+        apps.get_model("assetManagement", name).objects.filter(deleted=True).update(deletedAt=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('FarmAcc', '0001_initial'),
+        ('assetManagement', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asset',
+            name='deletedAt',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='asset',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['farmID', 'assetPrefix'], name='asset_alive_idx'),
+        ),
+        migrations.RunPython(stamp_deleted, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-19 16:14
+
+import utils.blobstore
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetManagement', '0002_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='asset',
+            name='assetImage',
+            field=models.ImageField(default='images/asset_images/defaultImage.jpg', storage=utils.blobstore.content_storage, upload_to='images/asset_images'),
+        ),
+    ]
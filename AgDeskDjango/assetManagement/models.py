@@ -2,9 +2,12 @@ from django.db import models
 from polymorphic.models import PolymorphicModel
 from FarmAcc.models import FarmInfo
 from UserAuth import *
+from utils import renditions, softdelete
+from utils.blobstore import ContentRecord, content_storage
+from utils.softdelete import SoftDeletePolymorphicManager, alive_index
 
 
-class asset(PolymorphicModel):
+class asset(PolymorphicModel, ContentRecord):
     assetPrefix      = models.CharField(max_length=2, null=False)
     assetID          = models.AutoField(primary_key=True)
     assetName        = models.CharField(max_length=100, null=False)
@@ -15,12 +18,22 @@ class asset(PolymorphicModel):
     dateManufactured = models.DateField(null=False)
     datePurchased    = models.DateField(null=False)
     deleted          = models.BooleanField(default=False)
+    deletedAt        = models.DateTimeField(null=True, blank=True)
     assetImage       = models.ImageField(upload_to="images/asset_images",
+                                         storage = content_storage,
                                          default = "images/asset_images/defaultImage.jpg",
                                          null=False, blank=False)
     # Refactoring required:
     #     asset should also contain age, manufacturer, location, and parts list
 
+    objects = SoftDeletePolymorphicManager()
+
+    class Meta(PolymorphicModel.Meta):
+        indexes = [
+            # Live assets of a farm by category
+            alive_index("farmID", "assetPrefix", name="asset_alive_idx")
+        ]
+
     def __str__(self):
         return f"{self.assetID}-{self.assetPrefix} - {self.assetName}"
 
@@ -69,3 +82,7 @@ class heavyVehicle(vehicle):
 
     inTransport = models.BooleanField()
     interFarmTransport = models.BooleanField()
+
+
+renditions.register(asset, "assetImage")
+softdelete.register(asset)
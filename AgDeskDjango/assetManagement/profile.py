@@ -0,0 +1,176 @@
+"""
+Asset profiles.
+A profile brings together what the asset pages otherwise load one page at a time: the asset itself,
+its recent operation logs, open damage, last maintenance, next service estimate and cost totals.
+Building one costs a fixed PROFILE_QUERIES queries, whatever the asset's history.
+Profiles are cached per asset version (see utils.versioning). The version is bumped by any write
+to the asset or to its logs, damage, maintenance, expenses or usage rollups, and is kept in the
+database, so no process serves a profile cached before a committed write. Reading the version costs
+one query. Service estimates are relative to today, so the date is part of the cache key as well.
+"""
+
+# Imports
+from django.core.cache import cache
+from django.db.models import F, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from assetExpenses.models import CostRollup, Expense, expenseChoices
+from assetMaintenance.models import Damage, Maintenance, damageSeverityChoice, maintenanceTypeChoices
+from assetMaintenance.scheduling import serviceScheduleManager
+from assetMaintenance.triage import open_damage
+from assetOperation.metrics import rollups_refreshed
+from assetOperation.models import OperationLog
+from utils.versioning import bump_version, current_version
+
+from .models import SmallEquipment, LargeEquipment, lightVehicle, heavyVehicle
+
+
+# Constants
+PROFILE_PREFIX  = "assetProfile"
+PROFILE_TTL     = 60 * 60 * 24
+PROFILE_QUERIES = 6
+RECENT_LOGS     = 10
+HIDDEN_FIELDS   = ("asset_ptr_id", "polymorphic_ctype_id")
+
+
+def profile_key(assetID, version, today):
+    return f"{PROFILE_PREFIX}:{assetID}:{version}:{today.isoformat()}"
+
+
+def profile_version(assetID):
+    return current_version(PROFILE_PREFIX, assetID)
+
+
+# Asset Profile Manager
+class assetProfileManager():
+    """
+    Builds and caches asset profiles.
+    """
+
+    def assetProfile(self, assetCategory, farmID, assetID):
+        """
+        Returns an asset's profile, or None unless it is a live asset of the category on the farm:
+            {"version": int, "asset": {...}, "recentLogs": [...], "openDamage": [...],
+             "lastMaintenance": {...} | None, "nextService": {...} | None,
+             "costs": {"total": Decimal, "byCategory": {label: Decimal}}}
+        """
+
+        # Imported here as the views module imports this one
+        from .views import AssetStructures
+
+        model = AssetStructures.assetModelMapper.get(assetCategory)
+        if model is None:
+            return None
+
+        today   = timezone.localdate()
+        version = profile_version(assetID)
+
+        profile = cache.get(profile_key(assetID, version, today))
+        if profile is None:
+            profile = self.buildProfile(model, assetID)
+            if profile is None:
+                return None
+            profile["version"] = version
+            cache.set(profile_key(assetID, version, today), profile, PROFILE_TTL)
+
+        # Cached profiles are shared, so whether this request may see it is checked on every read
+        if profile["asset"]["farmID"] != farmID or profile["asset"]["assetPrefix"] != assetCategory:
+            return None
+
+        return profile
+
+    def buildProfile(self, model, assetID):
+        assetValues = model.objects                                                        \
+            .filter(assetID=assetID, deleted=False)                                        \
+            .values()                                                                      \
+            .first()
+        if assetValues is None:
+            return None
+
+        farmID = assetValues.pop("farmID_id")
+        for field in HIDDEN_FIELDS:
+            assetValues.pop(field, None)
+
+        recentLogs = OperationLog.objects                                                  \
+            .filter(assetID=assetID, deleted=False)                                        \
+            .order_by("-startDateTime", "-logID")                                          \
+            .values(
+                "logID", "startDateTime", "endDateTime", "location", "notes",
+                user = F("userID__username")
+            )[:RECENT_LOGS]
+
+        openDamage = open_damage()                                                         \
+            .filter(assetID=assetID)                                                       \
+            .order_by("-damageSeverity", "damageObservedDate", "damageID")                 \
+            .values(
+                "damageID", "damageType", "damageSeverity", "damageObservedDate",
+                "scheduledMaintenanceDate", "notes"
+            )
+
+        lastMaintenance = Maintenance.objects                                              \
+            .filter(assetID=assetID, deleted=False)                                        \
+            .order_by("-completionDate", "-maintenanceID")                                 \
+            .values(
+                "maintenanceID", "completionDate", "maintenanceType", "maintenanceTasksCompleted",
+                "Cost", "dateOfNextService", "kmsBeforeNextService",
+                conductedBy = F("maintenanceConductedBy__username")
+            )                                                                              \
+            .first()
+        if lastMaintenance is not None:
+            lastMaintenance["maintenanceTypeLabel"] = maintenanceTypeChoices[lastMaintenance["maintenanceType"]]
+
+        costs = CostRollup.objects                                                         \
+            .filter(assetID=assetID)                                                       \
+            .values("category")                                                            \
+            .annotate(total=Sum("total"))                                                  \
+            .order_by("category")
+        byCategory = {expenseChoices[row["category"]]: row["total"] for row in costs}
+
+        nextService = serviceScheduleManager().computeSchedule(assetID=assetID).get(assetID)
+
+        return {
+            "asset"          : {**assetValues, "farmID": farmID},
+            "recentLogs"     : list(recentLogs)                 ,
+            "openDamage"     : [
+                {**damage, "severityLabel": damageSeverityChoice[damage["damageSeverity"]]}
+                for damage in openDamage
+            ],
+            "lastMaintenance": lastMaintenance                  ,
+            "nextService"    : nextService                      ,
+            "costs"          : {
+                "total"     : sum(byCategory.values()),
+                "byCategory": byCategory
+            }
+        }
+
+
+# Versioning
+@receiver(post_save  , sender=OperationLog)
+@receiver(post_delete, sender=OperationLog)
+@receiver(post_save  , sender=Damage)
+@receiver(post_delete, sender=Damage)
+@receiver(post_save  , sender=Maintenance)
+@receiver(post_delete, sender=Maintenance)
+@receiver(post_save  , sender=Expense)
+@receiver(post_delete, sender=Expense)
+def bump_record_version(sender, instance, **kwargs):
+    bump_version(PROFILE_PREFIX, instance.assetID_id)
+
+
+@receiver(post_save  , sender=SmallEquipment)
+@receiver(post_save  , sender=LargeEquipment)
+@receiver(post_save  , sender=lightVehicle)
+@receiver(post_save  , sender=heavyVehicle)
+@receiver(post_delete, sender=SmallEquipment)
+@receiver(post_delete, sender=LargeEquipment)
+@receiver(post_delete, sender=lightVehicle)
+@receiver(post_delete, sender=heavyVehicle)
+def bump_asset_version(sender, instance, **kwargs):
+    bump_version(PROFILE_PREFIX, instance.assetID)
+
+
+@receiver(rollups_refreshed)
+def bump_usage_version(sender, assetID, **kwargs):
+    bump_version(PROFILE_PREFIX, assetID)
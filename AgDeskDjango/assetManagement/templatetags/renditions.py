@@ -0,0 +1,23 @@
+"""
+Template filters for serving image renditions, falling back to the original until it is rendered
+    {% load renditions %}
+    <img src="{{ asset.assetImage|rendition:'thumb' }}" onerror="this.onerror=null; this.src='{{ asset.assetImage|original }}'">
+"""
+
+# Imports
+from django import template
+
+from utils.renditions import original_url, rendition_url
+
+
+register = template.Library()
+
+
+@register.filter
+def rendition(image, size="thumb"):
+    return rendition_url(image, size)
+
+
+@register.filter
+def original(image):
+    return original_url(image)
@@ -103,3 +103,366 @@
 #     while (i := i + 1) < len(amallAssetGroup):
 # Though, I'm not sure if you'll be yelled at by your fellows for using this.
 # Also, you need to make sure that you start with i = -1, since it's ++i rather than i++.
+
+
+# Imports
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest.mock import patch
+import tempfile
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from PIL import Image
+
+from utils.renditions import render_renditions, rendition_name, rendition_url
+from utils.testing_data import FARM_SUPERSET
+from utils.testing_data import generate_dataset_from_model
+
+from assetExpenses.models      import Expense
+from assetMaintenance.models   import Damage, Maintenance
+from assetManagement.importing import assetImporter, parse_assets
+from assetManagement.models    import asset, heavyVehicle, SmallEquipment
+from assetManagement.profile   import assetProfileManager, PROFILE_QUERIES
+from assetManagement.views     import AssetManager
+from assetOperation.models     import OperationLog
+from FarmAcc.models            import FarmInfo
+from UserAuth.models           import UserProfile
+
+
+# Base
+class BaseTestCase(TestCase):
+    def setUp(self):
+        # Create a user and a farm for testing
+        VALID_FARMS = {
+            "farm_name"    : FARM_SUPERSET["farm_name"    ][0],
+            "farm_street"  : FARM_SUPERSET["farm_street"  ][0],
+            "farm_state"   : FARM_SUPERSET["farm_state"   ][0],
+            "farm_postcode": FARM_SUPERSET["farm_postcode"][0],
+            "farm_bio"     : FARM_SUPERSET["farm_bio"     ][0],
+            "farm_image"   : FARM_SUPERSET["farm_image"   ][0]
+        }
+
+        farmList = [
+            FarmInfo(**farm_data)
+            for farm_data
+            in generate_dataset_from_model(VALID_FARMS)
+        ]
+        self.farm = FarmInfo.objects.bulk_create(farmList)
+
+        self.user = UserProfile.objects.create_user(
+            username    = "testuser"          ,
+            email       = "testuser@test.test",
+            password    = "12345"             ,
+            currentFarm = self.farm[0]
+        )
+
+
+# Bulk Import
+IMPORT_CSV = (
+    "﻿assetCategory,assetName,Manufacturer,dateManufactured,datePurchased,Location,partsList,serialNumber,vin,Registration,inTransport,interFarmTransport\n"
+    "SE,Drill,Makita,01/02/2020,01/03/2020,Shed,Bits,SN1,,,,\n"
+    "HV,Tractor,Deere,01/02/2019,01/03/2019,Paddock,Tyres,,ABCDEFGHIJK123456,XYZ123,true,\n"
+    "SE,Pump,Honda,2020-02-01,01/03/2020,Shed,Seals,SN2,,,,\n"
+    "XX,Thing,Acme,01/02/2020,01/03/2020,Shed,None,SN3,,,,\n"
+    "SE,Saw,Stihl,01/02/2020,01/03/2020,Shed,Chain,SN4,,,,\n"
+)
+
+
+class assetImporterTest(BaseTestCase):
+    def upload(self, content=IMPORT_CSV):
+        return SimpleUploadedFile("assets.csv", content.encode(), content_type="text/csv")
+
+    def test_valid_rows_are_created_and_invalid_rows_reported(self):
+        ContentType.objects.clear_cache()
+        with self.assertNumQueries(10): # Savepoints, two content types, two inserts per chunk and category
+            report = assetImporter(self.farm[0], chunkSize=2).importAssets(parse_assets(self.upload()))
+
+        self.assertEqual(report["accepted"], 3)
+        self.assertEqual([rejected["row"] for rejected in report["rejected"]], [3, 4])
+        self.assertIn("dateManufactured: Enter a valid date in the format DD/MM/YYYY", report["rejected"][0]["errors"])
+
+        drill = asset.objects.get(assetName="Drill")
+        self.assertIsInstance(drill, SmallEquipment)
+        self.assertEqual((drill.assetPrefix, drill.serialNumber, drill.farmID), ("SE", "SN1", self.farm[0]))
+        self.assertEqual(drill.assetImage.name, "images/asset_images/defaultImage.jpg")
+
+        tractor = heavyVehicle.objects.get()
+        self.assertEqual((tractor.assetName, tractor.inTransport, tractor.interFarmTransport), ("Tractor", True, False))
+
+    def test_import_endpoint(self):
+        self.client.force_login(self.user)
+
+        content  = "assetName,Manufacturer,dateManufactured,datePurchased,Location,partsList,serialNumber\n" \
+                   "Drill,Makita,01/02/2020,01/03/2020,Shed,Bits,SN1\n"
+        response = self.client.post(reverse("importAssets"), {"file": self.upload(content), "assetCategory": "SE"})
+        self.assertEqual(response.json(), {"accepted": 1, "rejected": []})
+        self.assertEqual(SmallEquipment.objects.filter(farmID=self.farm[0]).count(), 1)
+
+        response = self.client.post(reverse("importAssets"))
+        self.assertEqual(response.status_code, 400)
+
+
+# Asset Profile
+class assetProfileManagerTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.manager = assetProfileManager()
+        self.asset   = SmallEquipment.objects.create(
+            assetPrefix      = "SE"               ,
+            assetName        = "Generator"        ,
+            farmID           = self.farm[0]       ,
+            Manufacturer     = "Honda"            ,
+            partsList        = "Spark Plug"       ,
+            Location         = "Barn"             ,
+            dateManufactured = date(2020, 1, 1)   ,
+            datePurchased    = date(2020, 1, 1)   ,
+            serialNumber     = "123456789"
+        )
+
+    def history(self, records):
+        for day in range(1, records + 1):
+            OperationLog.objects.create(assetID=self.asset, userID=self.user, startDateTime=timezone.now(), location="Paddock")
+            Damage.objects.create(assetID=self.asset, damageObservedDate=date(2024, 1, day), damageType="Dent", damageSeverity=1)
+            service = Maintenance.objects.create(
+                assetID                   = self.asset          ,
+                completionDate            = date(2024, 1, day)  ,
+                maintenanceConductedBy    = self.user           ,
+                maintenanceLocation       = "Shed"              ,
+                maintenanceTasksCompleted = "Oil change"        ,
+                Cost                      = 100                 ,
+                Notes                     = ""                  ,
+                dateOfNextService         = date(2024, 6, day)
+            )
+            Expense.objects.create(
+                assetID         = self.asset  ,
+                expenseType     = 0           ,
+                cost            = 20          ,
+                receiptNumber   = day         ,
+                expenseLodgedBy = self.user   ,
+                expenseDate     = date(2024, 1, day)
+            )
+
+    def profile(self):
+        return self.manager.assetProfile("SE", self.farm[0].id, self.asset.assetID)
+
+    def test_query_count_does_not_grow_with_history(self):
+        self.history(3)
+        with self.assertNumQueries(PROFILE_QUERIES + 1): # And the version
+            profile = self.profile()
+
+        self.assertEqual(profile["asset"]["serialNumber"], "123456789")
+        self.assertEqual(len(profile["recentLogs"]), 3)
+        self.assertEqual(len(profile["openDamage"]), 3)
+        self.assertEqual(profile["lastMaintenance"]["completionDate"], date(2024, 1, 3))
+        self.assertEqual(profile["nextService"]["dueDate"], date(2024, 6, 3))
+        self.assertEqual(profile["costs"]["byCategory"], {"Fuel": 60, "Maintenance": 300})
+        self.assertEqual(profile["costs"]["total"], 360)
+
+        cache.clear()
+        self.history(5)
+        with self.assertNumQueries(PROFILE_QUERIES + 1):
+            self.profile()
+
+    def test_cached_until_the_asset_changes(self):
+        version = self.profile()["version"]
+        with self.assertNumQueries(1): # The version
+            self.assertEqual(self.profile()["version"], version)
+
+        OperationLog.objects.create(assetID=self.asset, userID=self.user, startDateTime=timezone.now(), location="Paddock")
+        self.assertNotEqual(self.profile()["version"], version)
+        self.assertEqual(len(self.profile()["recentLogs"]), 1)
+
+        self.assertIsNone(self.manager.assetProfile("SE", self.farm[1].id, self.asset.assetID))
+
+    def test_profile_endpoint_revalidates_with_etag(self):
+        self.client.force_login(self.user)
+        url = reverse("assetProfile", kwargs={"assetCategory": "SE", "assetID": self.asset.assetID})
+
+        response = self.client.get(url)
+        self.assertEqual(response.json()["asset"]["assetName"], "Generator")
+
+        notModified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(notModified.status_code, 304)
+
+        wrongCategory = reverse("assetProfile", kwargs={"assetCategory": "HV", "assetID": self.asset.assetID})
+        self.assertEqual(self.client.get(wrongCategory).status_code, 404)
+
+
+# Soft Deletion
+class softDeleteTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.assets = [
+            SmallEquipment.objects.create(
+                assetPrefix      = "SE"            ,
+                assetName        = name            ,
+                farmID           = self.farm[0]    ,
+                Manufacturer     = "Honda"         ,
+                partsList        = "Spark Plug"    ,
+                Location         = "Barn"          ,
+                dateManufactured = date(2020, 1, 1),
+                datePurchased    = date(2020, 1, 1),
+                serialNumber     = name
+            )
+            for name in ("Generator", "Pump")
+        ]
+
+    def damage(self, deleted):
+        return Damage.objects.create(
+            assetID            = self.assets[0]  ,
+            damageObservedDate = date(2024, 1, 1),
+            damageType         = "Dent"          ,
+            damageSeverity     = 1               ,
+            deleted            = deleted
+        )
+
+    def age(self, model, days):
+        model.objects.dead().update(deletedAt=timezone.now() - timedelta(days=days))
+
+    def test_deleted_at_follows_deleted(self):
+        generator         = self.assets[0]
+        generator.deleted = True
+        generator.save()
+        self.assertIsNotNone(generator.deletedAt)
+
+        generator.deleted = False
+        generator.save()
+        self.assertIsNone(generator.deletedAt)
+
+        self.assertEqual(SmallEquipment.objects.filter(assetName="Pump").soft_delete(), 1)
+        self.assertEqual(list(asset.objects.dead().values_list("assetName", flat=True)), ["Pump"])
+        self.assertEqual([found["assetName"] for found in AssetManager().retrieveAssets("all", self.user)], ["Generator"])
+
+    def test_purge_removes_old_tombstones_in_batches(self):
+        for deleted in (True, True, True, False):
+            self.damage(deleted)
+        self.age(Damage, 40)
+        self.damage(True) # Too recent to purge
+
+        call_command("purge_deleted", "--batch-size", "2", stdout=StringIO())
+        self.assertEqual(Damage.objects.dead().count(), 1)
+        self.assertEqual(Damage.objects.alive().count(), 1)
+
+    def test_purge_keeps_tombstones_referenced_by_live_records(self):
+        repaired = self.damage(True)
+        Maintenance.objects.create(
+            assetID                   = self.assets[0]  ,
+            completionDate            = date(2024, 1, 2),
+            maintenanceConductedBy    = self.user       ,
+            maintenanceLocation       = "Shed"          ,
+            maintenanceTasksCompleted = "Panel beating" ,
+            maintenanceType           = 1               ,
+            repairsCompleted          = repaired        ,
+            Cost                      = 100             ,
+            Notes                     = ""              ,
+            dateOfNextService         = date(2024, 6, 1)
+        )
+        self.assets[1].deleted = True
+        self.assets[1].save()
+        self.age(Damage, 40)
+        self.age(asset, 40)
+
+        # A deleted asset whose damage was never deleted
+        withDamage = SmallEquipment.objects.create(
+            assetPrefix      = "SE"            ,
+            assetName        = "Trailer"       ,
+            farmID           = self.farm[0]    ,
+            Manufacturer     = "Honda"         ,
+            partsList        = "Hitch"         ,
+            Location         = "Barn"          ,
+            dateManufactured = date(2020, 1, 1),
+            datePurchased    = date(2020, 1, 1),
+            serialNumber     = "Trailer"
+        )
+        liveDamage = Damage.objects.create(
+            assetID            = withDamage      ,
+            damageObservedDate = date(2024, 1, 1),
+            damageType         = "Flat tyre"     ,
+            damageSeverity     = 1
+        )
+        asset.objects.filter(pk=withDamage.pk).soft_delete()
+        self.age(asset, 40)
+
+        output = StringIO()
+        call_command("purge_deleted", "--dry-run", stdout=output)
+        self.assertIn("asset: 1 to purge", output.getvalue())
+        self.assertEqual(asset.objects.count(), 3)
+
+        call_command("purge_deleted", stdout=StringIO())
+        self.assertTrue(Damage.objects.filter(pk=repaired.pk).exists())
+        self.assertTrue(Damage.objects.filter(pk=liveDamage.pk).exists())
+        self.assertEqual(list(asset.objects.order_by("assetName").values_list("assetName", flat=True)), ["Generator", "Trailer"])
+
+
+# Renditions
+class renditionsTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        mediaRoot = tempfile.TemporaryDirectory()
+        self.addCleanup(mediaRoot.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=mediaRoot.name))
+
+    def store_image(self, name, size=(800, 400)):
+        buffer = BytesIO()
+        Image.new("RGB", size, "green").save(buffer, "PNG")
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def test_renditions_are_named_after_the_original(self):
+        self.assertEqual(rendition_name("images/asset_images/tractor.jpg", "thumb"), "images/asset_images/tractor.thumb.webp")
+        self.assertEqual(rendition_name("images/asset_images/tractor.jpg", "medium"), "images/asset_images/tractor.medium.webp")
+
+    def test_rendering_crops_thumbs_and_fits_medium(self):
+        name = self.store_image("images/asset_images/tractor.png")
+        render_renditions(name)
+
+        with default_storage.open(rendition_name(name, "thumb")) as thumb:
+            self.assertEqual(Image.open(thumb).size, (160, 160))
+        with default_storage.open(rendition_name(name, "medium")) as medium:
+            image = Image.open(medium)
+            self.assertEqual((image.format, image.size), ("WEBP", (640, 320)))
+
+    def test_urls_do_not_touch_storage(self):
+        with patch.object(default_storage, "exists") as exists:
+            self.assertEqual(rendition_url("images/asset_images/tractor.png"), "/media/images/asset_images/tractor.thumb.webp")
+            self.assertEqual(rendition_url(""), "")
+        exists.assert_not_called()
+
+    def test_pages_fall_back_to_the_original(self):
+        template = Template(
+            "{% load renditions %}"
+            "<img src=\"{{ image|rendition:'thumb' }}\" onerror=\"this.src='{{ image|original }}'\">"
+        )
+        html = template.render(Context({"image": "images/asset_images/tractor.png"}))
+
+        self.assertEqual(html, "<img src=\"/media/images/asset_images/tractor.thumb.webp\" onerror=\"this.src='/media/images/asset_images/tractor.png'\">")
+
+    def test_command_renders_missing_renditions(self):
+        name = self.store_image("images/asset_images/tractor.png")
+        SmallEquipment.objects.create(
+            assetPrefix      = "SE"            ,
+            assetName        = "Tractor"       ,
+            farmID           = self.farm[0]    ,
+            Manufacturer     = "Deere"         ,
+            partsList        = "Tyres"         ,
+            Location         = "Shed"          ,
+            dateManufactured = date(2020, 1, 1),
+            datePurchased    = date(2020, 1, 1),
+            serialNumber     = "Tractor"       ,
+            assetImage       = name
+        )
+
+        call_command("render_renditions", stdout=StringIO())
+
+        self.assertTrue(default_storage.exists(rendition_name(name, "thumb")))
+        self.assertTrue(default_storage.exists(rendition_name(name, "medium")))
@@ -7,14 +7,20 @@ import datetime
 
 from django.contrib import messages
 from django.forms.models import model_to_dict
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponseNotModified, JsonResponse
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
+from django.utils import timezone
+from django.views.decorators.http import require_POST
 
 from itertools import chain
 
 from .models import SmallEquipment      , LargeEquipment      , lightVehicle          , heavyVehicle
 from .forms  import createSmallAssetForm, createLargeAssetForm, createLightVehicleForm, createHeavyVehicleForm
 from .forms  import editSmallAssetForm  , editLargeAssetForm  , editLightVehicleForm  , editHeavyVehicleForm
+from .importing import assetImporter, parse_assets
+from .profile   import assetProfileManager
 
 from assetOperation.models import OperationLog
 from assetOperation.forms import checkOutForm
@@ -99,15 +105,15 @@ class AssetManager():
         queryCategory   = None
         for key, value in assetStructures.assetModelMapper.items():
             if key == assetCategory:
-                queryCategory = value.objects.filter(farmID=currentFarmID, deleted=0).values()
+                queryCategory = value.objects.alive().filter(farmID=currentFarmID).values()
 
         if assetCategory == "all":
             #Query for all assets
             allAssetsQuerySet = chain(
-                SmallEquipment.objects.filter(farmID = currentFarmID).values(),
-                LargeEquipment.objects.filter(farmID = currentFarmID).values(),
-                lightVehicle  .objects.filter(farmID = currentFarmID).values(),
-                heavyVehicle  .objects.filter(farmID = currentFarmID).values()
+                SmallEquipment.objects.alive().filter(farmID = currentFarmID).values(),
+                LargeEquipment.objects.alive().filter(farmID = currentFarmID).values(),
+                lightVehicle  .objects.alive().filter(farmID = currentFarmID).values(),
+                heavyVehicle  .objects.alive().filter(farmID = currentFarmID).values()
             )
 
             return allAssetsQuerySet
@@ -395,7 +401,7 @@ def displayAssets(request, assetCategory):
 
     assetManager    = AssetManager()
     assetStructures = AssetStructures()
-    currentUser     = UserProfile.objects.get(id=request.user.id)
+    currentUser     = request.user
 
     ### Get Request ###
     if request.method == "GET":
@@ -408,11 +414,11 @@ def displayAssets(request, assetCategory):
                     assetManager.calculateAssetAge(assetCategory, asset["assetID"])
 
             # True if being used, False if NOT being used
-            lastLog = OperationLog.objects.filter(
+            lastLog = OperationLog.objects.alive().filter(
                 assetID             = asset["assetID"],
                 endDateTime__isnull = True
             )
-            asset["opStatus"] = len(lastLog) > 0
+            asset["opStatus"] = lastLog.exists()
 
         checkoutForm = checkOutForm()
 
@@ -465,13 +471,71 @@ def displayAssets(request, assetCategory):
 @login_required(login_url="login")
 def createAsset(request):
     assetManager = AssetManager()
-    currentUser  = UserProfile.objects.get(id=request.user.id)
+    currentUser  = request.user
+
+# Bulk import
+@require_POST
+@login_required(login_url="login")
+def importAssets(request):
+    """
+    Endpoint for creating many assets on the current farm from an uploaded CSV "file".
+    Each row is checked with the category's create form. The category is taken from an
+    assetCategory column, or from the assetCategory field of the request for the whole file.
+    Responds with the number of created assets and the rows that were rejected, and why.
+    """
+
+    farm = request.user.currentFarm
+    if farm is None:
+        return JsonResponse({"error": "No farm selected"}, status=400)
+
+    if "file" not in request.FILES:
+        return JsonResponse({"error": "Upload a CSV file as \"file\""}, status=400)
+
+    assetImporterInstance = assetImporter(farm, request.POST.get("assetCategory"))
+    try:
+        report = assetImporterInstance.importAssets(parse_assets(request.FILES["file"]))
+    except (ValueError, UnicodeDecodeError) as err:
+        return JsonResponse({"error": str(err)}, status=400)
+
+    return JsonResponse(report)
+
+@login_required(login_url="login")
+def assetProfile(request, assetCategory, assetID):
+    """
+    JSON endpoint returning an asset with its recent logs, open damage, last maintenance, next
+    service estimate and cost totals in one response (see assetManagement.profile).
+    The response carries the profile version as its ETag, so clients can revalidate with
+    If-None-Match and get a 304 while nothing about the asset has changed.
+    """
+
+    assetProfileManagerInstance = assetProfileManager()
+    farm = request.user.currentFarm
+    if farm is None:
+        return JsonResponse({"error": "No farm selected"}, status=400)
+
+    if assetCategory not in AssetStructures.assetModelMapper:
+        return JsonResponse({"error": f"Invalid asset category: {assetCategory}"}, status=400)
+
+    profile = assetProfileManagerInstance.assetProfile(assetCategory, farm.id, assetID)
+    if profile is None:
+        return JsonResponse({"error": "Asset not found"}, status=404)
+
+    etag = f'"{assetID}-{profile["version"]}-{timezone.localdate():%Y%m%d}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse(profile, encoder=DjangoJSONEncoder)
+
+    response["ETag"         ] = etag
+    response["Cache-Control"] = "private, no-cache"
+
+    return response
 
 @login_required(login_url="login")
 def viewAsset(request, assetCategory, assetID):
     assetManager    = AssetManager()
     assetStructures = AssetStructures()
-    currentUser     = UserProfile.objects.get(id=request.user.id)
+    currentUser     = request.user
     asset = assetManager.retrieveAssetByID(assetCategory, currentUser, assetID)
     # Get the form for the asset type & set the initial values of the form to the asset values.
     form = assetStructures.assetEditFormMapper.get(assetCategory)(initial=asset)
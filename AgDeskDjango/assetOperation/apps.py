@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AssetoperationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assetOperation'
+
+    def ready(self):
+        # Connect the cache invalidation signal handlers
+        from . import metrics, utilization
@@ -0,0 +1,204 @@
+"""
+Bulk ingestion of performance metric readings (telemetry) for an asset.
+Readings are parsed as a stream from CSV, JSON Lines or a JSON array, validated against the asset's
+PerformanceMetric definitions and operation logs, and written with bulk_create in chunks.
+Each reading is a row of:
+    logID : the operation log the reading belongs to (must be a log of this asset)
+    metric: the PerformanceMetric name or metricID
+    value : a decimal value
+"""
+
+# Imports
+import codecs
+import csv
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .metrics import metricRollupManager
+from .models import OperationLog, OperationLogMetric, PerformanceMetric
+
+
+# Constants
+INGEST_CHUNK_SIZE = 500
+INGEST_FORMATS    = ("csv", "jsonl", "json")
+VALUE_MAX_DIGITS  = 14 # Mirrors OperationLogMetric.value
+VALUE_DECIMALS    = 4
+
+
+# Parsing
+def parse_readings(stream, fileFormat):
+    """
+    Generator yielding one dict per reading from a binary stream (an uploaded file or the request
+    itself). CSV and JSON Lines are decoded line by line, so they are never held in memory whole.
+    """
+
+    # utf-8-sig drops the byte order mark spreadsheet programs write at the start of a file
+    if fileFormat == "csv":
+        try:
+            yield from csv.DictReader(codecs.iterdecode(stream, "utf-8-sig"))
+        except csv.Error as err:
+            raise ValueError(f"Malformed CSV: {err}")
+
+    elif fileFormat == "jsonl":
+        for line in codecs.iterdecode(stream, "utf-8-sig"):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield {"__error__": "Line is not valid JSON"}
+
+    elif fileFormat == "json":
+        readings = json.load(stream)
+        if not isinstance(readings, list):
+            raise ValueError("JSON uploads must be an array of readings")
+        yield from readings
+
+    else:
+        raise ValueError(f"Invalid format: {fileFormat}")
+
+
+def format_from_content_type(contentType):
+    """
+    Function to map a request content type onto one of INGEST_FORMATS.
+    """
+
+    contentType = (contentType or "").split(";")[0].strip()
+
+    return {
+        "text/csv"            : "csv"  ,
+        "application/x-ndjson": "jsonl",
+        "application/jsonl"   : "jsonl",
+        "application/json"    : "json"
+    }.get(contentType)
+
+
+# Telemetry Ingestor
+class telemetryIngestor():
+    """
+    Validates and stores readings for a single asset.
+    Costs one query for the metric definitions, and one lookup plus one insert per chunk.
+    """
+
+    def __init__(self, assetID, chunkSize=INGEST_CHUNK_SIZE):
+        self.assetID   = assetID
+        self.chunkSize = chunkSize
+
+        metrics = PerformanceMetric.objects              \
+            .filter(assetID=assetID, deleted=False)      \
+            .values_list("metricID", "name")
+        self.metricsByName = {name.lower(): metricID for metricID, name in metrics}
+        self.metricIDs     = set(self.metricsByName.values())
+
+        # logID -> startDateTime if the log is closed, None if open
+        self.logs = {}
+
+    def ingest(self, readings):
+        """
+        Stores every valid reading and returns a report:
+            {"accepted": int, "rejected": [{"row": int, "errors": [str, ...]}, ...]}
+        Rows are numbered from 1 in the order they were read.
+        """
+
+        accepted = 0
+        rejected = []
+        chunk    = []
+
+        with transaction.atomic():
+            for row, reading in enumerate(readings, start=1):
+                chunk.append((row, reading))
+                if len(chunk) >= self.chunkSize:
+                    accepted += self.writeChunk(chunk, rejected)
+                    chunk     = []
+
+            if chunk:
+                accepted += self.writeChunk(chunk, rejected)
+
+            # bulk_create skips signals, so closed logs' rollups are refreshed here
+            closedStarts = [start for start in self.logs.values() if start is not None]
+            if accepted and closedStarts:
+                metricRollupManager().refreshBuckets(self.assetID, closedStarts)
+
+        return {
+            "accepted": accepted,
+            "rejected": rejected
+        }
+
+    def writeChunk(self, chunk, rejected):
+        self.loadLogs(reading.get("logID") for _, reading in chunk if isinstance(reading, dict))
+
+        newReadings = []
+        for row, reading in chunk:
+            errors, logMetric = self.validate(reading)
+            if errors:
+                rejected.append({"row": row, "errors": errors})
+            else:
+                newReadings.append(logMetric)
+
+        OperationLogMetric.objects.bulk_create(newReadings)
+        return len(newReadings)
+
+    def loadLogs(self, logIDs):
+        """
+        Fetches the asset's logs referenced by a chunk that have not been seen yet.
+        """
+
+        unseen = set()
+        for logID in logIDs:
+            try:
+                logID = int(logID)
+            except (TypeError, ValueError):
+                continue
+            if logID not in self.logs:
+                unseen.add(logID)
+
+        if not unseen:
+            return
+
+        logs = OperationLog.objects                                         \
+            .filter(logID__in=unseen, assetID=self.assetID, deleted=False)  \
+            .values_list("logID", "startDateTime", "endDateTime")
+        for logID, startDateTime, endDateTime in logs:
+            self.logs[logID] = startDateTime if endDateTime is not None else None
+
+    def validate(self, reading):
+        """
+        Returns (errors, unsaved OperationLogMetric) for a single reading.
+        """
+
+        if not isinstance(reading, dict):
+            return ["Reading must be an object with logID, metric and value"], None
+        if "__error__" in reading:
+            return [reading["__error__"]], None
+
+        errors = []
+
+        try:
+            logID = int(reading.get("logID"))
+            if logID not in self.logs:
+                errors.append(f"Log {logID} does not exist for this asset")
+        except (TypeError, ValueError):
+            errors.append("logID must be a whole number")
+
+        metric   = str(reading.get("metric", "")).strip()
+        metricID = self.metricsByName.get(metric.lower())
+        if metricID is None and metric.isdigit() and int(metric) in self.metricIDs:
+            metricID = int(metric)
+        if metricID is None:
+            errors.append(f"Unknown metric '{metric}' for this asset")
+
+        try:
+            value = Decimal(str(reading.get("value", "")).strip())
+            if not value.is_finite():
+                raise InvalidOperation
+            value = value.quantize(Decimal(1).scaleb(-VALUE_DECIMALS))
+            if abs(value) >= Decimal(10) ** (VALUE_MAX_DIGITS - VALUE_DECIMALS):
+                errors.append(f"Value must be smaller than 10^{VALUE_MAX_DIGITS - VALUE_DECIMALS}")
+        except InvalidOperation:
+            errors.append("Value must be a number")
+
+        if errors:
+            return errors, None
+
+        return [], OperationLogMetric(logID_id=logID, metricID_id=metricID, value=value)
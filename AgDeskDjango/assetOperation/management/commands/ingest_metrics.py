@@ -0,0 +1,44 @@
+"""
+Bulk loads performance metric readings for an asset from a CSV, JSON Lines or JSON file.
+    python manage.py ingest_metrics <assetID> <path> [--format csv|jsonl|json]
+"""
+
+# Imports
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assetManagement.models import asset
+from assetOperation.ingestion import telemetryIngestor, parse_readings, INGEST_FORMATS, INGEST_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Bulk load performance metric readings (logID, metric, value) for an asset."
+
+    def add_arguments(self, parser):
+        parser.add_argument("assetID", type=int)
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=INGEST_FORMATS, help="Defaults to the file extension")
+        parser.add_argument("--chunk-size", type=int, default=INGEST_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        if not asset.objects.filter(assetID=options["assetID"], deleted=False).exists():
+            raise CommandError(f"Asset {options['assetID']} does not exist")
+
+        fileFormat = options["format"] or os.path.splitext(options["path"])[1].lstrip(".").lower()
+        if fileFormat not in INGEST_FORMATS:
+            raise CommandError(f"Cannot tell the format of {options['path']}, pass --format")
+
+        ingestor = telemetryIngestor(options["assetID"], options["chunk_size"])
+        try:
+            with open(options["path"], "rb") as stream:
+                report = ingestor.ingest(parse_readings(stream, fileFormat))
+        except (OSError, ValueError, UnicodeDecodeError) as err:
+            raise CommandError(str(err))
+
+        for reject in report["rejected"]:
+            self.stderr.write(f"Row {reject['row']}: {'; '.join(reject['errors'])}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored {report['accepted']} readings, rejected {len(report['rejected'])}."
+        ))
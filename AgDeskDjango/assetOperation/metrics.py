@@ -0,0 +1,210 @@
+"""
+Daily and weekly rollups of performance metric readings.
+OperationLogMetric holds one row per (log, metric). MetricRollup keeps min/max/sum/count per asset,
+metric and period so charts read a handful of rollup rows instead of every reading. Rollups are
+refreshed for the touched buckets only, whenever a log closes or a reading on a closed log changes.
+Buckets are days and weeks in settings.TIME_ZONE, whoever's request saved the log, so the stored
+rows never depend on a viewer's time zone.
+Refreshes requested by signals are collected and run once the transaction commits, so saving or
+deleting several readings of a log refreshes each of its buckets once.
+"""
+
+# Imports
+import threading
+import zoneinfo
+
+import numpy as np
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from utils.softdelete import soft_deleted
+
+from .models import OperationLog, OperationLogMetric, MetricRollup, ROLLUP_PERIODS
+from .utilization import bucket_start, next_bucket, local_midnight
+
+
+# Constants
+ROLLUP_TIMEZONE = zoneinfo.ZoneInfo(settings.TIME_ZONE)
+
+
+# Sent with assetID once an asset's rollups have been recomputed, for anything derived from them
+rollups_refreshed = Signal()
+
+# assetID -> log start datetimes waiting for the current transaction to commit, per thread
+pending_refreshes = threading.local()
+
+
+# Rollup Manager
+class metricRollupManager():
+    """
+    Maintains and queries MetricRollup rows.
+    A reading counts towards the buckets its log started in, and only closed logs are rolled up.
+    """
+
+    def refreshBuckets(self, assetID, days):
+        """
+        Recomputes every metric's rollup for the day and week buckets containing each of days.
+        Costs one aggregate query, one upsert and one delete per touched bucket.
+        """
+
+        with timezone.override(ROLLUP_TIMEZONE):
+            for period in ROLLUP_PERIODS:
+                buckets = sorted({bucket_start(day, period) for day in days})
+                for bucket in buckets:
+                    self.refreshBucket(assetID, period, bucket)
+
+        rollups_refreshed.send(sender=MetricRollup, assetID=assetID)
+
+    def scheduleRefresh(self, assetID, day):
+        """
+        Queues the buckets containing day for refreshBuckets once the current transaction commits
+        (straight away outside one), together with any others queued before then.
+        """
+
+        if not hasattr(pending_refreshes, "days"):
+            pending_refreshes.days = {}
+        pending_refreshes.days.setdefault(assetID, set()).add(day)
+
+        # Registered each time, as a rolled back transaction drops its callbacks; whichever runs
+        # first refreshes everything queued and the rest find nothing left
+        transaction.on_commit(self.runScheduled)
+
+    def runScheduled(self):
+        scheduled, pending_refreshes.days = getattr(pending_refreshes, "days", {}), {}
+
+        for assetID, days in scheduled.items():
+            self.refreshBuckets(assetID, days)
+
+    def refreshBucket(self, assetID, period, bucket):
+        rows = OperationLogMetric.objects                                                \
+            .filter(
+                logID__assetID             = assetID                                     ,
+                logID__deleted             = False                                       ,
+                logID__endDateTime__isnull = False                                       ,
+                logID__startDateTime__gte  = local_midnight(bucket)                      ,
+                logID__startDateTime__lt   = local_midnight(next_bucket(bucket, period)) ,
+                metricID__deleted          = False
+            )                                                                            \
+            .values("metricID")                                                          \
+            .annotate(
+                minValue = Min("value")        ,
+                maxValue = Max("value")        ,
+                sumValue = Sum("value")        ,
+                count    = Count("logMetricID")
+            )
+
+        rollups = [
+            MetricRollup(
+                assetID_id  = assetID        ,
+                metricID_id = row["metricID"],
+                period      = period         ,
+                bucket      = bucket         ,
+                minValue    = row["minValue"],
+                maxValue    = row["maxValue"],
+                sumValue    = row["sumValue"],
+                count       = row["count"   ]
+            )
+            for row in rows
+        ]
+
+        MetricRollup.objects.bulk_create(
+            rollups                                                          ,
+            update_conflicts = True                                          ,
+            unique_fields    = ["metricID", "period", "bucket"]              ,
+            update_fields    = ["minValue", "maxValue", "sumValue", "count"]
+        )
+
+        # Metrics with no readings left in this bucket lose their rollup
+        MetricRollup.objects                                                  \
+            .filter(assetID=assetID, period=period, bucket=bucket)            \
+            .exclude(metricID__in=[rollup.metricID_id for rollup in rollups]) \
+            .delete()
+
+    def metricSeries(self, metricID, period, start, end):
+        """
+        Returns the rollups of one metric between start and end as parallel arrays:
+            {"bucket": [date, ...], "min": ndarray, "max": ndarray, "sum": ndarray,
+             "avg": ndarray, "count": ndarray}
+        Only buckets with readings are included.
+        """
+
+        rows = list(
+            MetricRollup.objects
+            .filter(
+                metricID    = metricID                      ,
+                period      = period                        ,
+                bucket__gte = bucket_start(start, period)   ,
+                bucket__lte = end
+            )
+            .order_by("bucket")
+            .values_list("bucket", "minValue", "maxValue", "sumValue", "count")
+        )
+
+        values = np.array([row[1:] for row in rows], dtype=np.float64).reshape(-1, 4)
+        counts = values[:, 3].astype(np.int64)
+
+        return {
+            "bucket": [row[0] for row in rows],
+            "min"   : values[:, 0]            ,
+            "max"   : values[:, 1]            ,
+            "sum"   : values[:, 2]            ,
+            "avg"   : values[:, 2] / np.maximum(counts, 1),
+            "count" : counts
+        }
+
+
+# Maintenance
+@receiver(pre_save, sender=OperationLog)
+def remember_rollup_placement(sender, instance, **kwargs):
+    # An edit can move a closed log to another asset or day, or reopen it, so the buckets it
+    # leaves are refreshed too
+    instance._previousRollup = None
+    if instance.pk is not None:
+        instance._previousRollup = OperationLog.objects                               \
+            .filter(pk=instance.pk, endDateTime__isnull=False)                        \
+            .values_list("assetID", "startDateTime")                                  \
+            .first()
+
+
+@receiver(post_save  , sender=OperationLog)
+@receiver(post_delete, sender=OperationLog)
+def refresh_log_rollups(sender, instance, **kwargs):
+    metricRollupManagerInstance = metricRollupManager()
+
+    previous = getattr(instance, "_previousRollup", None)
+    if previous is not None:
+        metricRollupManagerInstance.scheduleRefresh(*previous)
+
+    # Open logs are not rolled up yet, so there is nothing to refresh until they close
+    if instance.endDateTime is not None:
+        metricRollupManagerInstance.scheduleRefresh(instance.assetID_id, instance.startDateTime)
+
+
+@receiver(soft_deleted, sender=OperationLog)
+def refresh_soft_deleted_rollups(sender, pks, **kwargs):
+    metricRollupManagerInstance = metricRollupManager()
+
+    closed = OperationLog.objects                                                     \
+        .filter(pk__in=pks, endDateTime__isnull=False)                                \
+        .values_list("assetID", "startDateTime")
+    for assetID, startDateTime in closed:
+        metricRollupManagerInstance.scheduleRefresh(assetID, startDateTime)
+
+
+@receiver(post_save  , sender=OperationLogMetric)
+@receiver(post_delete, sender=OperationLogMetric)
+def refresh_reading_rollups(sender, instance, **kwargs):
+    try:
+        log = instance.logID
+    except OperationLog.DoesNotExist: # Deleted along with its log, which refreshes on its own
+        return
+
+    if log.endDateTime is None:
+        return
+
+    metricRollupManager().scheduleRefresh(log.assetID_id, log.startDateTime)
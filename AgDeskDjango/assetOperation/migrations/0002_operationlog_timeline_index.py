@@ -0,0 +1,20 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetManagement', '0001_initial'),
+        ('assetOperation', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='operationlog',
+            index=models.Index(fields=['assetID', '-startDateTime', '-logID'], name='oplog_asset_timeline_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetManagement', '0001_initial'),
+        ('assetOperation', '0002_operationlog_timeline_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetricRollup',
+            fields=[
+                ('rollupID', models.AutoField(primary_key=True, serialize=False)),
+                ('period', models.CharField(choices=[('day', 'Daily'), ('week', 'Weekly')], max_length=4)),
+                ('bucket', models.DateField()),
+                ('minValue', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('maxValue', models.DecimalField(decimal_places=4, max_digits=14)),
+                ('sumValue', models.DecimalField(decimal_places=4, max_digits=20)),
+                ('count', models.PositiveIntegerField()),
+                ('assetID', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='assetManagement.asset')),
+                ('metricID', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='assetOperation.performancemetric')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['assetID', 'period', 'bucket'], name='metric_rollup_asset_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='metricrollup',
+            constraint=models.UniqueConstraint(fields=('metricID', 'period', 'bucket'), name='metric_rollup_unique_bucket'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:54
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def stamp_deleted(apps, schema_editor):
+    # Rows deleted before deletedAt existed are treated as deleted now, so purging waits its full age
+    for name in ("OperationLog", "PerformanceMetric"):
+        apps.get_model("assetOperation", name).objects.filter(deleted=True).update(deletedAt=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assetManagement', '0002_soft_delete'),
+        ('assetOperation', '0003_metricrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='operationlog',
+            name='oplog_asset_timeline_idx',
+        ),
+        migrations.AddField(
+            model_name='operationlog',
+            name='deletedAt',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='performancemetric',
+            name='deletedAt',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='operationlog',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['assetID', '-startDateTime', '-logID'], name='oplog_asset_timeline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancemetric',
+            index=models.Index(condition=models.Q(('deleted', False)), fields=['assetID', 'name'], name='metric_alive_idx'),
+        ),
+        migrations.RunPython(stamp_deleted, migrations.RunPython.noop),
+    ]
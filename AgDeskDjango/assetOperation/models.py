@@ -6,6 +6,8 @@ The check out check in system uses the operation log model.
 # Imports
 from datetime import datetime
 from django.db import models
+from utils import softdelete
+from utils.softdelete import SoftDeleteManager, alive_index
 
 
 # Constants
@@ -14,6 +16,11 @@ LOG_NOTES_LENGTH = 256
 
 METRIC_NAME_LENGTH = 32
 
+ROLLUP_PERIODS = {
+    "day" : "Daily" ,
+    "week": "Weekly"
+}
+
 
 # Check Out Check In & Operation Log Model
 class OperationLog(models.Model):
@@ -27,6 +34,15 @@ class OperationLog(models.Model):
     location      = models.CharField(max_length=LOG_LOCATION_LENGTH)
     notes         = models.CharField(max_length=LOG_NOTES_LENGTH, null=True, blank=True)
     deleted       = models.BooleanField(default=False)
+    deletedAt     = models.DateTimeField(null=True, blank=True)
+
+    objects = SoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            # Keyset paging of an asset's live log timeline, newest first
+            alive_index("assetID", "-startDateTime", "-logID", name="oplog_asset_timeline_idx")
+        ]
 
 # Foreign key on_delete should probably be SET() or DO_NOTHING for logs. Logs can outlast assets.
 
@@ -38,6 +54,15 @@ class PerformanceMetric(models.Model):
 
     name        = models.CharField(max_length=METRIC_NAME_LENGTH)
     deleted     = models.BooleanField(default=False)
+    deletedAt   = models.DateTimeField(null=True, blank=True)
+
+    objects = SoftDeleteManager()
+
+    class Meta:
+        indexes = [
+            # Live metrics of an asset by name
+            alive_index("assetID", "name", name="metric_alive_idx")
+        ]
 
 
 class OperationLogMetric(models.Model):
@@ -47,3 +72,35 @@ class OperationLogMetric(models.Model):
 
     value       = models.DecimalField(max_digits=14, decimal_places=4)
     # Doesn't need own deleted, treat as deleted if either logID or metricID has deleted=True
+
+
+# Metric Rollups
+class MetricRollup(models.Model):
+    """
+    Pre-aggregated min/max/sum/count of a performance metric over a day or a week, per asset.
+    Maintained when logs close, so trend charts never scan OperationLogMetric.
+    """
+
+    rollupID = models.AutoField(primary_key=True)
+    assetID  = models.ForeignKey("assetManagement.asset", on_delete=models.CASCADE)
+    metricID = models.ForeignKey("PerformanceMetric", on_delete=models.CASCADE)
+
+    period   = models.CharField(max_length=4, choices=ROLLUP_PERIODS)
+    bucket   = models.DateField() # First day of the period
+
+    minValue = models.DecimalField(max_digits=14, decimal_places=4)
+    maxValue = models.DecimalField(max_digits=14, decimal_places=4)
+    sumValue = models.DecimalField(max_digits=20, decimal_places=4)
+    count    = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["metricID", "period", "bucket"], name="metric_rollup_unique_bucket")
+        ]
+        indexes = [
+            models.Index(fields=["assetID", "period", "bucket"], name="metric_rollup_asset_idx")
+        ]
+
+
+softdelete.register(OperationLog)
+softdelete.register(PerformanceMetric)
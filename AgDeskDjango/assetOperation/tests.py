@@ -1,3 +1,397 @@
+"""
+Tests for assetOperation
+"""
+
+# Import
+import zipfile
+from datetime import date, datetime, timedelta
+from io import BytesIO
+from datetime import timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db.models import F
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from utils.testing_data import FARM_SUPERSET
+from utils.testing_data import generate_dataset_from_model
+
+from assetManagement.models     import SmallEquipment
+from assetOperation.ingestion   import telemetryIngestor, parse_readings
+from assetOperation.metrics     import metricRollupManager
+from assetOperation.models      import OperationLog, OperationLogMetric, PerformanceMetric, MetricRollup
+from assetOperation.utilization import utilizationManager, UTILIZATION_PREFIX
+from assetOperation.views       import *
+from FarmAcc.models             import FarmInfo
+from UserAuth.models            import UserProfile
+from utils.versioning           import bump_version, current_version
+
+
+# Base
+class BaseTestCase(TestCase):
+    def setUp(self):
+        # Create a user, a farm and an asset for testing
+        VALID_FARMS = {
+            "farm_name"    : FARM_SUPERSET["farm_name"    ][0],
+            "farm_street"  : FARM_SUPERSET["farm_street"  ][0],
+            "farm_state"   : FARM_SUPERSET["farm_state"   ][0],
+            "farm_postcode": FARM_SUPERSET["farm_postcode"][0],
+            "farm_bio"     : FARM_SUPERSET["farm_bio"     ][0],
+            "farm_image"   : FARM_SUPERSET["farm_image"   ][0]
+        }
+
+        farmList = [
+            FarmInfo(**farm_data)
+            for farm_data
+            in generate_dataset_from_model(VALID_FARMS)
+        ]
+        self.farm = FarmInfo.objects.bulk_create(farmList)
+
+        self.user = UserProfile.objects.create_user(
+            username    = "testuser"          ,
+            email       = "testuser@test.test",
+            password    = "12345"             ,
+            currentFarm = self.farm[0]
+        )
+
+        self.asset = SmallEquipment.objects.create(
+            assetPrefix      = "SE"               ,
+            assetName        = "Drill"            ,
+            farmID           = self.farm[0]       ,
+            Manufacturer     = "DeWalt"           ,
+            partsList        = "Drill Bits"       ,
+            Location         = "Tool Shed"        ,
+            dateManufactured = date(2020, 1, 1)   ,
+            datePurchased    = date(2020, 1, 1)   ,
+            serialNumber     = "123456789"
+        )
+
+        self.metric = PerformanceMetric.objects.create(assetID=self.asset, name="Fuel Used")
+        self.start  = datetime(2024, 1, 1, 8, tzinfo=dt_timezone.utc) # A Monday
+
+    def create_logs(self, count, notes="Short note"):
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        OperationLog.objects.bulk_create([
+            OperationLog(
+                assetID       = self.asset                   ,
+                userID        = self.user                    ,
+                startDateTime = start + timedelta(hours=i//2),  # Pairs share a start time
+                endDateTime   = start + timedelta(hours=i//2, minutes=30),
+                location      = "Paddock"                    ,
+                notes         = notes
+            )
+            for i in range(count)
+        ])
+
+    def record(self, day, values, close=True):
+        log = OperationLog.objects.create(
+            assetID       = self.asset                      ,
+            userID        = self.user                       ,
+            startDateTime = self.start + timedelta(days=day),
+            location      = "Paddock"
+        )
+        for value in values:
+            OperationLogMetric.objects.create(logID=log, metricID=self.metric, value=value)
+        if close:
+            log.endDateTime = log.startDateTime + timedelta(hours=1)
+            with self.captureOnCommitCallbacks(execute=True):
+                log.save()
+        return log
+
+
+# Views - Log Timeline
+class get_asset_log_timelineTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+    def test_pages_cover_every_log_once(self):
+        self.create_logs(7)
+
+        seen   = []
+        cursor = None
+        while True:
+            logs, cursor = get_asset_log_timeline(self.asset.assetID, cursor, limit=3)
+            seen += [log["logID"] for log in logs]
+            if cursor is None:
+                break
+
+        expected = OperationLog.objects                  \
+            .filter(assetID=self.asset)                  \
+            .order_by("-startDateTime", "-logID")        \
+            .values_list("logID", flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_single_query_per_page(self):
+        self.create_logs(5)
+
+        with self.assertNumQueries(1):
+            logs, _ = get_asset_log_timeline(self.asset.assetID)
+
+        self.assertEqual(logs[0]["userName"], "testuser")
+
+    def test_notes_head_truncated(self):
+        self.create_logs(1, notes="x" * (MAX_NOTES_HEAD + 5))
+        self.create_logs(1, notes=None)
+
+        logs, _ = get_asset_log_timeline(self.asset.assetID)
+        heads   = sorted(log["notesHead"] for log in logs)
+
+        self.assertEqual(heads, ["", "x" * MAX_NOTES_HEAD + "..."])
+
+    def test_invalid_cursor_returns_first_page(self):
+        self.create_logs(2)
+
+        logs, _ = get_asset_log_timeline(self.asset.assetID, "not-a-cursor")
+        self.assertEqual(len(logs), 2)
+
+
+# Utilization
+class utilizationManagerTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.manager = utilizationManager()
+
+    def test_hours_bucketed_by_day(self):
+        self.create_logs(4) # Four 30 minute logs on the first day
+
+        series = self.manager.usageSeries(
+            self.farm[0].id, "asset", [self.asset.assetID], "day", date(2024, 1, 1), date(2024, 1, 2)
+        )[self.asset.assetID]
+
+        self.assertEqual([bucket["hoursInUse"] for bucket in series], [2.0, 0.0])
+        self.assertEqual(series[0]["logCount"], 4)
+        self.assertAlmostEqual(series[0]["idleRatio"], 1 - 2 / 24, places=4)
+
+    def test_cached_buckets_skip_the_database(self):
+        self.create_logs(2)
+        args = (self.farm[0].id, "asset", [self.asset.assetID], "week", date(2024, 1, 1), date(2024, 1, 31))
+
+        first = self.manager.usageSeries(*args)
+        with self.assertNumQueries(1): # The farm's version
+            second = self.manager.usageSeries(*args)
+
+        self.assertEqual(first, second)
+
+    def test_closing_a_log_invalidates_its_bucket(self):
+        args = (self.farm[0].id, "user", [self.user.id], "month", date(2024, 1, 1), date(2024, 1, 31))
+        self.assertEqual(self.manager.usageSeries(*args)[self.user.id][0]["hoursInUse"], 0.0)
+
+        self.create_logs(1)
+        log = OperationLog.objects.get(assetID=self.asset)
+        log.save() # bulk_create skips signals, saving mirrors a check in
+
+        self.assertEqual(self.manager.usageSeries(*args)[self.user.id][0]["hoursInUse"], 0.5)
+
+    def test_writes_reach_buckets_cached_by_other_processes(self):
+        self.create_logs(1)
+        args = (self.farm[0].id, "asset", [self.asset.assetID], "day", date(2024, 1, 1), date(2024, 1, 1))
+        self.assertEqual(self.manager.usageSeries(*args)[self.asset.assetID][0]["hoursInUse"], 0.5)
+
+        # Another process's write: nothing in this process's cache is dropped, only the version moves
+        OperationLog.objects.filter(assetID=self.asset).update(endDateTime=F("startDateTime") + timedelta(hours=2))
+        bump_version(UTILIZATION_PREFIX, self.farm[0].id)
+
+        self.assertEqual(self.manager.usageSeries(*args)[self.asset.assetID][0]["hoursInUse"], 2.0)
+
+    def test_checking_out_keeps_the_cached_usage(self):
+        self.record(0, [], close=False)
+        self.assertEqual(current_version(UTILIZATION_PREFIX, self.farm[0].id), 0)
+
+    def test_buckets_are_cached_per_time_zone(self):
+        OperationLog.objects.create(
+            assetID       = self.asset                                      ,
+            userID        = self.user                                       ,
+            startDateTime = datetime(2024, 1, 1, 20, tzinfo=dt_timezone.utc),
+            endDateTime   = datetime(2024, 1, 1, 21, tzinfo=dt_timezone.utc),
+            location      = "Paddock"
+        )
+        args = (self.farm[0].id, "asset", [self.asset.assetID], "day", date(2024, 1, 1), date(2024, 1, 2))
+
+        with timezone.override("UTC"):
+            utc = [bucket["hoursInUse"] for bucket in self.manager.usageSeries(*args)[self.asset.assetID]]
+        with timezone.override("Australia/Brisbane"):
+            brisbane = [bucket["hoursInUse"] for bucket in self.manager.usageSeries(*args)[self.asset.assetID]]
+
+        self.assertEqual(utc     , [1.0, 0.0])
+        self.assertEqual(brisbane, [0.0, 1.0])
+
+    def test_moving_a_log_invalidates_the_buckets_it_left(self):
+        self.create_logs(1)
+        log = OperationLog.objects.get(assetID=self.asset)
+        log.save()
+        args = (self.farm[0].id, "asset", [self.asset.assetID], "month", date(2024, 1, 1), date(2024, 2, 29))
+        self.assertEqual([bucket["hoursInUse"] for bucket in self.manager.usageSeries(*args)[self.asset.assetID]], [0.5, 0.0])
+
+        log.startDateTime += timedelta(days=40)
+        log.endDateTime   += timedelta(days=40)
+        log.save()
+        self.assertEqual([bucket["hoursInUse"] for bucket in self.manager.usageSeries(*args)[self.asset.assetID]], [0.0, 0.5])
+
+    def test_long_ranges_are_rejected(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse("utilization"), {"kind": "day", "start": "2020-01-01", "end": "2024-01-01"})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(reverse("utilization"), {"kind": "week", "start": "2020-01-01", "end": "2024-01-01"})
+        self.assertEqual(response.status_code, 200)
+
+
+# Metric Rollups
+class metricRollupManagerTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+    def test_open_logs_are_not_rolled_up(self):
+        self.record(0, [10], close=False)
+        self.assertFalse(MetricRollup.objects.exists())
+
+    def test_closing_logs_maintains_day_and_week_rollups(self):
+        self.record(0, [10, 30])
+        self.record(1, [20])
+
+        series = metricRollupManager().metricSeries(self.metric.metricID, "day", date(2024, 1, 1), date(2024, 1, 7))
+        self.assertEqual(series["bucket"], [date(2024, 1, 1), date(2024, 1, 2)])
+        self.assertEqual(series["min"].tolist(), [10.0, 20.0])
+        self.assertEqual(series["avg"].tolist(), [20.0, 20.0])
+
+        week = MetricRollup.objects.get(period="week")
+        self.assertEqual((week.minValue, week.maxValue, week.sumValue, week.count), (10, 30, 60, 3))
+
+    def test_deleting_readings_shrinks_the_rollup(self):
+        log = self.record(0, [10, 30])
+        with self.captureOnCommitCallbacks(execute=True):
+            OperationLogMetric.objects.filter(logID=log, value=30).delete()
+
+        self.assertEqual(MetricRollup.objects.get(period="day").maxValue, 10)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OperationLogMetric.objects.filter(logID=log).delete()
+        self.assertFalse(MetricRollup.objects.exists())
+
+    def test_moving_a_log_refreshes_the_buckets_it_left(self):
+        log = self.record(0, [10])
+
+        log.startDateTime += timedelta(days=8)
+        log.endDateTime   += timedelta(days=8)
+        with self.captureOnCommitCallbacks(execute=True):
+            log.save()
+
+        self.assertEqual(
+            list(MetricRollup.objects.order_by("bucket").values_list("period", "bucket")),
+            [("week", date(2024, 1, 8)), ("day", date(2024, 1, 9))]
+        )
+
+    def test_soft_deleted_logs_leave_the_rollups(self):
+        self.record(0, [10])
+        self.record(1, [20])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OperationLog.objects.filter(startDateTime__gte=self.start + timedelta(days=1)).soft_delete()
+
+        self.assertEqual(MetricRollup.objects.get(period="week").sumValue, 10)
+        self.assertFalse(MetricRollup.objects.filter(period="day", bucket=date(2024, 1, 2)).exists())
+
+    def test_readings_of_a_log_are_refreshed_once(self):
+        log = self.record(0, [10, 30, 50])
+
+        # The delete, a lookup of the log per reading, then one refresh of the (now empty) day and
+        # week buckets and its receivers (the asset's farm, the service and profile versions) for
+        # the whole batch
+        with self.assertNumQueries(2 + 3 + 2 * 2 + 3):
+            with self.captureOnCommitCallbacks(execute=True):
+                OperationLogMetric.objects.filter(logID=log).delete()
+        self.assertFalse(MetricRollup.objects.exists())
+
+    def test_buckets_follow_the_server_time_zone(self):
+        # 20:00 UTC on the 1st is already the 2nd in Brisbane, but rollups are bucketed in UTC
+        self.start = datetime(2024, 1, 1, 20, tzinfo=dt_timezone.utc)
+        with timezone.override("Australia/Brisbane"):
+            self.record(0, [10])
+
+        self.assertEqual(MetricRollup.objects.get(period="day").bucket, date(2024, 1, 1))
+
+
+# Telemetry Ingestion
+class ingestMetricsTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.url = reverse("ingestMetrics", args=["SE", self.asset.assetID])
+
+    def test_csv_upload_reports_rejects(self):
+        log  = self.record(0, [])
+        body = "\n".join([
+            "logID,metric,value"              ,
+            f"{log.logID},Fuel Used,12.5"     ,
+            f"{log.logID},fuel used,7.5"      ,
+            f"{log.logID},Hectares,3"         ,
+            f"{log.logID + 99},Fuel Used,1"   ,
+            f"{log.logID},Fuel Used,lots"
+        ])
+
+        response = self.client.post(self.url, body, content_type="text/csv")
+        report   = response.json()
+
+        self.assertEqual(report["accepted"], 2)
+        self.assertEqual([reject["row"] for reject in report["rejected"]], [3, 4, 5])
+        self.assertEqual(OperationLogMetric.objects.filter(logID=log).count(), 2)
+
+        # Readings on closed logs are rolled up straight away
+        self.assertEqual(MetricRollup.objects.get(period="day").sumValue, 20)
+
+    def test_csv_with_byte_order_mark(self):
+        log  = self.record(0, [], close=False)
+        body = f"logID,metric,value\r\n{log.logID},Fuel Used,12.5\r\n".encode("utf-8-sig")
+
+        response = self.client.post(self.url, body, content_type="text/csv")
+
+        self.assertEqual(response.json(), {"accepted": 1, "rejected": []})
+
+    def test_jsonl_upload_in_chunks(self):
+        log  = self.record(0, [], close=False)
+        body = "\n".join(
+            f'{{"logID": {log.logID}, "metric": {self.metric.metricID}, "value": {i}}}'
+            for i in range(25)
+        )
+
+        report = telemetryIngestor(self.asset.assetID, chunkSize=10).ingest(
+            parse_readings(iter([line.encode() + b"\n" for line in body.splitlines()]), "jsonl")
+        )
+
+        self.assertEqual(report, {"accepted": 25, "rejected": []})
+        self.assertFalse(MetricRollup.objects.exists())
+
+    def test_unknown_format_rejected(self):
+        response = self.client.post(self.url, "<xml/>", content_type="application/xml")
+        self.assertEqual(response.status_code, 400)
+
+
+# Export
+class exportLogsTest(BaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.create_logs(3, notes="=SUM(A1)")
+
+    def test_csv_streams_joined_columns(self):
+        response = self.client.get(reverse("exportLogs"), {"start": "2024-01-01", "end": "2024-01-01"})
+        lines    = b"".join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(lines[0], "Log ID,Start,End,Asset ID,Asset Category,Asset Name,User,Location,Notes")
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].endswith(",SE,Drill,testuser,Paddock,'=SUM(A1)"))
+
+    def test_xlsx_is_a_valid_workbook(self):
+        response = self.client.get(reverse("exportLogs"), {"format": "xlsx"})
+        workbook = zipfile.ZipFile(BytesIO(b"".join(response.streaming_content)))
+
+        self.assertIsNone(workbook.testzip())
+        sheet = workbook.read("xl/worksheets/sheet1.xml").decode()
+        self.assertEqual(sheet.count("<row>"), 4)
+        self.assertIn("<t xml:space=\"preserve\">Drill</t>", sheet)
 
-# Create your tests here.
+    def test_invalid_format_rejected(self):
+        self.assertEqual(self.client.get(reverse("exportLogs"), {"format": "pdf"}).status_code, 400)
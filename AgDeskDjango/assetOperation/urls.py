@@ -3,10 +3,15 @@ from django.urls import path
 from . import views
 
 urlpatterns = [
-    path("checkout"                              , views.checkout    , name="checkout"    ),
-    path("myCheckouts"                           , views.checkin     , name="myCheckouts" ),
-    path("allCheckouts"                          , views.allCheckouts, name="allCheckouts"),
-    path("<str:assetCategory>/<int:assetID>/logs", views.viewLogs    , name="assetLogs"   ),
+    path("checkout"                                       , views.checkout        , name="checkout"        ),
+    path("myCheckouts"                                    , views.checkin         , name="myCheckouts"     ),
+    path("allCheckouts"                                   , views.allCheckouts    , name="allCheckouts"    ),
+    path("utilization"                                    , views.utilization     , name="utilization"     ),
+    path("metrics/<int:metricID>/series"                  , views.metricSeries    , name="metricSeries"    ),
+    path("logs/export"                                    , views.exportLogs      , name="exportLogs"      ),
+    path("<str:assetCategory>/<int:assetID>/logs"         , views.viewLogs        , name="assetLogs"       ),
+    path("<str:assetCategory>/<int:assetID>/logs/timeline", views.assetLogTimeline, name="assetLogTimeline"),
+    path("<str:assetCategory>/<int:assetID>/metrics/ingest", views.ingestMetrics   , name="ingestMetrics"   ),
     # path("current/farm"                          , views.currentLogs , name="checkin"     ),
     # path("logs/farm"                             , views.allLogs     , name="checkin"     )
 ]
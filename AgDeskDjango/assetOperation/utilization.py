@@ -0,0 +1,242 @@
+"""
+Utilization analytics over operation logs.
+Hours in use and idle ratios are computed per asset or per user, bucketed by day, week or month.
+Bucket totals are cached individually under the farm's utilization version (see utils.versioning),
+so a chart only computes the buckets it has not seen since the farm's logs last changed. Closing,
+editing or deleting a closed log bumps the version, which every process reads, so none keeps
+serving usage from before the write. Bucket boundaries follow the active time zone, so buckets are
+also cached per time zone.
+"""
+
+# Imports
+from datetime import datetime, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import Trunc
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from utils.softdelete import soft_deleted
+from utils.versioning import bump_version, current_version
+
+from .models import OperationLog
+
+
+# Constants
+BUCKET_KINDS            = ("day", "week", "month")
+DIMENSIONS              = {"asset": "assetID", "user": "userID"}
+UTILIZATION_PREFIX      = "utilization"
+UTILIZATION_TTL         = 60 * 60 * 24 * 7 # Writes move the farm to a new version, the TTL only bounds memory
+UTILIZATION_MAX_BUCKETS = 366              # Per series, e.g. a year of days
+
+
+# Bucket helpers
+def bucket_start(value, kind):
+    """
+    Function to get the (local) date a datetime's bucket starts on.
+    Weeks start on Monday, matching PostgreSQL's date_trunc("week").
+    """
+
+    if isinstance(value, datetime):
+        if timezone.is_naive(value): # OperationLog.startDateTime defaults to a naive datetime.now
+            value = timezone.make_aware(value)
+        day = timezone.localtime(value).date()
+    else:
+        day = value
+
+    if kind == "day":
+        return day
+    if kind == "week":
+        return day - timedelta(days=day.weekday())
+    if kind == "month":
+        return day.replace(day=1)
+
+    raise ValueError(f"Invalid bucket kind: {kind}")
+
+
+def next_bucket(day, kind):
+    """
+    Function to get the start date of the bucket after the one starting on day.
+    """
+
+    if kind == "day":
+        return day + timedelta(days=1)
+    if kind == "week":
+        return day + timedelta(weeks=1)
+    if kind == "month":
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    raise ValueError(f"Invalid bucket kind: {kind}")
+
+
+def bucket_range(kind, start, end, limit=UTILIZATION_MAX_BUCKETS):
+    """
+    Function to list the start dates of every bucket overlapping [start, end].
+    Raises ValueError if there are more than limit buckets (None for no limit).
+    """
+
+    buckets = []
+    day     = bucket_start(start, kind)
+    last    = bucket_start(end, kind)
+    while day <= last:
+        if limit is not None and len(buckets) == limit:
+            raise ValueError(f"At most {limit} {kind}s can be shown at once")
+        buckets.append(day)
+        day = next_bucket(day, kind)
+
+    return buckets
+
+
+def local_midnight(day):
+    """
+    Function to turn a date into an aware datetime at the start of that day.
+    """
+
+    return timezone.make_aware(datetime.combine(day, datetime.min.time()))
+
+
+def bucket_key(farmID, version, tzname, dimension, objectID, kind, day):
+    return f"{UTILIZATION_PREFIX}:{farmID}:{version}:{tzname}:{dimension}:{objectID}:{kind}:{day.isoformat()}"
+
+
+# Utilization Manager
+class utilizationManager():
+    """
+    Computes hours in use per asset or per user for a farm.
+    Only closed logs count towards usage, and a log counts towards the bucket it started in.
+    """
+
+    def usageSeries(self, farmID, dimension, objectIDs, kind, start, end):
+        """
+        Returns {objectID: [bucket dict, ...]} for every bucket between start and end, where each
+        bucket dict holds "bucket" (start date), "hoursInUse", "idleRatio" and "logCount".
+        Buckets missing from the cache are computed together in a single grouped query.
+        """
+
+        if kind not in BUCKET_KINDS:
+            raise ValueError(f"Invalid bucket kind: {kind}")
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Invalid dimension: {dimension}")
+
+        version = current_version(UTILIZATION_PREFIX, farmID)
+        tzname  = timezone.get_current_timezone_name()
+        buckets = bucket_range(kind, start, end)
+        keys    = {
+            (objectID, day): bucket_key(farmID, version, tzname, dimension, objectID, kind, day)
+            for objectID in objectIDs
+            for day in buckets
+        }
+        totals  = cache.get_many(keys.values())
+
+        missing = [position for position, key in keys.items() if key not in totals]
+        if missing:
+            computed = self.computeBuckets(
+                farmID                               ,
+                dimension                            ,
+                {objectID for objectID, _ in missing},
+                kind                                 ,
+                min(day for _, day in missing)       ,
+                max(day for _, day in missing)
+            )
+            fresh = {
+                keys[position]: computed.get(position, (0.0, 0))
+                for position in missing
+            }
+            cache.set_many(fresh, UTILIZATION_TTL)
+            totals.update(fresh)
+
+        series = {}
+        for objectID in objectIDs:
+            series[objectID] = []
+            for day in buckets:
+                seconds, logCount = totals[keys[(objectID, day)]]
+                length            = (local_midnight(next_bucket(day, kind)) - local_midnight(day)).total_seconds()
+                series[objectID].append({
+                    "bucket"    : day                                     ,
+                    "hoursInUse": round(seconds / 3600, 2)                ,
+                    "idleRatio" : round(max(0.0, 1 - seconds / length), 4),
+                    "logCount"  : logCount
+                })
+
+        return series
+
+    def computeBuckets(self, farmID, dimension, objectIDs, kind, firstDay, lastDay):
+        """
+        Runs one grouped query for the usage of objectIDs in every bucket from firstDay to lastDay.
+        Returns {(objectID, bucket start date): (seconds in use, log count)}.
+        """
+
+        field = DIMENSIONS[dimension]
+        rows  = OperationLog.objects                                           \
+            .filter(
+                assetID__farmID     = farmID                                   ,
+                deleted             = False                                    ,
+                endDateTime__isnull = False                                    ,
+                startDateTime__gte  = local_midnight(firstDay)                 ,
+                startDateTime__lt   = local_midnight(next_bucket(lastDay, kind)),
+                **{f"{field}__in": objectIDs}
+            )                                                                  \
+            .annotate(bucket=Trunc("startDateTime", kind))                     \
+            .values(field, "bucket")                                           \
+            .annotate(
+                inUse    = Sum(ExpressionWrapper(F("endDateTime") - F("startDateTime"), output_field=DurationField())),
+                logCount = Count("logID")
+            )
+
+        return {
+            (row[field], bucket_start(row["bucket"], kind)): (row["inUse"].total_seconds(), row["logCount"])
+            for row in rows
+        }
+
+    def farmAssetUtilization(self, farm, kind, start, end):
+        """
+        Usage series for every live asset on a farm.
+        """
+
+        assetIDs = list(farm.asset_set.filter(deleted=False).values_list("assetID", flat=True))
+        return self.usageSeries(farm.id, "asset", assetIDs, kind, start, end)
+
+    def farmUserUtilization(self, farm, kind, start, end):
+        """
+        Usage series for every user of a farm, counting only their use of this farm's assets.
+        """
+
+        userIDs = list(farm.user_profiles.values_list("id", flat=True))
+        return self.usageSeries(farm.id, "user", userIDs, kind, start, end)
+
+
+# Invalidation
+@receiver(pre_save, sender=OperationLog)
+def remember_log_farm(sender, instance, **kwargs):
+    # An edit can move a closed log to another farm's asset, or reopen it, and either way the
+    # usage it leaves behind changes too
+    instance._previousFarmID = None
+    if instance.pk is not None:
+        instance._previousFarmID = OperationLog.objects                               \
+            .filter(pk=instance.pk, endDateTime__isnull=False)                        \
+            .values_list("assetID__farmID", flat=True)                                \
+            .first()
+
+
+@receiver(post_save  , sender=OperationLog)
+@receiver(post_delete, sender=OperationLog)
+def invalidate_log_utilization(sender, instance, **kwargs):
+    # Open logs do not count towards usage, so checking one out changes nothing
+    farmIDs = {getattr(instance, "_previousFarmID", None)}
+    if instance.endDateTime is not None:
+        farmIDs.add(instance.assetID.farmID_id)
+
+    for farmID in farmIDs - {None}:
+        bump_version(UTILIZATION_PREFIX, farmID)
+
+
+@receiver(soft_deleted, sender=OperationLog)
+def invalidate_soft_deleted_utilization(sender, pks, **kwargs):
+    farmIDs = OperationLog.objects                                                    \
+        .filter(pk__in=pks, endDateTime__isnull=False)                                \
+        .values_list("assetID__farmID", flat=True)                                    \
+        .distinct()
+    for farmID in farmIDs:
+        bump_version(UTILIZATION_PREFIX, farmID)
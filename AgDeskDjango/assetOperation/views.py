@@ -3,22 +3,49 @@ Views for assetOperations, including check out / check in, operation logs ans pe
 """
 
 # Imports
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from django.shortcuts import render, redirect
+from django.db.models import Case, CharField, F, Value, When
+from django.db.models.functions import Coalesce, Concat, Left, Length
+from django.db.models.lookups import GreaterThanOrEqual
+from django.http import JsonResponse
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_POST
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 from assetManagement.models import asset
 from assetManagement.views import AssetStructures
 from UserAuth.models import UserProfile
+from utils.exports import export_response
+from utils.pagination import page_of
 
-from .models import OperationLog
+from .models import OperationLog, PerformanceMetric, ROLLUP_PERIODS
 from .forms import checkOutForm, checkInForm
+from .metrics import metricRollupManager
+from .ingestion import telemetryIngestor, parse_readings, format_from_content_type, INGEST_FORMATS
+from .utilization import utilizationManager, BUCKET_KINDS
 from django.contrib import messages
 
 
 # Contants
-MAX_NOTES_HEAD = 20
+MAX_NOTES_HEAD     = 20
+LOG_TIMELINE_SIZE  = 50
+LOG_TIMELINE_ORDER = (("startDateTime", parse_datetime), ("logID", int))
+UTILIZATION_SPAN   = 56 # Days of history shown when no start date is given
+
+LOG_EXPORT_COLUMNS = (
+    ("Log ID"        , "logID"               ),
+    ("Start"         , "startDateTime"       ),
+    ("End"           , "endDateTime"         ),
+    ("Asset ID"      , "assetID"             ),
+    ("Asset Category", "assetID__assetPrefix"),
+    ("Asset Name"    , "assetID__assetName"  ),
+    ("User"          , "userID__username"    ),
+    ("Location"      , "location"            ),
+    ("Notes"         , "notes"               )
+)
 
 
 # Utility
@@ -44,6 +71,35 @@ def get_user_current_checkouts_oldest(user_id):
     return three_oldest_logs
 
 
+def get_asset_log_timeline(assetID, cursor=None, limit=LOG_TIMELINE_SIZE):
+    """
+    Function to get one page of an asset's operation logs, newest first.
+    The username and a truncated notes head are computed by the database, so the page costs a
+    single query. Pages are keyed on (startDateTime, logID) rather than OFFSET (see
+    utils.pagination), so older pages are as cheap as the first one.
+
+    Returns a tuple of (list of log dicts, cursor for the next page or None).
+    """
+
+    notes = Coalesce("notes", Value(""))
+    logs  = OperationLog.objects                         \
+        .filter(assetID=assetID, deleted=False)          \
+        .annotate(
+            userName  = F("userID__username"),
+            notesHead = Case(
+                When(
+                    GreaterThanOrEqual(Length(notes), MAX_NOTES_HEAD),
+                    then=Concat(Left(notes, MAX_NOTES_HEAD), Value("..."))
+                ),
+                default      = notes,
+                output_field = CharField()
+            )
+        )                                                \
+        .values("logID", "startDateTime", "endDateTime", "location", "notes", "notesHead", "userName")
+
+    return page_of(logs, cursor, LOG_TIMELINE_ORDER, limit)
+
+
 # Check Out / Check In``
 @login_required(login_url="login")
 def checkout(request):
@@ -96,9 +152,9 @@ def checkoutBandaid(request):
 
     asset_instance = asset.objects.get(assetID=request.POST["assetID"])
     log = OperationLog(
-        assetID  = asset_instance                             ,
-        userID   = UserProfile.objects.get(id=request.user.id),
-        location = request.POST["location"]                   ,
+        assetID  = asset_instance          ,
+        userID   = request.user            ,
+        location = request.POST["location"],
         notes    = request.POST["notes"]
     )
     log.save()
@@ -221,25 +277,12 @@ def viewLogs(request, assetCategory, assetID):
     """
 
     if request.method == "GET":
-        logs = OperationLog.objects.filter(
-            assetID = asset.objects.get(assetID=assetID),
-            deleted = False
-        )
-
-        asset_instance = asset.objects.get(assetID=assetID)
-
-        # Bodge to make the notes and username work
-        logs_dict = logs.values()
-        for i, log in enumerate(logs_dict):
-            if len(log["notes"]) < MAX_NOTES_HEAD:
-                notesHead = log["notes"]
-            else:
-                notesHead = log["notes"][:MAX_NOTES_HEAD] + "..."
-            logs_dict[i]["notesHead"] = notesHead
-            logs_dict[i]["userName" ] = logs[i].userID.username
+        asset_instance   = get_object_or_404(asset, assetID=assetID, farmID=request.user.currentFarm_id)
+        logs, nextCursor = get_asset_log_timeline(assetID, request.GET.get("cursor"))
 
         context = {
-            "logs"        : logs_dict                 ,
+            "logs"        : logs                      ,
+            "nextCursor"  : nextCursor                ,
             "assetName"   : asset_instance.assetName  ,
             "currentAsset": asset_instance            ,
             "assetID"     : assetID                   ,
@@ -249,6 +292,22 @@ def viewLogs(request, assetCategory, assetID):
         return render(request, "assetOperation/assetLogs.html", context)
 
 
+@login_required(login_url="login")
+def assetLogTimeline(request, assetCategory, assetID):
+    """
+    JSON endpoint returning one page of an asset's operation logs, newest first.
+    Pass the returned "nextCursor" back as ?cursor= to fetch the next (older) page.
+    """
+
+    get_object_or_404(asset, assetID=assetID, farmID=request.user.currentFarm_id)
+    logs, nextCursor = get_asset_log_timeline(assetID, request.GET.get("cursor"))
+
+    return JsonResponse({
+        "logs"      : logs      ,
+        "nextCursor": nextCursor
+    })
+
+
 # Logs for all checkouts
 @login_required(login_url="login")
 def allCheckouts(request):
@@ -294,3 +353,136 @@ def allCheckouts(request):
         }
 
         return render(request, "assetOperation/allCheckouts.html", context)
+
+
+# Utilization analytics
+@login_required(login_url="login")
+def utilization(request):
+    """
+    JSON endpoint returning hours in use and idle ratios for the current farm.
+    Query parameters:
+        by   : "asset" (default) or "user"
+        kind : "day", "week" (default) or "month"
+        start: YYYY-MM-DD, defaults to eight weeks ago
+        end  : YYYY-MM-DD, defaults to today
+    Ranges of more than UTILIZATION_MAX_BUCKETS buckets are refused.
+    """
+
+    utilizationManagerInstance = utilizationManager()
+    farm = request.user.currentFarm
+    if farm is None:
+        return JsonResponse({"error": "No farm selected"}, status=400)
+
+    by   = request.GET.get("by"  , "asset")
+    kind = request.GET.get("kind", "week" )
+    try:
+        end   = parse_date(request.GET.get("end"  , "")) or timezone.localdate()
+        start = parse_date(request.GET.get("start", "")) or end - timedelta(days=UTILIZATION_SPAN)
+    except ValueError:
+        return JsonResponse({"error": "Dates must be in the format YYYY-MM-DD"}, status=400)
+
+    if kind not in BUCKET_KINDS or by not in ("asset", "user") or start > end:
+        return JsonResponse({"error": "Invalid utilization query"}, status=400)
+
+    try:
+        if by == "asset":
+            series = utilizationManagerInstance.farmAssetUtilization(farm, kind, start, end)
+        else:
+            series = utilizationManagerInstance.farmUserUtilization(farm, kind, start, end)
+    except ValueError as e: # Too long a range for the bucket kind
+        return JsonResponse({"error": str(e)}, status=400)
+
+    return JsonResponse({
+        "by"    : by    ,
+        "kind"  : kind  ,
+        "series": series
+    })
+
+
+# Performance metric trends
+@login_required(login_url="login")
+def metricSeries(request, metricID):
+    """
+    JSON endpoint returning the daily or weekly rollups of one performance metric for charting.
+    Query parameters:
+        period: "day" (default) or "week"
+        start : YYYY-MM-DD, defaults to eight weeks ago
+        end   : YYYY-MM-DD, defaults to today
+    """
+
+    metric = get_object_or_404(
+        PerformanceMetric                            ,
+        metricID        = metricID                   ,
+        assetID__farmID = request.user.currentFarm_id,
+        deleted         = False
+    )
+
+    period = request.GET.get("period", "day")
+    try:
+        end   = parse_date(request.GET.get("end"  , "")) or timezone.localdate()
+        start = parse_date(request.GET.get("start", "")) or end - timedelta(days=UTILIZATION_SPAN)
+    except ValueError:
+        return JsonResponse({"error": "Dates must be in the format YYYY-MM-DD"}, status=400)
+
+    if period not in ROLLUP_PERIODS or start > end:
+        return JsonResponse({"error": "Invalid metric query"}, status=400)
+
+    series = metricRollupManager().metricSeries(metric.metricID, period, start, end)
+
+    return JsonResponse({
+        "metric": metric.name             ,
+        "period": period                  ,
+        "bucket": series["bucket"]        ,
+        "min"   : series["min"  ].tolist(),
+        "max"   : series["max"  ].tolist(),
+        "sum"   : series["sum"  ].tolist(),
+        "avg"   : series["avg"  ].tolist(),
+        "count" : series["count"].tolist()
+    })
+
+
+# Bulk telemetry ingestion
+@require_POST
+@login_required(login_url="login")
+def ingestMetrics(request, assetCategory, assetID):
+    """
+    Endpoint for uploading a shift's worth of performance metric readings in one request.
+    Either upload a "file" field with a "format" of csv, jsonl or json, or post the readings as
+    the request body with a text/csv, application/x-ndjson or application/json content type.
+    Responds with the number of stored readings and the rows that were rejected, and why.
+    """
+
+    asset_instance = get_object_or_404(asset, assetID=assetID, farmID=request.user.currentFarm_id, deleted=False)
+
+    if "file" in request.FILES:
+        stream     = request.FILES["file"]
+        fileFormat = request.POST.get("format", "csv")
+    else:
+        stream     = request
+        fileFormat = format_from_content_type(request.content_type)
+
+    if fileFormat not in INGEST_FORMATS:
+        return JsonResponse({"error": f"Format must be one of {', '.join(INGEST_FORMATS)}"}, status=400)
+
+    try:
+        report = telemetryIngestor(asset_instance.assetID).ingest(parse_readings(stream, fileFormat))
+    except (ValueError, UnicodeDecodeError) as err:
+        return JsonResponse({"error": str(err)}, status=400)
+
+    return JsonResponse(report)
+
+
+# Export
+@login_required(login_url="login")
+def exportLogs(request):
+    """
+    Streams the current farm's operation logs as CSV or XLSX (?format=), optionally started between
+    ?start= and ?end=.
+    """
+
+    farm = request.user.currentFarm
+    if farm is None:
+        return JsonResponse({"error": "No farm selected"}, status=400)
+
+    logs = OperationLog.objects.filter(assetID__farmID=farm.id, deleted=False)
+    return export_response(request, logs, LOG_EXPORT_COLUMNS, "operation_logs", "startDateTime")
@@ -0,0 +1,138 @@
+"""
+Content addressed storage for uploads (farm files and asset, damage, contact, team and farm images).
+Uploads are named after the SHA-256 of their content, so each distinct file is stored once however
+many times it is uploaded:
+    manual.pdf -> blobs/3f/3f9a...c1.pdf
+The content is hashed as it is streamed from the upload, before anything is written; a duplicate
+upload is then just a reference to the stored blob and nothing is written at all.
+The blob index (FarmAcc.StoredBlob) counts each blob's references. Deleting a file (as
+django_cleanup does when a record is deleted or its file replaced) removes one reference, and the
+blob itself only goes with the last one. Files stored before this storage existed are not indexed
+and are deleted as before.
+A file is stored while its record is being saved. Models with content_storage files derive from
+ContentRecord, which saves them in a transaction, so the reference is counted in the same
+transaction as the record and a record that fails to save takes its reference with it. Its file may
+be left behind unindexed, and is reused by the next identical upload.
+"""
+
+# Imports
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+from django.db import models, transaction
+from django.db.models import F
+
+
+# Constants
+BLOB_DIRECTORY  = "blobs"
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def stored_blobs():
+    # Imported late, as FarmAcc.models uses this storage itself
+    from FarmAcc.models import StoredBlob
+    return StoredBlob.objects
+
+
+def content_digest(content):
+    """
+    Function to hash a file's content, returning (hex SHA-256 digest, size in bytes).
+    """
+
+    digest = hashlib.sha256()
+    size   = 0
+
+    content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+        size += len(chunk)
+    content.seek(0)
+
+    return digest.hexdigest(), size
+
+
+def blob_name(digest, name):
+    # The extension is kept so the file is still served with the right content type
+    extension = os.path.splitext(name)[1].lower()
+
+    return f"{BLOB_DIRECTORY}/{digest[:2]}/{digest}{extension}"
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    A FileSystemStorage that stores each distinct file once, with reference counting.
+    """
+
+    def _save(self, name, content):
+        digest, size = content_digest(content)
+
+        # The blob's row is locked while its file is written or deleted, so a concurrent delete of
+        # the last reference cannot remove a blob that is being referenced again. Inside the
+        # record's transaction (see ContentRecord) this is a savepoint, so the lock and the new
+        # reference are only committed along with the record
+        with transaction.atomic():
+            blob, _ = stored_blobs()                                                       \
+                .select_for_update()                                                       \
+                .get_or_create(digest=digest, defaults={"name": blob_name(digest, name), "size": size})
+
+            if not super().exists(blob.name):
+                super()._save(blob.name, content)
+
+            stored_blobs().filter(digest=digest).update(refs=F("refs") + 1)
+
+        return blob.name
+
+    def delete(self, name):
+        with transaction.atomic():
+            blob = stored_blobs().select_for_update().filter(name=name).first()
+            if blob is None:
+                return super().delete(name)
+
+            if blob.refs > 1:
+                stored_blobs().filter(digest=blob.digest).update(refs=F("refs") - 1)
+                return
+
+            blob.delete()
+            super().delete(name)
+
+
+content_storage_instance = ContentAddressedStorage()
+
+
+# Records
+class ContentRecord(models.Model):
+    """
+    Base for models with content_storage files. Each save is one transaction, so a file's new
+    reference is committed or rolled back together with the record holding it.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+
+def content_storage():
+    """
+    Function to get the storage for uploads, given to file fields as storage=content_storage.
+    """
+
+    return content_storage_instance
+
+
+def content_fields():
+    """
+    Function to get every (model, field name) stored with content_storage, for recount_blobs.
+    """
+
+    from django.apps import apps
+
+    return [
+        (model, field.name)
+        for model in apps.get_models()
+        for field in model._meta.local_concrete_fields
+        if getattr(field, "storage", None) is content_storage_instance
+    ]
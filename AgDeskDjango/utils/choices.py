@@ -0,0 +1,151 @@
+"""
+Choices for the farm-scoped select fields on the task, maintenance, damage and expense forms.
+Pages often render a create and an edit form together, and each used to look up the current user
+and query the same farm members, damages or maintenance records. formChoices resolves each list
+once per request and shares it between every form built for the same request.user. It also keeps
+the list in the cache for CHOICES_TTL seconds, so that successive page views can reuse it.
+Fields keep their filtered queryset, so a submitted choice is still checked against the database.
+"""
+
+# Imports
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from assetMaintenance.models import Damage, Maintenance
+from UserAuth.models import UserProfile
+
+
+# Constants
+CHOICES_PREFIX   = "formChoices"
+CHOICES_TTL      = 60 # Also bounds how long a member who switched farms lingers in the old farm's list
+ASSET_CATEGORIES = ("SE", "LE", "LV", "HV")
+
+
+def users_key(farmID):
+    return f"{CHOICES_PREFIX}:users:{farmID}"
+
+
+def damages_key(assetID, assetCategory):
+    return f"{CHOICES_PREFIX}:damages:{assetCategory}:{assetID}"
+
+
+def maintenance_key(assetID):
+    return f"{CHOICES_PREFIX}:maintenance:{assetID}"
+
+
+def set_choices(field, queryset, choices):
+    """
+    Function to point a ModelChoiceField at a queryset for validation, while rendering the given
+    (value, label) choices instead of querying it again.
+    """
+
+    field.queryset = queryset
+    field.choices  = ([("", field.empty_label)] if field.empty_label is not None else []) + choices
+
+
+# Form Choices
+class formChoices():
+    """
+    Builds the farm-scoped choices for one user's forms.
+    """
+
+    def __init__(self, farmID):
+        self.farmID   = farmID
+        self.resolved = {}
+
+    @classmethod
+    def forUser(cls, user):
+        """
+        Returns the choices for a user's current farm. The instance is kept on the user object, which
+        is request.user for the lifetime of a request, so every form on a page shares it.
+        """
+
+        if not isinstance(user, UserProfile):
+            user = UserProfile.objects.get(username=user)
+
+        choices = getattr(user, "_formChoices", None)
+        if choices is None or choices.farmID != user.currentFarm_id:
+            choices           = cls(user.currentFarm_id)
+            user._formChoices = choices
+
+        return choices
+
+    def resolve(self, key, build):
+        if key not in self.resolved:
+            rows = cache.get(key)
+            if rows is None:
+                rows = build()
+                cache.set(key, rows, CHOICES_TTL)
+            self.resolved[key] = rows
+
+        return self.resolved[key]
+
+    def farmUsers(self, field, activeOnly=True):
+        """
+        Function to fill a field with the members of the farm.
+        """
+
+        members = self.resolve(users_key(self.farmID), lambda: [
+            (member.pk, str(member), member.is_active)
+            for member in UserProfile.objects
+                .filter(currentFarm_id=self.farmID)
+                .only("username", "is_active")
+                .order_by("pk")
+        ])
+
+        queryset = UserProfile.objects.filter(currentFarm_id=self.farmID)
+        if activeOnly:
+            queryset = queryset.filter(is_active=True)
+
+        set_choices(field, queryset, [
+            (memberID, label)
+            for memberID, label, isActive in members
+            if isActive or not activeOnly
+        ])
+
+    def damages(self, field, assetID, assetCategory):
+        """
+        Function to fill a field with an asset's damage records.
+        """
+
+        queryset = Damage.objects.filter(assetID=assetID, assetID__assetPrefix=assetCategory, deleted=False)
+        choices  = self.resolve(damages_key(assetID, assetCategory), lambda: [
+            (damage.pk, str(damage))
+            for damage in queryset.order_by("pk")
+        ])
+
+        set_choices(field, queryset, choices)
+
+    def maintenance(self, field, assetID):
+        """
+        Function to fill a field with an asset's maintenance records.
+        """
+
+        queryset = Maintenance.objects.filter(assetID=assetID, deleted=False)
+        choices  = self.resolve(maintenance_key(assetID), lambda: [
+            (record.pk, str(record))
+            for record in queryset.order_by("pk")
+        ])
+
+        set_choices(field, queryset, choices)
+
+
+# Refresh
+@receiver(post_save  , sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def refresh_user_choices(sender, instance, **kwargs):
+    cache.delete(users_key(instance.currentFarm_id))
+
+
+@receiver(post_save  , sender=Damage)
+@receiver(post_delete, sender=Damage)
+def refresh_damage_choices(sender, instance, **kwargs):
+    # Forms look damages up by the asset's category, which is not known here without a query
+    cache.delete_many([damages_key(instance.assetID_id, category) for category in ASSET_CATEGORIES])
+
+
+@receiver(post_save  , sender=Maintenance)
+@receiver(post_delete, sender=Maintenance)
+def refresh_maintenance_choices(sender, instance, **kwargs):
+    cache.delete(maintenance_key(instance.assetID_id))
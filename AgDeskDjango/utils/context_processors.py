@@ -1,31 +1,38 @@
-from UserAuth.models import UserProfile
-from FarmAcc.models import FarmInfo
+from Settings.organisation import orgSettingsManager
+from utils.tenancy import current_farm
 
 def current_user_context(request):
-    try:
-        current_user = UserProfile.objects.get(id=request.user.id)
-        username = current_user.username
-        firstName = current_user.first_name
-        lastName = current_user.last_name
-        if current_user.currentFarm_id is None:
-            farmName = "No Farm Assigned"
-            current_user.currentFarm_id = 0
-            currentFarmID = 0
-        else:
-            currentFarmID = current_user.currentFarm_id
-            farmName = FarmInfo.objects.get(id = currentFarmID).farm_name
-
-        context = {
-            "username": username,
-            "firstName": firstName,
-            "lastName": lastName,
-            "farmName": farmName,
-            "currentFarmID": currentFarmID
-        }
-        return context
-
-    except UserProfile.DoesNotExist: 
+    # The user and farm are resolved by AuthenticationMiddleware and TenantMiddleware
+    current_user = request.user
+    if not current_user.is_authenticated:
         return {
             "currentFarmID": 0
         }
-    
\ No newline at end of file
+
+    farm = getattr(request, "farm", None) or current_farm(current_user)
+    if farm is None:
+        farmName      = "No Farm Assigned"
+        currentFarmID = 0
+    else:
+        farmName      = farm.farm_name
+        currentFarmID = farm.id
+
+    context = {
+        "username": current_user.username,
+        "firstName": current_user.first_name,
+        "lastName": current_user.last_name,
+        "farmName": farmName,
+        "currentFarmID": currentFarmID
+    }
+    return context
+
+
+def org_settings_context(request):
+    # Date/time format and unit labels of the current farm, for formatting in any template
+    farm        = getattr(request, "farm", None)
+    orgSettings = orgSettingsManager().farmSettings(farm.id if farm is not None else None)
+
+    return {
+        "orgSettings"    : orgSettings                   ,
+        "datetime_format": orgSettings["datetime_format"]
+    }
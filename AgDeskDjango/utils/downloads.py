@@ -0,0 +1,129 @@
+"""
+Protected file downloads.
+Django checks that the user may download a file, then hands the transfer to the front-end server,
+so the worker is free again as soon as the headers are sent, however large the file is:
+    "nginx"   : X-Accel-Redirect to FILE_DOWNLOAD_INTERNAL_URL + the file's name, which nginx serves
+                from an `internal` location aliased to MEDIA_ROOT
+    "sendfile": X-Sendfile with the file's path (Apache mod_xsendfile, lighttpd)
+    "django"  : Django streams the file in chunks, honouring single byte ranges (development)
+The backend is chosen with the FILE_DOWNLOAD_BACKEND setting.
+"""
+
+# Imports
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+
+# Constants
+DOWNLOAD_BACKENDS   = ("nginx", "sendfile", "django")
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+RANGE_PATTERN       = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def download_headers(response, filename):
+    contentType, encoding = mimetypes.guess_type(filename)
+
+    response["Content-Type"]        = contentType or "application/octet-stream"
+    response["Content-Disposition"] = content_disposition_header(True, filename)
+    if encoding:
+        # e.g. a .gz file is sent as is, not decompressed by the browser
+        response["Content-Type"] = "application/octet-stream"
+
+    return response
+
+
+def byte_range(header, size):
+    """
+    Function to read a Range header into the (start, end) bytes to send, both inclusive.
+    Returns None to send the whole file (no range, or one this backend does not support, such as
+    several ranges), or raises ValueError for a range outside the file.
+    """
+
+    match = RANGE_PATTERN.match(header or "")
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+
+    start, end = match.groups()
+    if start == "":
+        # The last n bytes
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end   = min(int(end), size - 1) if end != "" else size - 1
+
+    if start > end or start >= size:
+        raise ValueError(f"Range not satisfiable: {header}")
+
+    return start, end
+
+
+def read_chunks(file, start, length):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(DOWNLOAD_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def stream_file(request, fieldFile, filename):
+    """
+    Function to stream a file through Django, whole or as the single byte range requested.
+    """
+
+    size = fieldFile.size
+    try:
+        requested = byte_range(request.headers.get("Range"), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if requested is None:
+        response = FileResponse(fieldFile.open("rb"), as_attachment=True, filename=filename)
+        response.block_size       = DOWNLOAD_CHUNK_SIZE
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    start, end = requested
+    response   = StreamingHttpResponse(read_chunks(fieldFile.open("rb"), start, end - start + 1), status=206)
+    response["Content-Length"] = end - start + 1
+    response["Content-Range"]  = f"bytes {start}-{end}/{size}"
+    response["Accept-Ranges"]  = "bytes"
+
+    return download_headers(response, filename)
+
+
+def download_response(request, fieldFile, filename=None):
+    """
+    Function to send a stored file (a FieldFile) to the user as an attachment, with the configured
+    download backend. Callers must check that the user may download it first.
+    """
+
+    backend  = getattr(settings, "FILE_DOWNLOAD_BACKEND", "django")
+    filename = filename or os.path.basename(fieldFile.name)
+    if backend not in DOWNLOAD_BACKENDS:
+        raise ImproperlyConfigured(f"FILE_DOWNLOAD_BACKEND must be one of {DOWNLOAD_BACKENDS}, not {backend!r}")
+
+    if backend == "nginx":
+        response = HttpResponse()
+        response["X-Accel-Redirect"] = quote(settings.FILE_DOWNLOAD_INTERNAL_URL + fieldFile.name)
+        return download_headers(response, filename)
+
+    if backend == "sendfile":
+        response = HttpResponse()
+        response["X-Sendfile"] = fieldFile.path
+        return download_headers(response, filename)
+
+    return stream_file(request, fieldFile, filename)
@@ -0,0 +1,92 @@
+"""
+Keyset (cursor) pagination shared by the register and listing views.
+A page is the rows after the last row of the previous page in sort order, rather than an OFFSET,
+so later pages cost the same as the first. The sort is described by an order: a tuple of
+(field, parse) pairs ending in a unique field, where parse turns the cursor text back into a value.
+"""
+
+# Imports
+from django.db.models import Q
+
+
+# Constants
+CURSOR_SEPARATOR = "_"
+
+
+def field_value(row, field):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def encode_cursor(row, order):
+    """
+    Function to turn the last row of a page (a dict or a model instance) into an opaque cursor.
+    """
+
+    return CURSOR_SEPARATOR.join(str(field_value(row, field)) for field, _ in order)
+
+
+def decode_cursor(cursor, order):
+    """
+    Function to turn a cursor back into the values of the sort columns. Invalid cursors are treated
+    as no cursor, so a mangled URL just shows the first page.
+    """
+
+    if not cursor:
+        return None
+
+    # Only the first column may contain the separator, e.g. a name
+    parts = cursor.rsplit(CURSOR_SEPARATOR, len(order) - 1)
+    if len(parts) != len(order):
+        return None
+
+    try:
+        values = [parse(part) for (_, parse), part in zip(order, parts)]
+    except (ArithmeticError, ValueError):
+        return None
+
+    if None in values:
+        return None
+
+    return values
+
+
+def after_cursor(records, cursor, order, descending=True):
+    """
+    Function to filter a queryset sorted on every column of order to the rows after cursor:
+        (a < x) OR (a = x AND b < y) OR (a = x AND b = y AND c < z) ...
+    """
+
+    values = decode_cursor(cursor, order)
+    if values is None:
+        return records
+
+    lookup    = "lt" if descending else "gt"
+    condition = Q()
+    for position, (field, _) in enumerate(order):
+        equal = {prior: value for (prior, _), value in zip(order[:position], values)}
+        condition |= Q(**equal, **{f"{field}__{lookup}": values[position]})
+
+    return records.filter(condition)
+
+
+def order_by(order, descending=True):
+    return [f"-{field}" if descending else field for field, _ in order]
+
+
+def page_of(records, cursor, order, limit, descending=True):
+    """
+    Returns (rows, next cursor or None) for one page of a queryset.
+    """
+
+    records = after_cursor(records, cursor, order, descending)
+    records = records.order_by(*order_by(order, descending))
+
+    # Fetch one extra row to know if there is another page without a COUNT query
+    page = list(records[:limit + 1])
+
+    nextCursor = None
+    if len(page) > limit:
+        page       = page[:limit]
+        nextCursor = encode_cursor(page[-1], order)
+
+    return page, nextCursor
@@ -0,0 +1,165 @@
+"""
+Image renditions for uploaded pictures (assets, damage, contacts, teams and farms).
+Each uploaded image gets WebP renditions stored alongside the original, e.g.
+    images/asset_images/tractor.jpg -> images/asset_images/tractor.thumb.webp
+Renditions are rendered on a background thread once the upload has been committed, and older or
+default images by the render_renditions command. Rendition URLs follow from the naming scheme
+alone, without asking storage whether the rendition exists, so listing pages cost no storage round
+trip per row; pages fall back to the original image if a rendition is not there yet.
+"""
+
+# Imports
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_save
+from django_cleanup.signals import cleanup_post_delete
+from PIL import Image, ImageOps
+
+
+# Constants
+RENDITION_SIZES = {
+    "thumb" : (160, 160), # Cropped to exactly this size, for tables and cards
+    "medium": (640, 640)  # Scaled to fit within this size, for detail pages
+}
+RENDITION_QUALITY = 80
+
+logger    = logging.getLogger(__name__)
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="renditions")
+_fields   = {} # Model class -> image field names
+
+
+# Naming
+def rendition_name(name, size):
+    stem, _ = os.path.splitext(name)
+    return f"{stem}.{size}.webp"
+
+
+def rendition_url(image, size="thumb"):
+    """
+    Function to get the URL of an image's rendition, whether or not it has been rendered yet.
+    image can be a FieldFile or a stored file name (as returned by .values()).
+    """
+
+    name = getattr(image, "name", image)
+    if not name:
+        return ""
+
+    return default_storage.url(rendition_name(name, size))
+
+
+def original_url(image):
+    """
+    Function to get the URL of an image itself, to fall back to while its renditions are rendered.
+    """
+
+    name = getattr(image, "name", image)
+    if not name:
+        return ""
+
+    return default_storage.url(name)
+
+
+def image_names():
+    """
+    Function to get the names of every stored image with renditions, including field defaults.
+    """
+
+    names = set()
+    for model, fieldNames in _fields.items():
+        for fieldName in fieldNames:
+            names.update(model._base_manager.exclude(**{fieldName: ""}).values_list(fieldName, flat=True))
+            default = model._meta.get_field(fieldName).get_default()
+            if default:
+                names.add(default)
+
+    names.discard(None)
+
+    return sorted(names)
+
+
+# Rendering
+def render_renditions(name):
+    """
+    Function to write every rendition of a stored image, replacing any that already exist.
+    """
+
+    try:
+        with default_storage.open(name, "rb") as original:
+            image = ImageOps.exif_transpose(Image.open(original))
+            image.load()
+    except (OSError, ValueError) as err:
+        logger.warning("Could not render renditions of %s: %s", name, err)
+        return
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    for size, dimensions in RENDITION_SIZES.items():
+        if size == "thumb":
+            rendition = ImageOps.fit(image, dimensions, Image.LANCZOS)
+        else:
+            rendition = image.copy()
+            rendition.thumbnail(dimensions, Image.LANCZOS)
+
+        buffer = BytesIO()
+        rendition.save(buffer, "WEBP", quality=RENDITION_QUALITY)
+
+        target = rendition_name(name, size)
+        if default_storage.exists(target):
+            default_storage.delete(target)
+        default_storage.save(target, ContentFile(buffer.getvalue()))
+
+
+def schedule_renditions(name):
+    """
+    Function to render an image's renditions off the request thread once the transaction commits.
+    """
+
+    transaction.on_commit(lambda: _executor.submit(render_renditions, name))
+
+
+def delete_renditions(name):
+    for size in RENDITION_SIZES:
+        target = rendition_name(name, size)
+        if default_storage.exists(target):
+            default_storage.delete(target)
+
+
+# Registration
+def register(model, *fieldNames):
+    """
+    Function to have renditions maintained for a model's image fields.
+    Subclasses are covered too, which matters for the polymorphic asset models.
+    """
+
+    _fields[model] = fieldNames
+
+
+def image_saved(sender, instance, **kwargs):
+    for model, fieldNames in _fields.items():
+        if not isinstance(instance, model):
+            continue
+
+        for fieldName in fieldNames:
+            name = getattr(instance, fieldName).name
+            # Each distinct upload gets its own name (see utils.blobstore), so an existing rendition
+            # means nothing changed, or the same image was uploaded before
+            if name and not default_storage.exists(rendition_name(name, "thumb")):
+                schedule_renditions(name)
+
+
+def image_deleted(sender, file, **kwargs):
+    # django_cleanup removed an original (model deleted or image replaced), remove its renditions
+    # unless the original is still stored for other records
+    if not file.storage.exists(file.name):
+        delete_renditions(file.name)
+
+
+post_save.connect(image_saved, dispatch_uid="renditions_image_saved")
+cleanup_post_delete.connect(image_deleted, dispatch_uid="renditions_image_deleted")
@@ -0,0 +1,99 @@
+"""
+Soft deletion.
+Assets and their damage, maintenance, expenses, logs and metrics, kanbans and emergency contacts
+are not removed when a user deletes them. Instead, their deleted flag is set and deletedAt records
+when. Each of these models uses a SoftDeleteManager as objects, so queries can ask for
+    Model.objects.alive()  # deleted = false
+    Model.objects.dead()   # deleted = true
+rather than every call site remembering the filter. Each table also has a partial index
+WHERE deleted = false (see alive_index), so live queries never read dead rows. The purge_deleted
+command hard deletes tombstones once they are old enough.
+soft_delete() marks a whole queryset in one UPDATE, which sends no post_save, so it sends
+soft_deleted instead for anything kept in step with the rows.
+"""
+
+# Imports
+from django.db import models
+from django.db.models.signals import pre_save
+from django.dispatch import Signal
+from django.utils import timezone
+from polymorphic.managers import PolymorphicManager
+from polymorphic.query import PolymorphicQuerySet
+
+
+# Constants
+_models = [] # Soft deletable models
+
+
+# Sent by soft_delete() with the primary keys of the rows it marked deleted (pks)
+soft_deleted = Signal()
+
+
+# Querysets and Managers
+class SoftDeleteQuerySet(models.QuerySet):
+    def alive(self):
+        return self.filter(deleted=False)
+
+    def dead(self):
+        return self.filter(deleted=True)
+
+    def soft_delete(self):
+        """
+        Function to mark every row of the queryset deleted in one UPDATE.
+        """
+
+        if not soft_deleted.has_listeners(self.model):
+            return self.alive().update(deleted=True, deletedAt=timezone.now())
+
+        pks   = list(self.alive().values_list("pk", flat=True))
+        count = self.model._base_manager.filter(pk__in=pks).update(deleted=True, deletedAt=timezone.now())
+        soft_deleted.send(sender=self.model, pks=pks)
+
+        return count
+
+
+class SoftDeletePolymorphicQuerySet(SoftDeleteQuerySet, PolymorphicQuerySet):
+    pass
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    pass
+
+
+class SoftDeletePolymorphicManager(PolymorphicManager.from_queryset(SoftDeletePolymorphicQuerySet)):
+    pass
+
+
+def alive_index(*fields, name):
+    """
+    Function to build an index over a model's live rows only.
+    """
+
+    return models.Index(fields=list(fields), condition=models.Q(deleted=False), name=name)
+
+
+# Registration
+def register(model):
+    """
+    Function to have deletedAt kept in step with deleted when a model is saved.
+    Subclasses are covered too, which matters for the polymorphic asset models.
+    """
+
+    _models.append(model)
+
+
+def registered_models():
+    return list(_models)
+
+
+def stamp_deletion(sender, instance, **kwargs):
+    if not isinstance(instance, tuple(_models)):
+        return
+
+    if not instance.deleted:
+        instance.deletedAt = None
+    elif instance.deletedAt is None:
+        instance.deletedAt = timezone.now()
+
+
+pre_save.connect(stamp_deletion, dispatch_uid="softdelete_stamp_deletion")
@@ -0,0 +1,37 @@
+"""
+Per request tenant context.
+Every page needs the signed in user's current farm, for the navigation bar if nothing else. It used
+to be looked up again by the context processor and by most views, on top of the user that
+AuthenticationMiddleware had already loaded. AgDeskDjango.middleware.TenantMiddleware resolves the
+farm once, attaches it as request.farm and sets it on request.user.currentFarm, so views and
+templates share one instance.
+The farm is not cached between requests: UserAuth.backends.PrefetchedUserBackend loads it in the
+same query as the signed in user, so it costs nothing extra and is always current.
+"""
+
+# Imports
+from FarmAcc.models import FarmInfo
+from UserAuth.models import UserProfile
+
+
+def current_farm(user):
+    """
+    Function to get a user's current farm, or None for anonymous users and users without a farm.
+    The farm is also set on user.currentFarm, so reading it from the user costs no query.
+    """
+
+    if not user.is_authenticated or user.currentFarm_id is None:
+        return None
+
+    field = UserProfile.currentFarm.field
+    if field.is_cached(user):
+        return user.currentFarm
+
+    # Users loaded without their farm, e.g. from sessions signed in through another backend
+    farm = FarmInfo.objects.filter(id=user.currentFarm_id).first()
+    if farm is None:
+        return None
+
+    field.set_cached_value(user, farm)
+
+    return farm
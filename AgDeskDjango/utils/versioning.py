@@ -0,0 +1,49 @@
+"""
+Versions of cached data.
+Data cached per version, e.g. a farm's emergency contacts bundle, is keyed by a version of what it
+was built from, and the version goes up on every write to that data. The versions are counters
+kept in the database (FarmAcc.CacheVersion), not in the cache, so every process reads the same
+version: none can keep serving data cached before a write it did not see. Each counter is bumped
+by the writing transaction, so the new version is visible exactly when the write is.
+Reading a version costs one query by primary key.
+"""
+
+# Imports
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from FarmAcc.models import CacheVersion
+
+
+def version_key(namespace, objectID):
+    return f"{namespace}:{objectID}"
+
+
+def current_version(namespace, objectID):
+    """
+    Function to get the current version of an object's cached data, 0 if it was never written.
+    """
+
+    version = CacheVersion.objects                                                                   \
+        .filter(key=version_key(namespace, objectID))                                      \
+        .values_list("version", flat=True)                                                 \
+        .first()
+
+    return version or 0
+
+
+def bump_version(namespace, objectID):
+    """
+    Function to move an object's cached data on to a new version, after a write to it.
+    """
+
+    key = version_key(namespace, objectID)
+    if CacheVersion.objects.filter(key=key).update(version=F("version") + 1):
+        return
+
+    try:
+        with transaction.atomic():
+            CacheVersion.objects.create(key=key, version=1)
+    except IntegrityError:
+        # Created by a concurrent write meanwhile
+        CacheVersion.objects.filter(key=key).update(version=F("version") + 1)